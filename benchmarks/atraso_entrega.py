@@ -0,0 +1,58 @@
+import argparse
+import os
+import sys
+import timeit
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'streamlit'))
+
+from carregamento_dados import ler_tabelas
+from dados_preprocessamento import montar_modelo
+
+
+def replicar(tabela, fator):
+    return pd.concat([tabela] * fator, ignore_index=True)
+
+
+def rotulo_antigo(pedidos):
+    return pedidos['delivery_delay'].apply(lambda x: 'Sim' if x > 0 else 'Não')
+
+
+def rotulo_novo(pedidos):
+    is_late = (pedidos['delivery_delay'] > 0).to_numpy()
+    return is_late, np.where(is_late, 'Sim', 'Não')
+
+
+def taxa_estado_antiga(pedidos):
+    return pedidos.groupby('customer_state', observed=True)['atraso_entrega'].apply(lambda x: (x == 'Sim').mean() * 100)
+
+
+def taxa_estado_nova(pedidos):
+    return pedidos.groupby('customer_state', observed=True)['is_late'].mean() * 100
+
+
+def medir(funcao, pedidos, repeticoes):
+    return min(timeit.repeat(lambda: funcao(pedidos), number=1, repeat=repeticoes))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compara o cálculo antigo e o vetorizado do atraso de entrega.')
+    parser.add_argument('--fator', type=int, default=10, help='Quantas vezes a tabela de pedidos é replicada')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    argumentos = parser.parse_args()
+
+    pedidos = replicar(montar_modelo(*ler_tabelas())['pedidos'], argumentos.fator)
+    pd.testing.assert_series_equal(
+        taxa_estado_antiga(pedidos),
+        taxa_estado_nova(pedidos),
+        check_names=False,
+    )
+    print(f'{len(pedidos)} pedidos ({argumentos.fator}x)')
+    for nome, antiga, nova in [
+        ('rótulo atraso_entrega', rotulo_antigo, rotulo_novo),
+        ('percentual de atraso por estado', taxa_estado_antiga, taxa_estado_nova),
+    ]:
+        tempo_antigo = medir(antiga, pedidos, argumentos.repeticoes)
+        tempo_novo = medir(nova, pedidos, argumentos.repeticoes)
+        print(f'{nome}: antigo {tempo_antigo * 1000:.1f} ms, novo {tempo_novo * 1000:.1f} ms ({tempo_antigo / tempo_novo:.1f}x)')
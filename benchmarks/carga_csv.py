@@ -0,0 +1,44 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'streamlit'))
+
+from carregamento_dados import PASTA_DADOS, TABELAS, ler_csv
+
+
+def ler_csv_antigo(caminho, colunas):
+    datas = [coluna for coluna, tipo in colunas.items() if tipo.startswith('datetime')]
+    tipos = {coluna: tipo for coluna, tipo in colunas.items() if coluna not in datas}
+    return pd.read_csv(caminho, usecols=list(colunas), dtype=tipos, parse_dates=datas, encoding='utf-8-sig')[list(colunas)]
+
+
+def medir_tabela(leitor, nome):
+    especificacao = TABELAS[nome]
+    inicio = time.perf_counter()
+    leitor(os.path.join(PASTA_DADOS, especificacao['arquivo']), especificacao['colunas'])
+    return time.perf_counter() - inicio
+
+
+def medir(leitor, trabalhadores):
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=trabalhadores) as executor:
+        tempos = dict(zip(TABELAS, executor.map(lambda nome: medir_tabela(leitor, nome), TABELAS)))
+    return time.perf_counter() - inicio, tempos
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compara a carga sequencial com pandas e a carga paralela com o leitor CSV do pyarrow (sem o cache Parquet).')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    argumentos = parser.parse_args()
+
+    for rotulo, leitor, trabalhadores in [
+        ('pandas sequencial', ler_csv_antigo, 1),
+        ('pyarrow sequencial', ler_csv, 1),
+        ('pyarrow paralelo', ler_csv, len(TABELAS)),
+    ]:
+        total, tempos = min((medir(leitor, trabalhadores) for _ in range(argumentos.repeticoes)), key=lambda resultado: resultado[0])
+        print(f'{rotulo}: {total * 1000:.0f} ms (maior tabela: {max(tempos, key=tempos.get)} {max(tempos.values()) * 1000:.0f} ms)')
@@ -0,0 +1,108 @@
+import argparse
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+AMPLIADAS = {
+    'olist_customers_dataset.csv': {
+        'ids': ['customer_id', 'customer_unique_id'],
+    },
+    'olist_orders_dataset.csv': {
+        'ids': ['order_id', 'customer_id'],
+        'datas': [
+            'order_purchase_timestamp', 'order_approved_at', 'order_delivered_carrier_date',
+            'order_delivered_customer_date', 'order_estimated_delivery_date',
+        ],
+    },
+    'olist_order_items_dataset.csv': {
+        'ids': ['order_id'],
+        'datas': ['shipping_limit_date'],
+        'valores': ['price', 'freight_value'],
+    },
+    'olist_order_payments_dataset.csv': {
+        'ids': ['order_id'],
+        'valores': ['payment_value'],
+    },
+    'olist_order_reviews_dataset.csv': {
+        'ids': ['review_id', 'order_id'],
+        'datas': ['review_creation_date', 'review_answer_timestamp'],
+    },
+}
+DESLOCAMENTO_DIAS = 60
+VARIACAO_PRECO = 0.15
+
+
+def formato_data(coluna):
+    exemplo = coluna.dropna()
+    return '%Y-%m-%d' if len(exemplo) and len(exemplo.iloc[0]) == 10 else '%Y-%m-%d %H:%M:%S'
+
+
+def ler_origem(origem):
+    tabelas = {}
+    for arquivo, especificacao in AMPLIADAS.items():
+        tabela = pd.read_csv(os.path.join(origem, arquivo), dtype=str, encoding='utf-8-sig')
+        datas = {
+            coluna: (pd.to_datetime(tabela[coluna], format='ISO8601'), formato_data(tabela[coluna]))
+            for coluna in especificacao.get('datas', [])
+        }
+        valores = {coluna: pd.to_numeric(tabela[coluna]) for coluna in especificacao.get('valores', [])}
+        tabelas[arquivo] = (tabela, datas, valores)
+    return tabelas
+
+
+def renomear(ids, copia):
+    return ids + f'{copia:04x}'
+
+
+def copia_sintetica(tabelas, copia, semente):
+    if copia == 0:
+        return {arquivo: tabela for arquivo, (tabela, _, _) in tabelas.items()}
+    rng = np.random.default_rng([semente, copia])
+    pedidos = tabelas['olist_orders_dataset.csv'][0]['order_id']
+    deslocamentos = pd.Series(
+        pd.to_timedelta(rng.integers(-DESLOCAMENTO_DIAS, DESLOCAMENTO_DIAS + 1, len(pedidos)), unit='D'),
+        index=pedidos.to_numpy(),
+    )
+    fatores = pd.Series(rng.lognormal(0, VARIACAO_PRECO, len(pedidos)), index=pedidos.to_numpy())
+
+    geradas = {}
+    for arquivo, (tabela, datas, valores) in tabelas.items():
+        gerada = tabela.copy()
+        for coluna in AMPLIADAS[arquivo]['ids']:
+            gerada[coluna] = renomear(tabela[coluna], copia)
+        if 'order_id' in tabela:
+            deslocamento = tabela['order_id'].map(deslocamentos)
+            fator = tabela['order_id'].map(fatores)
+            for coluna, (serie, formato) in datas.items():
+                gerada[coluna] = (serie + deslocamento).dt.strftime(formato)
+            for coluna, serie in valores.items():
+                gerada[coluna] = (serie * fator).round(2)
+        geradas[arquivo] = gerada
+    return geradas
+
+
+def ampliar(origem, destino, fator, semente=0):
+    os.makedirs(destino, exist_ok=True)
+    for arquivo in os.listdir(origem):
+        if arquivo.endswith('.csv') and arquivo not in AMPLIADAS:
+            shutil.copyfile(os.path.join(origem, arquivo), os.path.join(destino, arquivo))
+    tabelas = ler_origem(origem)
+    linhas = dict.fromkeys(AMPLIADAS, 0)
+    for copia in range(fator):
+        for arquivo, tabela in copia_sintetica(tabelas, copia, semente).items():
+            tabela.to_csv(os.path.join(destino, arquivo), mode='w' if copia == 0 else 'a', header=copia == 0, index=False)
+            linhas[arquivo] += len(tabela)
+    return linhas
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gera uma versão ampliada do dataset Olist com pedidos, itens, pagamentos, avaliações e clientes sintéticos, mantendo as chaves consistentes entre os arquivos.')
+    parser.add_argument('destino', help='Pasta onde os CSVs ampliados são gravados')
+    parser.add_argument('--origem', default='dados', help='Pasta com os CSVs originais do Olist')
+    parser.add_argument('--fator', type=int, default=10, help='Quantas cópias sintéticas de cada pedido são geradas (1 reproduz a origem)')
+    parser.add_argument('--semente', type=int, default=0)
+    argumentos = parser.parse_args()
+
+    linhas = ampliar(argumentos.origem, argumentos.destino, argumentos.fator, argumentos.semente)
+    print(', '.join(f'{arquivo}: {quantidade}' for arquivo, quantidade in linhas.items()))
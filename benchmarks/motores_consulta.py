@@ -0,0 +1,97 @@
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'streamlit'))
+
+from agregacoes import AGREGACOES
+from artefatos import ler_modelo, versao_atual
+from carregamento_dados import ler_tabelas
+from dados_preprocessamento import montar_modelo
+from filtros import IndiceFiltros, criar_filtro
+from motor_duckdb import MotorDuckDB
+
+PARAMETROS = {'vendas_tempo': [('M',), ('Q',), ('A',)]}
+
+
+class RecorteSimples:
+    def __init__(self, indice, filtro):
+        self.itens, self.pedidos, self.pagamentos = indice.filtrar(filtro)
+
+
+def filtros_teste(modelo):
+    datas = modelo['itens']['order_purchase_timestamp']
+    inicio, fim = datas.min().date(), datas.max().date()
+    estados = modelo['itens']['customer_state'].value_counts().index[:3].tolist()
+    categorias = modelo['itens']['product_category_name_english'].value_counts().index[:2].tolist()
+    return [
+        criar_filtro(inicio, fim),
+        criar_filtro(fim - timedelta(days=90), fim),
+        criar_filtro(inicio, fim, estados=estados),
+        criar_filtro(inicio, fim, categorias=categorias, nota_minima=4),
+        criar_filtro(fim - timedelta(days=365), fim, estados=estados[:1], preco_intervalo=(50, 500)),
+        criar_filtro(fim + timedelta(days=1), fim + timedelta(days=2)),
+    ]
+
+
+def normalizar(tabela):
+    tabela = tabela.reset_index(drop=True)
+    for coluna in tabela:
+        if not pd.api.types.is_numeric_dtype(tabela[coluna]) and not pd.api.types.is_datetime64_any_dtype(tabela[coluna]):
+            tabela[coluna] = tabela[coluna].astype(object).where(tabela[coluna].notna(), None).astype(str)
+        elif pd.api.types.is_datetime64_any_dtype(tabela[coluna]):
+            tabela[coluna] = tabela[coluna].astype('datetime64[ns]')
+        else:
+            tabela[coluna] = tabela[coluna].astype('float64')
+    return tabela
+
+
+def comparar(referencia, resultado, contexto):
+    if isinstance(referencia, dict):
+        for chave, valor in referencia.items():
+            if not np.isclose(valor, resultado[chave], rtol=1e-6, equal_nan=True):
+                raise AssertionError(f'{contexto}: {chave} difere ({valor} != {resultado[chave]})')
+        return
+    pd.testing.assert_frame_equal(normalizar(referencia), normalizar(resultado), rtol=1e-6, obj=contexto)
+
+
+def medir(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return resultado, time.perf_counter() - inicio
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Valida o motor DuckDB contra a implementação de referência em pandas e compara os tempos de cada agregação.')
+    parser.add_argument('--memoria', action='store_true', help='Consulta os DataFrames em memória em vez do artefato Parquet')
+    argumentos = parser.parse_args()
+
+    versao = versao_atual()
+    modelo = ler_modelo(versao) if versao else montar_modelo(*ler_tabelas())
+    indice = IndiceFiltros(modelo)
+    motor = MotorDuckDB.de_artefato(versao) if versao and not argumentos.memoria else MotorDuckDB.de_modelo(modelo)
+    print(f"Fonte do DuckDB: {'artefato ' + versao if versao and not argumentos.memoria else 'DataFrames em memória'}")
+
+    tempos = {}
+    for posicao, filtro in enumerate(filtros_teste(modelo)):
+        recorte, tempo_filtro = medir(lambda: RecorteSimples(indice, filtro))
+        _, tempo_filtro_duckdb = medir(lambda: motor.filtrar(filtro))
+        tempos.setdefault('filtro', [0.0, 0.0])
+        tempos['filtro'][0] += tempo_filtro
+        tempos['filtro'][1] += tempo_filtro_duckdb
+        for nome in sorted(MotorDuckDB.AGREGACOES):
+            for parametros in PARAMETROS.get(nome, [()]):
+                referencia, tempo_pandas = medir(lambda: AGREGACOES[nome](recorte, *parametros))
+                resultado, tempo_duckdb = medir(lambda: motor.responder(nome, filtro, *parametros))
+                comparar(referencia, resultado, f'filtro {posicao}, {nome}{parametros}')
+                tempos.setdefault(nome, [0.0, 0.0])
+                tempos[nome][0] += tempo_pandas
+                tempos[nome][1] += tempo_duckdb
+
+    print(f'{len(filtros_teste(modelo))} filtros, {len(MotorDuckDB.AGREGACOES)} agregações: resultados idênticos')
+    for nome, (tempo_pandas, tempo_duckdb) in tempos.items():
+        print(f'{nome}: pandas {tempo_pandas * 1000:.1f} ms, duckdb {tempo_duckdb * 1000:.1f} ms')
@@ -0,0 +1,184 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'streamlit'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from agregacoes import CONSULTAS_ABAS, CacheAgregacoes, Recorte
+from artefatos import PASTA_ARTEFATOS, ler_modelo, publicar_modelo
+from carregamento_dados import PASTA_CACHE, ler_tabelas, tempos_carga
+from comentarios import IndiceComentarios, construir_indice_comentarios
+from cubo import Cubo, construir_cubo
+from dados_preprocessamento import montar_modelo
+from dados_sinteticos import ampliar
+from filtros import PERIODOS, IndiceFiltros, criar_filtro, intervalo_periodo
+from instrumentacao import etapa, iniciar
+from motor_duckdb import MotorDuckDB
+
+
+def pico_memoria():
+    try:
+        with open('/proc/self/status') as arquivo:
+            for linha in arquivo:
+                if linha.startswith('VmHWM:'):
+                    return int(linha.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def zerar_pico():
+    try:
+        with open('/proc/self/clear_refs', 'w') as arquivo:
+            arquivo.write('5')
+    except OSError:
+        pass
+
+
+@contextmanager
+def medir(nome, **atributos):
+    zerar_pico()
+    with etapa(nome, **atributos) as registro:
+        yield registro
+    registro['pico_memoria_mb'] = round(pico_memoria() / 2 ** 20, 1)
+
+
+def filtros_sidebar(modelo):
+    datas = modelo['pedidos']['order_purchase_timestamp']
+    inicio, fim = datas.min().date(), datas.max().date()
+    filtros = {nome: criar_filtro(*intervalo_periodo(nome, inicio, fim)) for nome in PERIODOS}
+    estado = modelo['itens']['customer_state'].value_counts().index[0]
+    categoria = modelo['itens']['product_category_name_english'].value_counts().index[0]
+    filtros[f'Estado {estado}'] = criar_filtro(inicio, fim, estados=[estado])
+    filtros['Categoria, nota 4+ e preço 50–500'] = criar_filtro(inicio, fim, categorias=[categoria], nota_minima=4, preco_intervalo=(50, 500))
+    return filtros
+
+
+def executar(pasta, motores):
+    pasta = os.path.abspath(pasta)
+    os.chdir(pasta)
+    medicoes = iniciar()
+    shutil.rmtree(os.path.join(pasta, PASTA_CACHE), ignore_errors=True)
+    shutil.rmtree(os.path.join(pasta, PASTA_ARTEFATOS), ignore_errors=True)
+
+    with medir('carregar_dados:csv') as registro:
+        tabelas = ler_tabelas()
+        registro['tabelas'] = {nome: round(segundos * 1000, 1) for nome, segundos in tempos_carga.items()}
+    with medir('carregar_dados:cache_parquet'):
+        tabelas = ler_tabelas()
+    with medir('preprocessar_dados') as registro:
+        modelo = montar_modelo(*tabelas)
+        registro['linhas'] = {nome: len(modelo[nome]) for nome in ('itens', 'pedidos', 'pagamentos')}
+    del tabelas
+    with medir('cubo'):
+        cubos = construir_cubo(modelo)
+    with medir('indice_comentarios') as registro:
+        comentarios = construir_indice_comentarios(modelo['pedidos'])
+        registro['termos'] = len(comentarios['termos'])
+    with medir('publicacao'):
+        versao = publicar_modelo(modelo, cubos=cubos, comentarios=comentarios)
+    with medir('carga_artefato'):
+        modelo = ler_modelo(versao)
+    with medir('indice'):
+        indice = IndiceFiltros(modelo)
+
+    comentarios = IndiceComentarios(comentarios)
+
+    filtros = filtros_sidebar(modelo)
+    for nome, filtro in filtros.items():
+        with medir(f'filtro:{nome}') as registro:
+            registro['linhas'] = len(indice.filtrar(filtro)[0])
+
+    fontes = {'pandas': (indice, None), 'cubo': (indice, Cubo(cubos, modelo['pedidos']))}
+    if 'duckdb' in motores:
+        fontes['duckdb'] = (MotorDuckDB.de_artefato(versao), None)
+    for motor in motores:
+        consultor, cubo = fontes[motor]
+        recorte = Recorte(consultor, versao, filtros['Todos'], CacheAgregacoes(), cubo, comentarios=comentarios)
+        with medir(f'{motor}:indicadores'):
+            recorte.consultar('indicadores')
+        for aba, consultas in CONSULTAS_ABAS.items():
+            with medir(f'{motor}:aba:{aba}'):
+                for nome, *parametros in consultas:
+                    recorte.consultar(nome, *parametros)
+    recorte = Recorte(indice, versao, filtros['Todos'], CacheAgregacoes(), comentarios=comentarios)
+    for consulta in ('produto', '"não recebi"'):
+        with medir(f'busca_comentarios:{consulta}') as registro:
+            registro['linhas'] = len(recorte.linhas_detalhes('comentarios', None, True, consulta))
+    return medicoes.registros
+
+
+def executar_fator(pasta, motores):
+    processo = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--executar', os.path.abspath(pasta), '--motores', *motores],
+        capture_output=True, text=True,
+    )
+    if processo.returncode != 0:
+        raise SystemExit(f'Falha ao medir {pasta}:\n{processo.stderr}')
+    return json.loads(processo.stdout.strip().splitlines()[-1])
+
+
+def versao_git():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def resumir(resultados):
+    for fator, registros in resultados.items():
+        print(f'{fator}x')
+        for registro in registros:
+            if registro['nivel'] == 0:
+                print(f"  {registro['etapa']}: {registro['duracao_ms']:.1f} ms, pico {registro['pico_memoria_mb']:.0f} MB")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mede carga, pré-processamento, filtros da barra lateral e as agregações de cada aba sobre o dataset Olist ampliado sinteticamente.')
+    parser.add_argument('--origem', default=os.path.join(RAIZ, 'dados'), help='Pasta com os CSVs originais do Olist')
+    parser.add_argument('--pasta', default=os.path.join(RAIZ, 'benchmarks', 'dados'), help='Pasta onde os datasets ampliados são gerados e reaproveitados')
+    parser.add_argument('--fatores', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--motores', nargs='+', default=['pandas', 'cubo'], choices=['pandas', 'cubo', 'duckdb'])
+    parser.add_argument('--regenerar', action='store_true', help='Gera novamente os datasets ampliados já existentes')
+    parser.add_argument('--saida', help='Arquivo JSON com os resultados (padrão: benchmarks/resultados/<data>.json)')
+    parser.add_argument('--executar', metavar='PASTA', help=argparse.SUPPRESS)
+    argumentos = parser.parse_args()
+
+    if argumentos.executar:
+        print(json.dumps(executar(argumentos.executar, argumentos.motores), default=str, ensure_ascii=False))
+        sys.exit()
+
+    resultados = {}
+    for fator in argumentos.fatores:
+        pasta = os.path.join(argumentos.pasta, f'fator_{fator}')
+        destino = os.path.join(pasta, 'dados')
+        if argumentos.regenerar or not os.path.isdir(destino):
+            inicio = time.perf_counter()
+            ampliar(argumentos.origem, destino, fator)
+            print(f'Dataset {fator}x gerado em {destino} ({time.perf_counter() - inicio:.1f}s)')
+        resultados[fator] = executar_fator(pasta, argumentos.motores)
+
+    saida = argumentos.saida or os.path.join(RAIZ, 'benchmarks', 'resultados', f"{datetime.now():%Y%m%dT%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w') as arquivo:
+        json.dump({
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'commit': versao_git(),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'cpus': os.cpu_count(),
+            'motores': argumentos.motores,
+            'resultados': resultados,
+        }, arquivo, indent=2, ensure_ascii=False)
+    resumir(resultados)
+    print(f'Resultados gravados em {saida}')
@@ -0,0 +1,476 @@
+import sys
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from comentarios import IndiceComentarios, construir_indice_comentarios
+from instrumentacao import etapa
+from quantis import MEDIDAS_QUANTIS, QUANTIS
+
+CAPACIDADE_CACHE_MB = 256
+LIMITE_PONTOS = 20000
+CAIXAS_DENSIDADE = 80
+LIMITE_TERMOS = 20
+LIMITE_GRUPOS_TERMOS = 15
+FAIXAS_DISTANCIA = [0, 50, 100, 250, 500, 1000, 1500, 2000, 3000, np.inf]
+LIMITE_VENDEDORES = 20
+DETALHES = {
+    'clientes': {
+        'tabela': 'pedidos',
+        'colunas': ['customer_unique_id', 'customer_city', 'customer_state', 'order_id', 'valor_itens', 'review_score'],
+        'entidade': 'customer_unique_id',
+    },
+    'produtos': {
+        'tabela': 'itens',
+        'colunas': ['product_id', 'product_category_name_english', 'price', 'freight_value', 'review_score'],
+        'entidade': 'product_id',
+    },
+    'pagamentos': {
+        'tabela': 'pedidos',
+        'colunas': ['order_id', 'payment_type', 'payment_installments', 'qtd_pagamentos', 'payment_value'],
+        'entidade': 'order_id',
+    },
+    'comentarios': {
+        'tabela': 'pedidos',
+        'colunas': ['review_score', 'review_comment_message', 'product_category_name_english', 'customer_state'],
+        'texto': 'review_comment_message',
+    },
+}
+
+
+def tamanho_valor(valor):
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True).sum())
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(deep=True))
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(tamanho_valor(item) for item in valor.values())
+    if isinstance(valor, (list, tuple)):
+        return sys.getsizeof(valor) + sum(tamanho_valor(item) for item in valor)
+    return sys.getsizeof(valor)
+
+
+class CacheAgregacoes:
+    def __init__(self, capacidade_mb=CAPACIDADE_CACHE_MB):
+        self.capacidade = int(capacidade_mb * 1024 * 1024)
+        self.valores = OrderedDict()
+        self.tamanhos = {}
+        self.ocupado = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.trava = threading.Lock()
+
+    def obter(self, chave, calcular):
+        with self.trava:
+            if chave in self.valores:
+                self.valores.move_to_end(chave)
+                self.acertos += 1
+                return self.valores[chave]
+        valor = calcular()
+        tamanho = tamanho_valor(valor)
+        with self.trava:
+            self.falhas += 1
+            if chave not in self.valores and tamanho <= self.capacidade:
+                self.valores[chave] = valor
+                self.tamanhos[chave] = tamanho
+                self.ocupado += tamanho
+                while self.ocupado > self.capacidade:
+                    removida, _ = self.valores.popitem(last=False)
+                    self.ocupado -= self.tamanhos.pop(removida)
+        return valor
+
+    def estatisticas(self):
+        with self.trava:
+            return {
+                'entradas': len(self.valores),
+                'ocupado_mb': self.ocupado / 1024 / 1024,
+                'capacidade_mb': self.capacidade / 1024 / 1024,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+            }
+
+
+class Recorte:
+    def __init__(self, indice, versao, filtro, cache, cubo=None, contagem_exata=False, comentarios=None):
+        self.indice = indice
+        self.versao = versao
+        self.filtro = filtro
+        self.cache = cache
+        self.cubo = cubo
+        self.contagem_exata = contagem_exata
+        self._comentarios = comentarios
+        self._tabelas = None
+
+    def tabelas(self):
+        if self._tabelas is None:
+            with etapa('filtro') as registro:
+                self._tabelas = self.indice.filtrar(self.filtro)
+                registro['linhas'] = len(self._tabelas[0])
+        return self._tabelas
+
+    @property
+    def itens(self):
+        return self.tabelas()[0]
+
+    @property
+    def pedidos(self):
+        return self.tabelas()[1]
+
+    @property
+    def pagamentos(self):
+        return self.tabelas()[2]
+
+    @property
+    def comentarios(self):
+        if self._comentarios is None:
+            self._comentarios = IndiceComentarios(construir_indice_comentarios(self.pedidos))
+        return self._comentarios
+
+    def consultar(self, nome, *parametros):
+        chave = (self.versao, self.filtro, nome, parametros, self.contagem_exata)
+        with etapa(f'agregacao:{nome}', parametros=parametros, acerto_cache=True) as registro:
+            def calcular():
+                registro['acerto_cache'] = False
+                registro['fonte'] = self.fonte(nome)
+                return self.calcular(nome, *parametros)
+            valor = self.cache.obter(chave, calcular)
+            if isinstance(valor, pd.DataFrame):
+                registro['linhas'] = len(valor)
+        return valor
+
+    def linhas_detalhes(self, nome, ordenar_por=None, crescente=True, busca=''):
+        linhas = self.consultar('linhas_detalhes', nome, ordenar_por, crescente)
+        especificacao = DETALHES[nome]
+        if not busca or 'texto' not in especificacao:
+            return linhas
+        with etapa(f'busca:{nome}') as registro:
+            encontrados = self.comentarios.localizar(getattr(self, especificacao['tabela']), busca)
+            linhas = linhas[encontrados[linhas]]
+            registro['linhas'] = len(linhas)
+        return linhas
+
+    def fonte(self, nome):
+        if self.cubo is not None and self.cubo.suporta(nome, self.filtro, self.contagem_exata):
+            return 'cubo'
+        if self.indice.suporta(nome):
+            return 'motor'
+        return 'pandas'
+
+    def calcular(self, nome, *parametros):
+        fonte = self.fonte(nome)
+        if fonte == 'cubo':
+            return self.cubo.responder(nome, self.filtro, *parametros)
+        if fonte == 'motor':
+            return self.indice.responder(nome, self.filtro, *parametros)
+        return AGREGACOES[nome](self, *parametros)
+
+
+def indicadores(recorte):
+    return {
+        'itens': len(recorte.itens),
+        'total_vendas': recorte.itens['price'].sum(),
+        'qtd_pedidos': len(recorte.pedidos),
+        'clientes_unicos': recorte.pedidos['customer_unique_id'].nunique(),
+        'clientes_aproximado': False,
+        'nota_media': recorte.pedidos['review_score'].mean(),
+    }
+
+
+def vendas_tempo(recorte, frequencia):
+    vendas = recorte.itens.set_index('order_purchase_timestamp').resample(frequencia).agg({'price': 'sum'})
+    pedidos_tempo = recorte.pedidos.set_index('order_purchase_timestamp').resample(frequencia).agg({'order_id': 'count', 'payment_value': 'mean'})
+    vendas = vendas.join(pedidos_tempo, how='outer').reset_index()
+    vendas = vendas.rename(columns={'order_id': 'Quantidade de Pedidos', 'payment_value': 'Ticket Médio'})
+    vendas['Vendas Cumulativas'] = vendas['price'].cumsum()
+    return vendas
+
+
+def vendas_estado(recorte):
+    vendas = recorte.itens.groupby('customer_state', observed=True)['price'].sum().reset_index()
+    return vendas.sort_values('price', ascending=True, kind='stable')
+
+
+def vendas_estado_categoria(recorte):
+    vendas = recorte.itens.groupby(['customer_state', 'product_category_name_english'], observed=True)['price'].sum().reset_index()
+    return vendas.astype({'customer_state': str, 'product_category_name_english': str})
+
+
+def vendas_categoria(recorte):
+    vendas = recorte.itens.groupby('product_category_name_english', observed=True)['price'].sum().reset_index()
+    return vendas.sort_values('price', ascending=True, kind='stable')
+
+
+def indicadores_logistica(recorte):
+    return {
+        'media_atraso': recorte.pedidos['delivery_delay'].mean(),
+        'tempo_entrega_media': recorte.pedidos['Tempo de Entrega'].mean(),
+        'percentual_atraso': recorte.pedidos['is_late'].mean() * 100,
+    }
+
+
+def atraso_estado(recorte):
+    atraso = (recorte.pedidos.groupby('customer_state', observed=True)['is_late'].mean() * 100).reset_index(name='Percentual de Atraso')
+    return atraso.sort_values('Percentual de Atraso', ascending=True, kind='stable')
+
+
+def entrega_estado(recorte):
+    entrega = recorte.pedidos.groupby('customer_state', observed=True)['Tempo de Entrega'].mean().reset_index()
+    return entrega.sort_values('Tempo de Entrega', ascending=True, kind='stable')
+
+
+def entrega_tempo(recorte):
+    return recorte.pedidos.set_index('order_purchase_timestamp').resample('M')['Tempo de Entrega'].mean().reset_index()
+
+
+def quantis_logistica(recorte):
+    resultado = {}
+    for medida, prefixo in MEDIDAS_QUANTIS.items():
+        valores = recorte.pedidos[medida].quantile(list(QUANTIS.values()))
+        resultado.update({f'{prefixo}_{rotulo.lower()}': valor for rotulo, valor in zip(QUANTIS, valores)})
+    return resultado
+
+
+def quantis_estado(recorte, medida):
+    quantis = recorte.pedidos.groupby('customer_state', observed=True)[medida].quantile(list(QUANTIS.values())).unstack()
+    quantis = quantis.reindex(columns=list(QUANTIS.values())).set_axis(list(QUANTIS), axis=1).dropna(how='all').reset_index()
+    return quantis.sort_values('P90', ascending=True, kind='stable')
+
+
+def quantis_tempo(recorte, medida):
+    quantis = recorte.pedidos.set_index('order_purchase_timestamp').resample('M')[medida].quantile(list(QUANTIS.values())).unstack()
+    return quantis.reindex(columns=list(QUANTIS.values())).set_axis(list(QUANTIS), axis=1).reset_index()
+
+
+def clientes_estado(recorte):
+    clientes = recorte.pedidos.groupby('customer_state', observed=True)['customer_unique_id'].nunique().reset_index(name='clientes')
+    return clientes.sort_values('clientes', ascending=False, kind='stable').head(10)
+
+
+def ticket_estado(recorte):
+    ticket = recorte.pedidos.groupby('customer_state', observed=True)['payment_value'].mean().reset_index()
+    return ticket.sort_values('payment_value', ascending=True, kind='stable')
+
+
+def top_produtos(recorte):
+    produtos = recorte.itens.groupby('product_id', observed=True).agg({
+        'product_category_name_english': 'first',
+        'price': 'mean',
+        'order_id': 'count'
+    }).reset_index()
+    produtos = produtos.rename(columns={'order_id': 'Quantidade de Vendas'})
+    return produtos.sort_values('Quantidade de Vendas', ascending=False, kind='stable').head(10)
+
+
+def total_pagamento(recorte):
+    total = recorte.pagamentos.groupby('payment_type', observed=True)['payment_value'].sum().reset_index()
+    return total.sort_values('payment_value', ascending=False, kind='stable')
+
+
+def media_pagamento(recorte):
+    media = recorte.pagamentos.groupby('payment_type', observed=True)['payment_value'].mean().reset_index()
+    return media.sort_values('payment_value', ascending=True, kind='stable')
+
+
+def pagamentos_tempo(recorte):
+    return recorte.pagamentos.groupby(['payment_type', pd.Grouper(key='order_purchase_timestamp', freq='M')], observed=True)['payment_value'].sum().reset_index()
+
+
+def pagamento_avaliacao(recorte):
+    return recorte.pagamentos.groupby(['payment_type', 'review_score'], observed=True).size().reset_index(name='Quantidade')
+
+
+def avaliacoes(recorte):
+    contagem = recorte.pedidos.groupby('review_score', observed=True).agg({'order_id': 'count'}).reset_index()
+    return contagem.rename(columns={'order_id': 'Quantidade'})
+
+
+def avaliacoes_categoria(recorte):
+    media = recorte.itens.groupby('product_category_name_english', observed=True)['review_score'].mean().reset_index()
+    return media.sort_values('review_score', ascending=False, kind='stable')
+
+
+def avaliacao_tempo(recorte):
+    return recorte.pedidos.set_index('order_purchase_timestamp').resample('M')['review_score'].mean().reset_index()
+
+
+def frete_distancia(recorte):
+    itens = recorte.itens[recorte.itens['distancia_km'].notna()]
+    rotulos = [f'{inicio:.0f}–{fim:.0f} km' for inicio, fim in zip(FAIXAS_DISTANCIA[:-2], FAIXAS_DISTANCIA[1:-1])] + [f'> {FAIXAS_DISTANCIA[-2]:.0f} km']
+    faixas = pd.cut(itens['distancia_km'], FAIXAS_DISTANCIA, labels=rotulos, right=False)
+    frete = itens.groupby(faixas, observed=True).agg(
+        frete_medio=('freight_value', 'mean'),
+        distancia_media=('distancia_km', 'mean'),
+        itens=('order_id', 'count'),
+    ).rename_axis('Faixa de Distância').reset_index()
+    frete['frete_por_km'] = frete['frete_medio'] / frete['distancia_media'].where(frete['distancia_media'] > 0)
+    return frete.astype({'Faixa de Distância': str})
+
+
+def frete_estado_vendedor(recorte):
+    frete = recorte.itens.groupby('seller_state', observed=True).agg(
+        frete_medio=('freight_value', 'mean'),
+        distancia_media=('distancia_km', 'mean'),
+    ).reset_index()
+    return frete.astype({'seller_state': str}).sort_values('frete_medio', ascending=True, kind='stable')
+
+
+def desempenho_vendedores(recorte):
+    entrega = recorte.pedidos[['order_id', 'Tempo de Entrega', 'is_late']]
+    itens = recorte.itens[['seller_id', 'seller_state', 'order_id', 'price', 'freight_value', 'distancia_km', 'review_score']].merge(entrega, on='order_id', how='left')
+    vendedores = itens.groupby('seller_id').agg(
+        seller_state=('seller_state', 'first'),
+        itens=('order_id', 'count'),
+        receita=('price', 'sum'),
+        frete_medio=('freight_value', 'mean'),
+        distancia_media=('distancia_km', 'mean'),
+        tempo_entrega=('Tempo de Entrega', 'mean'),
+        percentual_atraso=('is_late', 'mean'),
+        nota_media=('review_score', 'mean'),
+    ).reset_index()
+    vendedores['percentual_atraso'] *= 100
+    return vendedores.astype({'seller_state': str}).sort_values('receita', ascending=False, kind='stable').head(LIMITE_VENDEDORES)
+
+
+def termos_frequentes(recorte, agrupar_por=None):
+    indice = recorte.comentarios
+    pedidos = recorte.pedidos[recorte.pedidos['review_comment_message'].fillna('') != '']
+    if agrupar_por is None:
+        grupos, rotulos = np.zeros(len(pedidos), dtype='int64'), pd.Index(['Todos'])
+    else:
+        grupos, rotulos = pd.factorize(pedidos[agrupar_por], sort=True)
+        if pd.api.types.is_float_dtype(rotulos):
+            rotulos = rotulos.astype('int64')
+        principais = np.argsort(-np.bincount(grupos[grupos >= 0], minlength=len(rotulos)), kind='stable')[:LIMITE_GRUPOS_TERMOS]
+        grupos = np.where(np.isin(grupos, principais), grupos, -1)
+    tamanho = int(max(indice.documentos.max(initial=-1), pedidos['order_id'].max() if len(pedidos) else -1)) + 1
+    grupo_pedido = np.full(tamanho, -1, dtype='int64')
+    grupo_pedido[pedidos['order_id'].to_numpy()] = grupos
+    grupo_postagem = grupo_pedido[indice.documentos]
+    validas = (grupo_postagem >= 0) & indice.relevantes[indice.termo_postagem]
+    combinados = indice.termo_postagem[validas].astype('int64') * len(rotulos) + grupo_postagem[validas]
+    contagens = np.bincount(combinados, minlength=len(indice.termos) * len(rotulos)).reshape(len(indice.termos), len(rotulos))
+    principais = np.argsort(-contagens.sum(axis=1), kind='stable')[:LIMITE_TERMOS]
+    principais = principais[contagens[principais].sum(axis=1) > 0]
+    comentarios_grupo = np.bincount(grupos[grupos >= 0], minlength=len(rotulos))
+    termos = pd.DataFrame(contagens[principais], index=indice.termos[principais], columns=rotulos)
+    termos = termos.loc[:, comentarios_grupo > 0].rename_axis(index='termo', columns='grupo').stack().rename('comentarios').reset_index()
+    termos['percentual'] = termos['comentarios'] / termos['grupo'].map(dict(zip(rotulos, comentarios_grupo))) * 100
+    return termos.astype({'grupo': str, 'comentarios': 'int64'})
+
+
+def amostrar_por_grupo(tabela, coluna, limite, semente=0):
+    if len(tabela) <= limite:
+        return tabela
+    codigos, _ = pd.factorize(tabela[coluna], use_na_sentinel=False)
+    cotas = np.maximum(1, np.bincount(codigos) * limite // len(tabela))
+    ordem = np.random.default_rng(semente).permutation(len(tabela))
+    codigos_ordem = codigos[ordem]
+    posicao = pd.Series(codigos_ordem).groupby(codigos_ordem).cumcount().to_numpy()
+    return tabela.take(np.sort(ordem[posicao < cotas[codigos_ordem]]))
+
+
+def centros_caixas(valores, caixas):
+    minimo, maximo = valores.min(), valores.max()
+    if np.all(valores == np.round(valores)) and maximo - minimo < caixas:
+        return valores
+    largura = (maximo - minimo) / caixas or 1.0
+    posicao = np.clip(np.floor((valores - minimo) / largura), 0, caixas - 1)
+    return minimo + (posicao + 0.5) * largura
+
+
+def agrupar_pontos(tabela, x, y, caixas=CAIXAS_DENSIDADE):
+    valores = tabela[[x, y]].dropna().astype('float64')
+    caixas_x = centros_caixas(valores[x].to_numpy(), caixas)
+    caixas_y = centros_caixas(valores[y].to_numpy(), caixas)
+    agrupado = pd.DataFrame({x: caixas_x, y: caixas_y}).groupby([x, y]).size()
+    return agrupado.reset_index(name='Quantidade')
+
+
+def dispersao_preco_frete(recorte, limite):
+    itens = recorte.itens[['price', 'freight_value', 'product_category_name_english', 'product_id']]
+    return {'total': len(itens), 'pontos': amostrar_por_grupo(itens, 'product_category_name_english', limite)}
+
+
+def dispersao_entrega_avaliacao(recorte, limite):
+    pedidos = recorte.pedidos[['Tempo de Entrega', 'review_score']].dropna()
+    if len(pedidos) <= limite:
+        return {'total': len(pedidos), 'pontos': pedidos, 'agrupado': False}
+    return {'total': len(pedidos), 'pontos': agrupar_pontos(pedidos, 'Tempo de Entrega', 'review_score'), 'agrupado': True}
+
+
+def primeiras_linhas(ids):
+    posicoes = np.arange(len(ids))
+    primeira = np.empty(int(ids.max()) + 1 if len(ids) else 0, dtype=np.int64)
+    primeira[ids[::-1]] = posicoes[::-1]
+    return np.flatnonzero(primeira[ids] == posicoes)
+
+
+def linhas_detalhes(recorte, nome, ordenar_por=None, crescente=True):
+    especificacao = DETALHES[nome]
+    tabela = getattr(recorte, especificacao['tabela'])
+    linhas = np.arange(len(tabela))
+    if 'entidade' in especificacao:
+        linhas = primeiras_linhas(tabela[especificacao['entidade']].to_numpy())
+    if 'texto' in especificacao:
+        validas = tabela[especificacao['colunas']].notna().all(axis=1) & (tabela[especificacao['texto']] != '')
+        linhas = np.flatnonzero(validas.to_numpy())
+    if ordenar_por:
+        valores = tabela[ordenar_por].take(linhas).reset_index(drop=True)
+        linhas = linhas[valores.sort_values(ascending=crescente, kind='stable', na_position='last').index.to_numpy()]
+    return linhas
+
+
+AGREGACOES = {
+    'indicadores': indicadores,
+    'vendas_tempo': vendas_tempo,
+    'vendas_estado': vendas_estado,
+    'vendas_estado_categoria': vendas_estado_categoria,
+    'vendas_categoria': vendas_categoria,
+    'indicadores_logistica': indicadores_logistica,
+    'atraso_estado': atraso_estado,
+    'entrega_estado': entrega_estado,
+    'entrega_tempo': entrega_tempo,
+    'quantis_logistica': quantis_logistica,
+    'quantis_estado': quantis_estado,
+    'quantis_tempo': quantis_tempo,
+    'clientes_estado': clientes_estado,
+    'ticket_estado': ticket_estado,
+    'top_produtos': top_produtos,
+    'total_pagamento': total_pagamento,
+    'media_pagamento': media_pagamento,
+    'pagamentos_tempo': pagamentos_tempo,
+    'pagamento_avaliacao': pagamento_avaliacao,
+    'avaliacoes': avaliacoes,
+    'avaliacoes_categoria': avaliacoes_categoria,
+    'avaliacao_tempo': avaliacao_tempo,
+    'frete_distancia': frete_distancia,
+    'frete_estado_vendedor': frete_estado_vendedor,
+    'desempenho_vendedores': desempenho_vendedores,
+    'termos_frequentes': termos_frequentes,
+    'dispersao_preco_frete': dispersao_preco_frete,
+    'dispersao_entrega_avaliacao': dispersao_entrega_avaliacao,
+    'linhas_detalhes': linhas_detalhes,
+}
+
+CONSULTAS_ABAS = {
+    'Vendas Mensais': [('vendas_tempo', 'M')],
+    'Vendas por Estado': [('vendas_estado',), ('vendas_estado_categoria',)],
+    'Vendas por Categoria': [('vendas_categoria',), ('dispersao_preco_frete', LIMITE_PONTOS)],
+    'Análise Logística': [
+        ('indicadores_logistica',), ('quantis_logistica',), ('atraso_estado',), ('entrega_estado',), ('entrega_tempo',),
+        ('quantis_estado', 'Tempo de Entrega'), ('quantis_tempo', 'Tempo de Entrega'), ('dispersao_entrega_avaliacao', LIMITE_PONTOS),
+    ],
+    'Análise de Clientes': [('clientes_estado',), ('ticket_estado',), ('linhas_detalhes', 'clientes', None, True)],
+    'Produtos': [('top_produtos',), ('vendas_categoria',), ('linhas_detalhes', 'produtos', None, True)],
+    'Análise de Pagamentos': [
+        ('total_pagamento',), ('media_pagamento',), ('pagamentos_tempo',), ('pagamento_avaliacao',),
+        ('linhas_detalhes', 'pagamentos', None, True),
+    ],
+    'Vendedores e Frete': [('frete_distancia',), ('frete_estado_vendedor',), ('desempenho_vendedores',)],
+    'Avaliações': [
+        ('avaliacoes',), ('avaliacoes_categoria',), ('avaliacao_tempo',), ('termos_frequentes',), ('termos_frequentes', 'review_score'),
+        ('linhas_detalhes', 'comentarios', None, True),
+    ],
+}
@@ -0,0 +1,117 @@
+import argparse
+import json
+import numpy as np
+import pandas as pd
+from agregacoes import AGREGACOES, CONSULTAS_ABAS, DETALHES, CacheAgregacoes, Recorte
+from artefatos import PASTA_ARTEFATOS, ler_modelo, versao_atual
+from comentarios import abrir_indice_comentarios
+from cubo import abrir_cubo
+from dados_preprocessamento import decodificar_ids
+from filtros import Filtro, IndiceFiltros, criar_filtro
+
+
+class SemCache:
+    def obter(self, chave, calcular):
+        return calcular()
+
+    def estatisticas(self):
+        return {}
+
+
+def serializar(valor):
+    if isinstance(valor, pd.DataFrame):
+        return json.loads(valor.to_json(orient='records', date_format='iso'))
+    if isinstance(valor, dict):
+        return {chave: serializar(item) for chave, item in valor.items()}
+    if isinstance(valor, np.generic):
+        return valor.item()
+    return valor
+
+
+def data(valor):
+    return None if valor is None else pd.Timestamp(valor).date()
+
+
+class Analise:
+    def __init__(self, modelo, versao, cache=None, cubo=None, motor=None, contagem_exata=False, comentarios=None):
+        self.modelo = modelo
+        self.versao = versao
+        self.cache = CacheAgregacoes() if cache is None else cache
+        self.cubo = cubo
+        self.motor = IndiceFiltros(modelo) if motor is None else motor
+        self.contagem_exata = contagem_exata
+        self.comentarios = comentarios
+        datas = modelo['pedidos']['order_purchase_timestamp']
+        self.inicio, self.fim = datas.min().date(), datas.max().date()
+
+    @classmethod
+    def de_artefato(cls, versao=None, pasta=PASTA_ARTEFATOS, cache=None, usar_cubo=True, motor='pandas', contagem_exata=False):
+        versao = versao or versao_atual(pasta)
+        if versao is None:
+            raise FileNotFoundError(f'Nenhuma versão publicada em {pasta}; gere o artefato com construir_dados.py.')
+        modelo = ler_modelo(versao, pasta)
+        consultor = None
+        if motor == 'duckdb':
+            from motor_duckdb import abrir_motor_duckdb
+            consultor = abrir_motor_duckdb(versao, modelo, pasta)
+        cubo = abrir_cubo(versao, modelo, pasta) if usar_cubo else None
+        comentarios = abrir_indice_comentarios(versao, modelo, pasta)
+        return cls(modelo, versao, cache=cache, cubo=cubo, motor=consultor, contagem_exata=contagem_exata, comentarios=comentarios)
+
+    def filtro(self, inicio=None, fim=None, estados=(), categorias=(), nota_minima=1, preco_intervalo=(None, None)):
+        return criar_filtro(
+            data(inicio) or self.inicio,
+            data(fim) or self.fim,
+            estados,
+            categorias,
+            nota_minima,
+            tuple(preco_intervalo),
+        )
+
+    def recorte(self, filtro=None):
+        if not isinstance(filtro, Filtro):
+            filtro = self.filtro(**(filtro or {}))
+        return Recorte(self.motor, self.versao, filtro, self.cache, self.cubo, self.contagem_exata, self.comentarios)
+
+    def decodificar(self, valor):
+        if isinstance(valor, pd.DataFrame):
+            return decodificar_ids(valor, self.modelo['chaves'])
+        if isinstance(valor, dict):
+            return {chave: self.decodificar(item) for chave, item in valor.items()}
+        return valor
+
+    def consultar(self, nome, filtro=None, *parametros):
+        return self.decodificar(self.recorte(filtro).consultar(nome, *parametros))
+
+    def aba(self, nome, filtro=None):
+        recorte = self.recorte(filtro)
+        return {consulta[0]: self.decodificar(recorte.consultar(*consulta)) for consulta in CONSULTAS_ABAS[nome]}
+
+    def detalhes(self, nome, filtro=None, ordenar_por=None, crescente=True, busca='', inicio=0, quantidade=100):
+        recorte = self.recorte(filtro)
+        linhas = recorte.linhas_detalhes(nome, ordenar_por, crescente, busca)
+        especificacao = DETALHES[nome]
+        tabela = getattr(recorte, especificacao['tabela'])
+        return self.decodificar(tabela[especificacao['colunas']].take(linhas[inicio:inicio + quantidade]).reset_index(drop=True))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Calcula uma agregação do dashboard sem o Streamlit e imprime o resultado em JSON.')
+    parser.add_argument('agregacao', choices=sorted(set(AGREGACOES) - {'linhas_detalhes'}))
+    parser.add_argument('parametros', nargs='*', help='Parâmetros da agregação, como a frequência de vendas_tempo')
+    parser.add_argument('--inicio')
+    parser.add_argument('--fim')
+    parser.add_argument('--estados', nargs='*', default=())
+    parser.add_argument('--categorias', nargs='*', default=())
+    parser.add_argument('--nota-minima', type=int, default=1)
+    parser.add_argument('--preco', type=float, nargs=2, default=(None, None), metavar=('MIN', 'MAX'))
+    parser.add_argument('--motor', choices=['pandas', 'duckdb'], default='pandas')
+    parser.add_argument('--sem-cubo', action='store_true', help='Calcula a partir das linhas em vez do cubo pré-agregado')
+    parser.add_argument('--pasta', default=PASTA_ARTEFATOS)
+    argumentos = parser.parse_args()
+
+    analise = Analise.de_artefato(pasta=argumentos.pasta, cache=SemCache(), usar_cubo=not argumentos.sem_cubo, motor=argumentos.motor)
+    filtro = analise.filtro(argumentos.inicio, argumentos.fim, argumentos.estados, argumentos.categorias, argumentos.nota_minima, argumentos.preco)
+    parametros = [int(parametro) if parametro.isdigit() else parametro for parametro in argumentos.parametros]
+    resultado = analise.consultar(argumentos.agregacao, filtro, *parametros)
+    print(json.dumps(serializar(resultado), default=str, ensure_ascii=False))
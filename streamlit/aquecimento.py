@@ -0,0 +1,119 @@
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from agregacoes import CONSULTAS_ABAS, Recorte
+from analise import Analise
+from artefatos import PASTA_ARTEFATOS, versao_atual
+from construir_dados import construir
+from filtros import PERIODOS, criar_filtro, intervalo_periodo
+from instrumentacao import LOGGER, configurar_log, etapa, iniciar
+
+TRABALHADORES_AQUECIMENTO = int(os.environ.get('OLIST_AQUECIMENTO_TRABALHADORES', 2))
+LIMITE_ESTADOS_AQUECIMENTO = int(os.environ.get('OLIST_AQUECIMENTO_ESTADOS', 5))
+CONSULTAS_AQUECIMENTO = list(dict.fromkeys(
+    [('indicadores',)] + [consulta for consultas in CONSULTAS_ABAS.values() for consulta in consultas if consulta[0] != 'linhas_detalhes']
+))
+
+
+def filtro_padrao(modelo, periodo='Todos', estados=()):
+    datas = modelo['pedidos']['order_purchase_timestamp']
+    inicio, fim = intervalo_periodo(periodo, datas.min().date(), datas.max().date())
+    precos = modelo['itens']['price']
+    return criar_filtro(inicio, fim, estados, (), 1, (float(precos.min()), float(precos.max())))
+
+
+def principais_estados(modelo, limite=LIMITE_ESTADOS_AQUECIMENTO):
+    return modelo['pedidos']['customer_state'].value_counts().index[:limite].astype(str).tolist()
+
+
+class Aquecimento:
+    def __init__(self, modelo, versao, indice, cache, cubo=None, comentarios=None, trabalhadores=TRABALHADORES_AQUECIMENTO, estados=LIMITE_ESTADOS_AQUECIMENTO):
+        self.modelo = modelo
+        self.versao = versao
+        self.indice = indice
+        self.cache = cache
+        self.cubo = cubo
+        self.comentarios = comentarios
+        self.trabalhadores = trabalhadores
+        self.combinacoes = [(periodo, ()) for periodo in PERIODOS] + [
+            (periodo, (estado,)) for periodo in PERIODOS for estado in principais_estados(modelo, estados)
+        ]
+        self.concluidas = 0
+        self.falhas = 0
+        self.duracao = None
+        self.pronto = threading.Event()
+        self.trava = threading.Lock()
+
+    def iniciar(self):
+        self.inicio = time.perf_counter()
+        if self.trabalhadores <= 0:
+            self.combinacoes = []
+            self.duracao = 0.0
+            self.pronto.set()
+            return self
+        executor = ThreadPoolExecutor(max_workers=self.trabalhadores, thread_name_prefix='aquecimento')
+        for periodo, estados in self.combinacoes:
+            executor.submit(self.aquecer, periodo, estados).add_done_callback(self.concluir)
+        executor.shutdown(wait=False)
+        return self
+
+    def aquecer(self, periodo, estados):
+        iniciar()
+        recorte = Recorte(self.indice, self.versao, filtro_padrao(self.modelo, periodo, estados), self.cache, self.cubo, comentarios=self.comentarios)
+        with etapa('aquecimento', versao=self.versao, periodo=periodo, estados=estados):
+            for nome, *parametros in CONSULTAS_AQUECIMENTO:
+                recorte.consultar(nome, *parametros)
+
+    def concluir(self, futuro):
+        erro = futuro.exception()
+        if erro is not None:
+            LOGGER.warning(json.dumps({'etapa': 'aquecimento', 'versao': self.versao, 'erro': repr(erro)}, ensure_ascii=False))
+        with self.trava:
+            self.concluidas += 1
+            if erro is not None:
+                self.falhas += 1
+            if self.concluidas < len(self.combinacoes):
+                return
+            self.duracao = time.perf_counter() - self.inicio
+        LOGGER.info(json.dumps({'etapa': 'aquecimento_concluido', **self.progresso()}, ensure_ascii=False))
+        self.pronto.set()
+
+    def aguardar(self, tempo_limite=None):
+        return self.pronto.wait(tempo_limite)
+
+    def progresso(self):
+        with self.trava:
+            return {
+                'versao': self.versao,
+                'combinacoes': len(self.combinacoes),
+                'concluidas': self.concluidas,
+                'falhas': self.falhas,
+                'trabalhadores': self.trabalhadores,
+                'pronto': self.duracao is not None,
+                'duracao_s': None if self.duracao is None else round(self.duracao, 2),
+            }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Publica o artefato, se necessário, e pré-calcula as agregações dos períodos predefinidos e dos estados com mais pedidos, medindo o tempo de aquecimento.')
+    parser.add_argument('--trabalhadores', type=int, default=TRABALHADORES_AQUECIMENTO, help='Quantidade de threads de aquecimento')
+    parser.add_argument('--estados', type=int, default=LIMITE_ESTADOS_AQUECIMENTO, help='Quantos estados com mais pedidos são combinados com cada período')
+    parser.add_argument('--pasta', default=PASTA_ARTEFATOS)
+    argumentos = parser.parse_args()
+
+    configurar_log()
+    versao = versao_atual(argumentos.pasta) or construir(argumentos.pasta)
+    analise = Analise.de_artefato(versao, argumentos.pasta)
+    aquecimento = Aquecimento(
+        analise.modelo, versao, analise.motor, analise.cache, analise.cubo, analise.comentarios,
+        trabalhadores=argumentos.trabalhadores, estados=argumentos.estados,
+    ).iniciar()
+    aquecimento.aguardar()
+    progresso = aquecimento.progresso()
+    print(
+        f"{progresso['concluidas']} combinações aquecidas ({progresso['falhas']} falhas) com {argumentos.trabalhadores} threads "
+        f"em {progresso['duracao_s'] or 0:.1f}s; cache: {analise.cache.estatisticas()}"
+    )
@@ -0,0 +1,188 @@
+import json
+import os
+import shutil
+from datetime import datetime
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from carregamento_dados import PASTA_DADOS
+
+PASTA_ARTEFATOS = os.path.join(PASTA_DADOS, 'artefatos')
+ARQUIVO_ATUAL = 'ATUAL'
+COLUNA_PARTICAO = 'mes_compra'
+TABELAS_MODELO = ('itens', 'pedidos', 'pagamentos')
+FORMATO_MODELO = 9
+
+
+def ler_manifesto(versao, pasta=PASTA_ARTEFATOS):
+    try:
+        with open(os.path.join(pasta, versao, 'manifesto.json')) as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+
+
+def versao_atual(pasta=PASTA_ARTEFATOS):
+    try:
+        with open(os.path.join(pasta, ARQUIVO_ATUAL)) as arquivo:
+            versao = arquivo.read().strip()
+    except OSError:
+        return None
+    manifesto = ler_manifesto(versao, pasta) if versao else None
+    if not manifesto or manifesto.get('formato') != FORMATO_MODELO:
+        return None
+    return versao
+
+
+def listar_versoes(pasta=PASTA_ARTEFATOS):
+    if not os.path.isdir(pasta):
+        return []
+    return sorted(
+        nome for nome in os.listdir(pasta)
+        if os.path.isfile(os.path.join(pasta, nome, 'manifesto.json'))
+    )
+
+
+def nova_versao():
+    return datetime.now().strftime('%Y%m%dT%H%M%S%f')
+
+
+def marcar_atual(versao, pasta=PASTA_ARTEFATOS):
+    temporario = os.path.join(pasta, f'{ARQUIVO_ATUAL}.{os.getpid()}.tmp')
+    with open(temporario, 'w') as arquivo:
+        arquivo.write(versao)
+    os.replace(temporario, os.path.join(pasta, ARQUIVO_ATUAL))
+
+
+def nome_particao(mes):
+    return f'{COLUNA_PARTICAO}={mes}'
+
+
+def vincular_arquivo(origem, destino):
+    try:
+        os.link(origem, destino)
+    except OSError:
+        shutil.copy2(origem, destino)
+
+
+def publicar_arrow(tabela, caminho):
+    tabela_arrow = pa.Table.from_pandas(tabela, preserve_index=False)
+    temporario = f'{caminho}.{os.getpid()}.tmp'
+    with pa.OSFile(temporario, 'wb') as arquivo, pa.ipc.new_file(arquivo, tabela_arrow.schema) as escritor:
+        escritor.write_table(tabela_arrow)
+    os.replace(temporario, caminho)
+
+
+def ler_arrow(caminho):
+    tabela = pa.ipc.open_file(pa.memory_map(caminho)).read_all()
+    return tabela.to_pandas(split_blocks=True)
+
+
+def publicar_tabela(tabela, destino, meses=None):
+    tabela = tabela.sort_values('order_purchase_timestamp', kind='stable').reset_index(drop=True)
+    tabela[COLUNA_PARTICAO] = tabela['order_purchase_timestamp'].dt.strftime('%Y-%m')
+    particoes = sorted(tabela[COLUNA_PARTICAO].dropna().unique().tolist())
+    os.makedirs(destino, exist_ok=True)
+    if meses is None:
+        publicar_arrow(tabela.drop(columns=[COLUNA_PARTICAO]), f'{destino}.arrow')
+    else:
+        tabela = tabela[tabela[COLUNA_PARTICAO].isin(meses)]
+    if len(tabela):
+        pq.write_to_dataset(
+            pa.Table.from_pandas(tabela, preserve_index=False),
+            destino,
+            partition_cols=[COLUNA_PARTICAO],
+            existing_data_behavior='error',
+        )
+    return particoes
+
+
+def vincular_particoes(origem, destino, meses):
+    reescritas = {nome_particao(mes) for mes in meses}
+    for particao in os.listdir(origem):
+        if particao not in reescritas:
+            shutil.copytree(os.path.join(origem, particao), os.path.join(destino, particao), copy_function=vincular_arquivo)
+
+
+def publicar_parquets(tabelas, destino):
+    os.makedirs(destino)
+    for nome, tabela in tabelas.items():
+        pq.write_table(pa.Table.from_pandas(tabela, preserve_index=False), os.path.join(destino, f'{nome}.parquet'))
+
+
+def ler_parquets(origem):
+    if not os.path.isdir(origem):
+        return None
+    return {
+        arquivo.removesuffix('.parquet'): pq.read_table(os.path.join(origem, arquivo), memory_map=True).to_pandas()
+        for arquivo in sorted(os.listdir(origem))
+    }
+
+
+def publicar_modelo(modelo, pasta=PASTA_ARTEFATOS, versao=None, manter=3, cubos=None, base=None, meses=None, comentarios=None):
+    versao = versao or nova_versao()
+    destino = os.path.join(pasta, versao)
+    incremental = base is not None and meses is not None
+    particoes = set()
+    for nome in TABELAS_MODELO:
+        destino_tabela = os.path.join(destino, nome)
+        particoes.update(publicar_tabela(modelo[nome], destino_tabela, meses if incremental else None))
+        if incremental:
+            vincular_particoes(os.path.join(pasta, base, nome), destino_tabela, meses)
+    os.makedirs(os.path.join(destino, 'chaves'))
+    for coluna, valores in modelo['chaves'].items():
+        pq.write_table(pa.table({coluna: pa.array(valores, type=pa.string())}), os.path.join(destino, 'chaves', f'{coluna}.parquet'))
+    if cubos is not None:
+        publicar_parquets(cubos, os.path.join(destino, 'cubo'))
+    if comentarios is not None:
+        publicar_parquets(comentarios, os.path.join(destino, 'comentarios'))
+    manifesto = {
+        'versao': versao,
+        'formato': FORMATO_MODELO,
+        'criado_em': datetime.now().isoformat(timespec='seconds'),
+        'linhas': {nome: len(modelo[nome]) for nome in TABELAS_MODELO},
+        'particoes': sorted(particoes),
+    }
+    if incremental:
+        manifesto['base'] = base
+        manifesto['meses_reescritos'] = sorted(meses)
+    with open(os.path.join(destino, 'manifesto.json'), 'w') as arquivo:
+        json.dump(manifesto, arquivo, indent=2)
+    marcar_atual(versao, pasta)
+    for antiga in listar_versoes(pasta)[:-manter]:
+        if antiga != versao:
+            shutil.rmtree(os.path.join(pasta, antiga), ignore_errors=True)
+    return versao
+
+
+def ordenar_categorias(tabela):
+    for coluna in tabela.select_dtypes('category'):
+        categorias = tabela[coluna].cat.categories
+        if not categorias.is_monotonic_increasing:
+            tabela[coluna] = tabela[coluna].cat.reorder_categories(categorias.sort_values())
+    return tabela
+
+
+def ler_modelo(versao, pasta=PASTA_ARTEFATOS):
+    modelo = {}
+    for nome in TABELAS_MODELO:
+        caminho = os.path.join(pasta, versao, nome)
+        if os.path.exists(f'{caminho}.arrow'):
+            modelo[nome] = ordenar_categorias(ler_arrow(f'{caminho}.arrow'))
+        else:
+            tabela = pq.read_table(caminho, memory_map=True)
+            modelo[nome] = ordenar_categorias(tabela.drop_columns([COLUNA_PARTICAO]).to_pandas())
+    pasta_chaves = os.path.join(pasta, versao, 'chaves')
+    modelo['chaves'] = {}
+    for arquivo in sorted(os.listdir(pasta_chaves)):
+        coluna = arquivo.removesuffix('.parquet')
+        modelo['chaves'][coluna] = pd.Index(pq.read_table(os.path.join(pasta_chaves, arquivo)).column(coluna).to_pandas(), dtype=object)
+    return modelo
+
+
+def ler_cubos(versao, pasta=PASTA_ARTEFATOS):
+    return ler_parquets(os.path.join(pasta, versao, 'cubo'))
+
+
+def ler_indice_comentarios(versao, pasta=PASTA_ARTEFATOS):
+    return ler_parquets(os.path.join(pasta, versao, 'comentarios'))
@@ -1,13 +1,181 @@
-import pandas as pd
-import streamlit as st
-
-@st.cache_data
-def carregar_dados():
-    clientes = pd.read_csv('dados/olist_customers_dataset.csv')
-    itens_pedidos = pd.read_csv('dados/olist_order_items_dataset.csv')
-    pagamentos_pedidos = pd.read_csv('dados/olist_order_payments_dataset.csv')
-    avaliacoes_pedidos = pd.read_csv('dados/olist_order_reviews_dataset.csv')
-    pedidos = pd.read_csv('dados/olist_orders_dataset.csv')
-    produtos = pd.read_csv('dados/olist_products_dataset.csv')
-    traducao_categorias = pd.read_csv('dados/product_category_name_translation.csv')
-    return clientes, itens_pedidos, pagamentos_pedidos, avaliacoes_pedidos, pedidos, produtos, traducao_categorias
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+PASTA_DADOS = 'dados'
+PASTA_CACHE = os.path.join(PASTA_DADOS, 'cache')
+FORMATOS_DATA = ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d']
+tempos_carga = {}
+
+TABELAS = {
+    'clientes': {
+        'arquivo': 'olist_customers_dataset.csv',
+        'colunas': {
+            'customer_id': 'str',
+            'customer_unique_id': 'str',
+            'customer_zip_code_prefix': 'int32',
+            'customer_city': 'str',
+            'customer_state': 'str',
+        },
+    },
+    'itens_pedidos': {
+        'arquivo': 'olist_order_items_dataset.csv',
+        'colunas': {
+            'order_id': 'str',
+            'order_item_id': 'int16',
+            'product_id': 'str',
+            'seller_id': 'str',
+            'price': 'float64',
+            'freight_value': 'float64',
+        },
+    },
+    'pagamentos_pedidos': {
+        'arquivo': 'olist_order_payments_dataset.csv',
+        'colunas': {
+            'order_id': 'str',
+            'payment_sequential': 'int16',
+            'payment_type': 'str',
+            'payment_installments': 'int16',
+            'payment_value': 'float64',
+        },
+    },
+    'avaliacoes_pedidos': {
+        'arquivo': 'olist_order_reviews_dataset.csv',
+        'colunas': {
+            'order_id': 'str',
+            'review_score': 'int8',
+            'review_comment_message': 'str',
+            'review_creation_date': 'datetime64[ns]',
+            'review_answer_timestamp': 'datetime64[ns]',
+        },
+    },
+    'pedidos': {
+        'arquivo': 'olist_orders_dataset.csv',
+        'colunas': {
+            'order_id': 'str',
+            'customer_id': 'str',
+            'order_purchase_timestamp': 'datetime64[ns]',
+            'order_approved_at': 'datetime64[ns]',
+            'order_delivered_customer_date': 'datetime64[ns]',
+            'order_estimated_delivery_date': 'datetime64[ns]',
+        },
+    },
+    'produtos': {
+        'arquivo': 'olist_products_dataset.csv',
+        'colunas': {
+            'product_id': 'str',
+            'product_category_name': 'str',
+        },
+    },
+    'traducao_categorias': {
+        'arquivo': 'product_category_name_translation.csv',
+        'colunas': {
+            'product_category_name': 'str',
+            'product_category_name_english': 'str',
+        },
+    },
+    'vendedores': {
+        'arquivo': 'olist_sellers_dataset.csv',
+        'colunas': {
+            'seller_id': 'str',
+            'seller_zip_code_prefix': 'int32',
+            'seller_state': 'str',
+        },
+    },
+}
+
+
+def assinatura_csv(caminho, colunas):
+    info = os.stat(caminho)
+    return {'mtime_ns': info.st_mtime_ns, 'tamanho': info.st_size, 'colunas': colunas}
+
+
+def tipo_arrow(tipo):
+    if tipo == 'str':
+        return pa.string()
+    if tipo.startswith('datetime'):
+        return pa.timestamp('ns')
+    return pa.from_numpy_dtype(np.dtype(tipo))
+
+
+def ler_csv(caminho, colunas):
+    tabela = pv.read_csv(
+        caminho,
+        read_options=pv.ReadOptions(use_threads=True),
+        parse_options=pv.ParseOptions(newlines_in_values=True),
+        convert_options=pv.ConvertOptions(
+            include_columns=list(colunas),
+            column_types={coluna: tipo_arrow(tipo) for coluna, tipo in colunas.items()},
+            timestamp_parsers=FORMATOS_DATA,
+            strings_can_be_null=True,
+        ),
+    )
+    return tabela.to_pandas()
+
+
+def ler_cache(caminho_cache, assinatura):
+    if not os.path.exists(caminho_cache):
+        return None
+    try:
+        metadados = pq.read_schema(caminho_cache).metadata or {}
+        if json.loads(metadados.get(b'olist_cache', b'{}')) != assinatura:
+            return None
+        return pq.read_table(caminho_cache, memory_map=True).to_pandas()
+    except (OSError, ValueError, pa.ArrowException):
+        return None
+
+
+def gravar_cache(caminho_cache, tabela, assinatura):
+    tabela_arrow = pa.Table.from_pandas(tabela, preserve_index=False)
+    metadados = dict(tabela_arrow.schema.metadata or {})
+    metadados[b'olist_cache'] = json.dumps(assinatura).encode()
+    tabela_arrow = tabela_arrow.replace_schema_metadata(metadados)
+    temporario = f'{caminho_cache}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(os.path.dirname(caminho_cache), exist_ok=True)
+        pq.write_table(tabela_arrow, temporario)
+        os.replace(temporario, caminho_cache)
+    except OSError:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+
+def carregar_tabela(nome):
+    especificacao = TABELAS[nome]
+    caminho = os.path.join(PASTA_DADOS, especificacao['arquivo'])
+    caminho_cache = os.path.join(PASTA_CACHE, f'{nome}.parquet')
+    assinatura = assinatura_csv(caminho, especificacao['colunas'])
+    tabela = ler_cache(caminho_cache, assinatura)
+    if tabela is None:
+        tabela = ler_csv(caminho, especificacao['colunas'])
+        gravar_cache(caminho_cache, tabela, assinatura)
+    return tabela
+
+
+def assinatura_dados():
+    assinaturas = {
+        nome: assinatura_csv(os.path.join(PASTA_DADOS, especificacao['arquivo']), especificacao['colunas'])
+        for nome, especificacao in TABELAS.items()
+    }
+    return 'csv-' + hashlib.sha1(json.dumps(assinaturas, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def carregar_tabela_medindo(nome):
+    inicio = time.perf_counter()
+    tabela = carregar_tabela(nome)
+    tempos_carga[nome] = time.perf_counter() - inicio
+    return tabela
+
+
+def ler_tabelas(paralelo=True):
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(TABELAS) if paralelo else 1) as executor:
+        futuros = {nome: executor.submit(carregar_tabela_medindo, nome) for nome in TABELAS}
+    tempos_carga['total'] = time.perf_counter() - inicio
+    return tuple(futuros[nome].result() for nome in TABELAS)
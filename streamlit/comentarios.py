@@ -0,0 +1,99 @@
+import re
+import unicodedata
+import numpy as np
+import pandas as pd
+from artefatos import PASTA_ARTEFATOS, ler_indice_comentarios
+
+PADRAO_TERMO = r'[a-z0-9]+'
+PADRAO_FRASE = re.compile(r'"([^"]*)"')
+TAMANHO_MINIMO_TERMO = 3
+STOPWORDS = frozenset('''
+    a o as os um uma uns umas de da do das dos em na no nas nos num numa por pela pelo pelas pelos para pra pro
+    com sem e ou mas que se como quando onde ja so mais muito muita muitos muitas bem foi era ser esta estava
+    esse essa isso este isto aquele aquela ate ao aos me meu minha meus minhas eu ele ela eles elas voce voces
+    lhe tem ter tinha sao sua seu suas seus nem mesmo ainda tambem the and
+'''.split())
+
+
+def normalizar(textos):
+    return textos.fillna('').str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii').str.lower()
+
+
+def tokenizar(texto):
+    return re.findall(PADRAO_TERMO, unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii').lower())
+
+
+def postagens_comentarios(pedidos):
+    comentarios = pedidos.loc[pedidos['review_comment_message'].fillna('') != '', ['order_id', 'review_comment_message']]
+    return pd.DataFrame({
+        'order_id': comentarios['order_id'].to_numpy(),
+        'termo': normalizar(comentarios['review_comment_message']).str.findall(PADRAO_TERMO).to_numpy(),
+    }).explode('termo').dropna().drop_duplicates()
+
+
+def indexar_postagens(postagens):
+    codigos, termos = pd.factorize(postagens['termo'], sort=True)
+    ordem = np.lexsort((postagens['order_id'].to_numpy(), codigos))
+    return {
+        'termos': pd.DataFrame({'termo': termos.astype(str), 'documentos': np.bincount(codigos, minlength=len(termos)).astype('int32')}),
+        'postagens': pd.DataFrame({'order_id': postagens['order_id'].to_numpy('int32')[ordem]}),
+    }
+
+
+def construir_indice_comentarios(pedidos):
+    return indexar_postagens(postagens_comentarios(pedidos))
+
+
+def atualizar_indice_comentarios(tabelas, pedidos, afetados):
+    termos = np.repeat(tabelas['termos']['termo'].to_numpy(object), tabelas['termos']['documentos'].to_numpy('int64'))
+    documentos = tabelas['postagens']['order_id'].to_numpy()
+    mantidas = ~np.isin(documentos, np.union1d(afetados, pedidos['order_id'].to_numpy()))
+    return indexar_postagens(pd.concat([
+        pd.DataFrame({'order_id': documentos[mantidas], 'termo': termos[mantidas]}),
+        postagens_comentarios(pedidos),
+    ], ignore_index=True))
+
+
+class IndiceComentarios:
+    def __init__(self, tabelas):
+        self.termos = pd.Index(tabelas['termos']['termo'], dtype=object)
+        contagens = tabelas['termos']['documentos'].to_numpy('int64')
+        self.inicio = np.concatenate([[0], np.cumsum(contagens)])
+        self.documentos = tabelas['postagens']['order_id'].to_numpy()
+        self.termo_postagem = np.repeat(np.arange(len(self.termos), dtype='int32'), contagens)
+        self.relevantes = ~self.termos.isin(STOPWORDS) & (self.termos.str.len() >= TAMANHO_MINIMO_TERMO)
+
+    def postagens(self, termo):
+        posicao = self.termos.get_indexer([termo])[0]
+        if posicao < 0:
+            return self.documentos[:0]
+        return self.documentos[self.inicio[posicao]:self.inicio[posicao + 1]]
+
+    def buscar(self, consulta):
+        frases = [termos for termos in map(tokenizar, PADRAO_FRASE.findall(consulta)) if termos]
+        termos = set(tokenizar(PADRAO_FRASE.sub(' ', consulta))).union(*frases)
+        if not termos:
+            return None, []
+        listas = sorted((self.postagens(termo) for termo in termos), key=len)
+        documentos = listas[0]
+        for lista in listas[1:]:
+            documentos = np.intersect1d(documentos, lista, assume_unique=True)
+        return documentos, [' '.join(frase) for frase in frases if len(frase) > 1]
+
+    def localizar(self, pedidos, consulta):
+        documentos, frases = self.buscar(consulta)
+        if documentos is None:
+            return np.ones(len(pedidos), dtype=bool)
+        encontrados = pedidos['order_id'].isin(documentos).to_numpy()
+        if frases and encontrados.any():
+            textos = ' ' + normalizar(pedidos['review_comment_message'][encontrados]).str.findall(PADRAO_TERMO).str.join(' ') + ' '
+            contem = np.ones(len(textos), dtype=bool)
+            for frase in frases:
+                contem &= textos.str.contains(f' {frase} ', regex=False).to_numpy()
+            encontrados[np.flatnonzero(encontrados)[~contem]] = False
+        return encontrados
+
+
+def abrir_indice_comentarios(versao, modelo, pasta=PASTA_ARTEFATOS):
+    tabelas = ler_indice_comentarios(versao, pasta)
+    return IndiceComentarios(tabelas if tabelas is not None else construir_indice_comentarios(modelo['pedidos']))
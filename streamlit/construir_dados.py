@@ -0,0 +1,33 @@
+import argparse
+import json
+import time
+from artefatos import PASTA_ARTEFATOS, TABELAS_MODELO, publicar_modelo
+from carregamento_dados import ler_tabelas, tempos_carga
+from comentarios import construir_indice_comentarios
+from cubo import construir_cubo
+from dados_preprocessamento import montar_modelo
+from instrumentacao import LOGGER, configurar_log
+
+
+def construir(pasta=PASTA_ARTEFATOS, manter=3):
+    inicio = time.perf_counter()
+    modelo = montar_modelo(*ler_tabelas())
+    versao = publicar_modelo(modelo, pasta=pasta, manter=manter, cubos=construir_cubo(modelo), comentarios=construir_indice_comentarios(modelo['pedidos']))
+    LOGGER.info(json.dumps({
+        'etapa': 'construir',
+        'versao': versao,
+        'pasta': pasta,
+        'carga_s': {nome: round(segundos, 2) for nome, segundos in tempos_carga.items()},
+        'linhas': {nome: len(modelo[nome]) for nome in TABELAS_MODELO},
+        'duracao_s': round(time.perf_counter() - inicio, 1),
+    }, ensure_ascii=False))
+    return versao
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gera as tabelas de itens, pedidos e pagamentos do dashboard como artefato Parquet particionado por mês de compra.')
+    parser.add_argument('--saida', default=PASTA_ARTEFATOS, help='Pasta onde as versões do artefato são publicadas')
+    parser.add_argument('--manter', type=int, default=3, help='Quantidade de versões antigas mantidas em disco')
+    argumentos = parser.parse_args()
+    configurar_log()
+    construir(pasta=argumentos.saida, manter=argumentos.manter)
@@ -0,0 +1,319 @@
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+from artefatos import PASTA_ARTEFATOS, ler_cubos
+from contagem_distinta import REGISTROS, estimar_registros, mesclar_registros, registros_densos, registros_hll
+from quantis import MEDIDAS_QUANTIS, estimar_quantis, histograma_por_celula
+
+DIMENSOES_ITENS = ['dia', 'customer_state', 'product_category_name_english', 'review_score']
+DIMENSOES_PEDIDOS = ['dia', 'customer_state', 'review_score', 'payment_type']
+DIMENSOES_PAGAMENTOS = ['dia', 'customer_state', 'review_score', 'payment_type']
+DIMENSOES_CLIENTES = ['mes', 'customer_state']
+DIMENSOES_QUANTIS = ['dia', 'customer_state', 'review_score']
+
+
+def com_dia(tabela, colunas):
+    tabela = tabela[colunas].copy()
+    tabela['dia'] = tabela['order_purchase_timestamp'].dt.floor('D')
+    return tabela[tabela['review_score'].notna()]
+
+
+def agrupar(tabela, dimensoes, medidas):
+    return tabela.groupby(dimensoes, observed=True, dropna=False).agg(**medidas).reset_index()
+
+
+def mes_compra(datas):
+    return datas.dt.to_period('M').dt.to_timestamp()
+
+
+def esboco_mensal(pedidos):
+    clientes = com_dia(pedidos, ['order_purchase_timestamp', 'customer_state', 'review_score', 'customer_unique_id'])
+    clientes['mes'] = mes_compra(clientes['order_purchase_timestamp'])
+    grupos = clientes.groupby(DIMENSOES_CLIENTES, observed=True, dropna=False)
+    celulas = grupos.size().reset_index()[DIMENSOES_CLIENTES]
+    densos = registros_densos(grupos.ngroup().to_numpy(), len(celulas), clientes['customer_unique_id'].to_numpy())
+    return celulas.assign(registros=[linha.tobytes() for linha in densos])
+
+
+def bordas_clientes(pedidos, tipo_estado):
+    clientes = com_dia(pedidos, ['order_purchase_timestamp', 'customer_state', 'review_score', 'customer_unique_id'])
+    clientes = clientes.sort_values('order_purchase_timestamp', kind='stable')
+    registro, rank = registros_hll(clientes['customer_unique_id'].to_numpy())
+    return {
+        'dia': clientes['dia'].to_numpy(),
+        'estado': pd.Categorical(clientes['customer_state'], dtype=tipo_estado).codes,
+        'registro': registro,
+        'rank': rank,
+    }
+
+
+def construir_cubo(modelo):
+    itens = com_dia(modelo['itens'], ['order_purchase_timestamp', 'customer_state', 'product_category_name_english', 'review_score', 'price', 'freight_value'])
+    pedidos = com_dia(modelo['pedidos'], ['order_purchase_timestamp', 'customer_state', 'review_score', 'payment_type', 'payment_value', 'Tempo de Entrega', 'delivery_delay', 'is_late'])
+    pagamentos = com_dia(modelo['pagamentos'], ['order_purchase_timestamp', 'customer_state', 'review_score', 'payment_type', 'payment_value'])
+    entregas = com_dia(modelo['pedidos'], ['order_purchase_timestamp', 'customer_state', 'review_score', *MEDIDAS_QUANTIS])
+    return {
+        'itens': agrupar(itens, DIMENSOES_ITENS, {
+            'itens': ('price', 'size'),
+            'price_soma': ('price', 'sum'),
+            'freight_soma': ('freight_value', 'sum'),
+        }),
+        'pedidos': agrupar(pedidos, DIMENSOES_PEDIDOS, {
+            'pedidos': ('payment_value', 'size'),
+            'pago_soma': ('payment_value', 'sum'),
+            'entrega_soma': ('Tempo de Entrega', 'sum'),
+            'entrega_contagem': ('Tempo de Entrega', 'count'),
+            'atraso_soma': ('delivery_delay', 'sum'),
+            'atraso_contagem': ('delivery_delay', 'count'),
+            'atrasados': ('is_late', 'sum'),
+        }),
+        'pagamentos': agrupar(pagamentos, DIMENSOES_PAGAMENTOS, {
+            'pagamentos': ('payment_value', 'size'),
+            'pago_soma': ('payment_value', 'sum'),
+        }),
+        'clientes': esboco_mensal(modelo['pedidos']),
+        **{
+            f'{prefixo}_quantis': histograma_por_celula(entregas, DIMENSOES_QUANTIS, medida)
+            for medida, prefixo in MEDIDAS_QUANTIS.items()
+        },
+        'limites': limites_preco(modelo['itens']),
+    }
+
+
+def limites_preco(itens):
+    return pd.DataFrame({'preco_min': [itens['price'].min()], 'preco_max': [itens['price'].max()]})
+
+
+def atualizar_cubo(cubos, modelo, dias):
+    dias = pd.DatetimeIndex(sorted(dias))
+    do_periodo = {
+        nome: modelo[nome][modelo[nome]['order_purchase_timestamp'].dt.floor('D').isin(dias)]
+        for nome in ('itens', 'pedidos', 'pagamentos')
+    }
+    novos = construir_cubo(do_periodo)
+    atualizados = {'limites': limites_preco(modelo['itens'])}
+    for nome, cubo in novos.items():
+        if nome in ('limites', 'clientes'):
+            continue
+        combinado = pd.concat([cubos[nome][~cubos[nome]['dia'].isin(dias)], cubo], ignore_index=True)
+        for coluna in cubo.select_dtypes('category'):
+            combinado[coluna] = combinado[coluna].astype(cubo[coluna].dtype)
+        atualizados[nome] = combinado
+    meses = mes_compra(pd.Series(dias)).unique()
+    pedidos = modelo['pedidos']
+    clientes = esboco_mensal(pedidos[mes_compra(pedidos['order_purchase_timestamp']).isin(meses)])
+    combinado = pd.concat([cubos['clientes'][~cubos['clientes']['mes'].isin(meses)], clientes], ignore_index=True)
+    atualizados['clientes'] = combinado.astype({'customer_state': clientes['customer_state'].dtype})
+    return atualizados
+
+
+def razao(numerador, denominador):
+    return numerador / denominador.where(denominador > 0)
+
+
+class Cubo:
+    AGREGACOES_ITENS = {'vendas_estado', 'vendas_estado_categoria', 'vendas_categoria', 'avaliacoes_categoria'}
+    AGREGACOES_PEDIDOS = {
+        'vendas_tempo', 'indicadores_logistica', 'atraso_estado', 'entrega_estado', 'entrega_tempo',
+        'ticket_estado', 'total_pagamento', 'media_pagamento', 'pagamentos_tempo', 'pagamento_avaliacao',
+        'avaliacoes', 'avaliacao_tempo', 'indicadores', 'clientes_estado', 'quantis_logistica', 'quantis_estado', 'quantis_tempo',
+    }
+    AGREGACOES_DISTINTAS = {'indicadores', 'clientes_estado'}
+
+    def __init__(self, cubos, pedidos=None):
+        self.cubos = cubos
+        self.preco_min = float(cubos['limites']['preco_min'].iloc[0])
+        self.preco_max = float(cubos['limites']['preco_max'].iloc[0])
+        clientes = cubos['clientes']
+        self.tipo_estado = clientes['customer_state'].dtype
+        self.meses_clientes = clientes['mes'].to_numpy()
+        self.estados_clientes = clientes['customer_state'].cat.codes.to_numpy()
+        self.registros_clientes = np.frombuffer(b''.join(clientes['registros']), dtype=np.int8).reshape(len(clientes), REGISTROS)
+        self.bordas = None if pedidos is None else bordas_clientes(pedidos, self.tipo_estado)
+
+    def suporta(self, nome, filtro, contagem_exata=False):
+        if nome in self.AGREGACOES_DISTINTAS and (contagem_exata or self.bordas is None or filtro.nota_minima > 1):
+            return False
+        if filtro.preco_min is not None and filtro.preco_min > self.preco_min:
+            return False
+        if filtro.preco_max is not None and filtro.preco_max < self.preco_max:
+            return False
+        if nome in self.AGREGACOES_ITENS:
+            return True
+        return nome in self.AGREGACOES_PEDIDOS and not filtro.categorias
+
+    def celulas(self, nome_cubo, filtro):
+        cubo = self.cubos[nome_cubo]
+        inicio = pd.Timestamp(filtro.inicio)
+        fim = pd.Timestamp(filtro.fim + timedelta(days=1))
+        mascara = (cubo['dia'] >= inicio) & (cubo['dia'] < fim) & (cubo['review_score'] >= filtro.nota_minima)
+        if filtro.estados:
+            mascara &= cubo['customer_state'].isin(filtro.estados)
+        if filtro.categorias and 'product_category_name_english' in cubo:
+            mascara &= cubo['product_category_name_english'].isin(filtro.categorias)
+        return cubo[mascara]
+
+    def registros(self, filtro, por_estado):
+        inicio = pd.Timestamp(filtro.inicio)
+        fim = pd.Timestamp(filtro.fim + timedelta(days=1))
+        primeiro, ultimo = pd.offsets.MonthBegin().rollforward(inicio), pd.offsets.MonthBegin().rollback(fim)
+        if primeiro < ultimo:
+            meses = (self.meses_clientes >= primeiro.to_datetime64()) & (self.meses_clientes < ultimo.to_datetime64())
+            trechos = [(inicio, primeiro), (ultimo, fim)]
+        else:
+            meses = np.zeros(len(self.meses_clientes), dtype=bool)
+            trechos = [(inicio, fim)]
+        dias = self.bordas['dia']
+        linhas = np.concatenate([
+            np.arange(*np.searchsorted(dias, [comeco.to_datetime64(), final.to_datetime64()]))
+            for comeco, final in trechos
+        ])
+        estados = self.bordas['estado'][linhas]
+        if filtro.estados:
+            codigos = pd.Categorical(list(filtro.estados), dtype=self.tipo_estado).codes
+            meses &= np.isin(self.estados_clientes, codigos)
+            linhas = linhas[np.isin(estados, codigos)]
+            estados = self.bordas['estado'][linhas]
+        grupos_densos = self.estados_clientes[meses] if por_estado else np.zeros(meses.sum(), dtype=np.int8)
+        grupos_esparsos = estados if por_estado else np.zeros(len(linhas), dtype=np.int8)
+        return mesclar_registros(grupos_densos, self.registros_clientes[meses], grupos_esparsos, self.bordas['registro'][linhas], self.bordas['rank'][linhas])
+
+    def responder(self, nome, filtro, *parametros):
+        return getattr(self, nome)(filtro, *parametros)
+
+    def indicadores(self, filtro):
+        itens = self.celulas('itens', filtro)[['itens', 'price_soma']].sum()
+        pedidos = self.celulas('pedidos', filtro).assign(nota_soma=lambda c: c['review_score'].astype('float64') * c['pedidos'])
+        somas = pedidos[['pedidos', 'nota_soma']].sum()
+        return {
+            'itens': int(itens['itens']),
+            'total_vendas': itens['price_soma'],
+            'qtd_pedidos': int(somas['pedidos']),
+            'clientes_unicos': int(estimar_registros(self.registros(filtro, False)[1]).sum()),
+            'clientes_aproximado': True,
+            'nota_media': somas['nota_soma'] / somas['pedidos'] if somas['pedidos'] else np.nan,
+        }
+
+    def clientes_estado(self, filtro):
+        estados, registros = self.registros(filtro, True)
+        observados = estados >= 0
+        clientes = pd.DataFrame({
+            'customer_state': pd.Categorical.from_codes(estados[observados], dtype=self.tipo_estado),
+            'clientes': estimar_registros(registros[observados]),
+        })
+        return clientes.sort_values('clientes', ascending=False, kind='stable').head(10)
+
+    def vendas_estado(self, filtro):
+        vendas = self.celulas('itens', filtro).groupby('customer_state', observed=True)['price_soma'].sum()
+        return vendas.reset_index(name='price').sort_values('price', ascending=True, kind='stable')
+
+    def vendas_estado_categoria(self, filtro):
+        vendas = self.celulas('itens', filtro).groupby(['customer_state', 'product_category_name_english'], observed=True)['price_soma'].sum()
+        vendas = vendas.reset_index(name='price')
+        return vendas.astype({'customer_state': str, 'product_category_name_english': str})
+
+    def vendas_categoria(self, filtro):
+        vendas = self.celulas('itens', filtro).groupby('product_category_name_english', observed=True)['price_soma'].sum()
+        return vendas.reset_index(name='price').sort_values('price', ascending=True, kind='stable')
+
+    def avaliacoes_categoria(self, filtro):
+        celulas = self.celulas('itens', filtro).assign(nota_soma=lambda c: c['review_score'].astype('float64') * c['itens'])
+        somas = celulas.groupby('product_category_name_english', observed=True)[['nota_soma', 'itens']].sum()
+        media = razao(somas['nota_soma'], somas['itens']).astype('float32')
+        return media.reset_index(name='review_score').sort_values('review_score', ascending=False, kind='stable')
+
+    def vendas_tempo(self, filtro, frequencia):
+        vendas = self.celulas('itens', filtro).groupby('dia')['price_soma'].sum().resample(frequencia).sum()
+        pedidos = self.celulas('pedidos', filtro).groupby('dia')[['pedidos', 'pago_soma']].sum().resample(frequencia).sum()
+        tempo = pd.DataFrame({'price': vendas}).join(pd.DataFrame({
+            'Quantidade de Pedidos': pedidos['pedidos'],
+            'Ticket Médio': razao(pedidos['pago_soma'], pedidos['pedidos']),
+        }), how='outer')
+        tempo.index.name = 'order_purchase_timestamp'
+        tempo = tempo.reset_index()
+        tempo['Vendas Cumulativas'] = tempo['price'].cumsum()
+        return tempo
+
+    def indicadores_logistica(self, filtro):
+        somas = self.celulas('pedidos', filtro)[['pedidos', 'atraso_soma', 'atraso_contagem', 'entrega_soma', 'entrega_contagem', 'atrasados']].sum()
+        return {
+            'media_atraso': somas['atraso_soma'] / somas['atraso_contagem'] if somas['atraso_contagem'] else np.nan,
+            'tempo_entrega_media': somas['entrega_soma'] / somas['entrega_contagem'] if somas['entrega_contagem'] else np.nan,
+            'percentual_atraso': somas['atrasados'] / somas['pedidos'] * 100 if somas['pedidos'] else np.nan,
+        }
+
+    def atraso_estado(self, filtro):
+        somas = self.celulas('pedidos', filtro).groupby('customer_state', observed=True)[['atrasados', 'pedidos']].sum()
+        atraso = (razao(somas['atrasados'], somas['pedidos']) * 100).reset_index(name='Percentual de Atraso')
+        return atraso.sort_values('Percentual de Atraso', ascending=True, kind='stable')
+
+    def entrega_estado(self, filtro):
+        somas = self.celulas('pedidos', filtro).groupby('customer_state', observed=True)[['entrega_soma', 'entrega_contagem']].sum()
+        entrega = razao(somas['entrega_soma'], somas['entrega_contagem']).reset_index(name='Tempo de Entrega')
+        return entrega.sort_values('Tempo de Entrega', ascending=True, kind='stable')
+
+    def entrega_tempo(self, filtro):
+        somas = self.celulas('pedidos', filtro).groupby('dia')[['entrega_soma', 'entrega_contagem']].sum().resample('M').sum()
+        entrega = razao(somas['entrega_soma'], somas['entrega_contagem'])
+        entrega.index.name = 'order_purchase_timestamp'
+        return entrega.reset_index(name='Tempo de Entrega')
+
+    def quantis_logistica(self, filtro):
+        resultado = {}
+        for prefixo in MEDIDAS_QUANTIS.values():
+            quantis = estimar_quantis(self.celulas(f'{prefixo}_quantis', filtro))
+            resultado.update({f'{prefixo}_{rotulo.lower()}': valor for rotulo, valor in quantis.items()})
+        return resultado
+
+    def quantis_estado(self, filtro, medida):
+        quantis = estimar_quantis(self.celulas(f'{MEDIDAS_QUANTIS[medida]}_quantis', filtro), 'customer_state')
+        return quantis.reset_index().sort_values('P90', ascending=True, kind='stable')
+
+    def quantis_tempo(self, filtro, medida):
+        celulas = self.celulas(f'{MEDIDAS_QUANTIS[medida]}_quantis', filtro)
+        quantis = estimar_quantis(celulas.assign(mes=celulas['dia'] + pd.offsets.MonthEnd(0)), 'mes')
+        dias = self.celulas('pedidos', filtro)['dia']
+        meses = pd.date_range(dias.min() + pd.offsets.MonthEnd(0), dias.max() + pd.offsets.MonthEnd(0), freq='M') if len(dias) else pd.DatetimeIndex([])
+        quantis = quantis.reindex(meses)
+        quantis.index.name = 'order_purchase_timestamp'
+        return quantis.reset_index()
+
+    def ticket_estado(self, filtro):
+        somas = self.celulas('pedidos', filtro).groupby('customer_state', observed=True)[['pago_soma', 'pedidos']].sum()
+        ticket = razao(somas['pago_soma'], somas['pedidos']).reset_index(name='payment_value')
+        return ticket.sort_values('payment_value', ascending=True, kind='stable')
+
+    def total_pagamento(self, filtro):
+        total = self.celulas('pagamentos', filtro).groupby('payment_type', observed=True)['pago_soma'].sum()
+        return total.reset_index(name='payment_value').sort_values('payment_value', ascending=False, kind='stable')
+
+    def media_pagamento(self, filtro):
+        somas = self.celulas('pagamentos', filtro).groupby('payment_type', observed=True)[['pago_soma', 'pagamentos']].sum()
+        media = razao(somas['pago_soma'], somas['pagamentos']).reset_index(name='payment_value')
+        return media.sort_values('payment_value', ascending=True, kind='stable')
+
+    def pagamentos_tempo(self, filtro):
+        celulas = self.celulas('pagamentos', filtro)
+        tempo = celulas.groupby(['payment_type', pd.Grouper(key='dia', freq='M')], observed=True)['pago_soma'].sum()
+        tempo = tempo.reset_index(name='payment_value')
+        return tempo.rename(columns={'dia': 'order_purchase_timestamp'})
+
+    def pagamento_avaliacao(self, filtro):
+        contagem = self.celulas('pagamentos', filtro).groupby(['payment_type', 'review_score'], observed=True)['pagamentos'].sum()
+        return contagem.reset_index(name='Quantidade')
+
+    def avaliacoes(self, filtro):
+        contagem = self.celulas('pedidos', filtro).groupby('review_score', observed=True)['pedidos'].sum()
+        return contagem.reset_index(name='Quantidade')
+
+    def avaliacao_tempo(self, filtro):
+        celulas = self.celulas('pedidos', filtro).assign(nota_soma=lambda c: c['review_score'].astype('float64') * c['pedidos'])
+        somas = celulas.groupby('dia')[['nota_soma', 'pedidos']].sum().resample('M').sum()
+        media = razao(somas['nota_soma'], somas['pedidos']).astype('float32')
+        media.index.name = 'order_purchase_timestamp'
+        return media.reset_index(name='review_score')
+
+
+def abrir_cubo(versao, modelo, pasta=PASTA_ARTEFATOS):
+    cubos = ler_cubos(versao, pasta)
+    return Cubo(cubos if cubos is not None else construir_cubo(modelo), modelo['pedidos'])
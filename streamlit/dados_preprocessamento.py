@@ -1,22 +1,98 @@
+import numpy as np
 import pandas as pd
-import streamlit as st
+from geolocalizacao import adicionar_distancias, carregar_indice_cep
 
-@st.cache_data
-def preprocessar_dados(clientes, itens_pedidos, pagamentos_pedidos, avaliacoes_pedidos, pedidos, produtos, traducao_categorias):
+COLUNAS_PEDIDO_REPLICADAS = ['order_purchase_timestamp', 'customer_state', 'review_score']
+COLUNAS_ID = ['order_id', 'customer_id', 'customer_unique_id', 'product_id', 'seller_id']
+COLUNAS_CATEGORICAS = ['customer_state', 'customer_city', 'product_category_name_english', 'payment_type', 'atraso_entrega', 'seller_state']
+COLUNAS_REDUZIDAS = ['review_score', 'delivery_delay', 'Tempo de Entrega', 'payment_installments', 'order_item_id', 'payment_sequential', 'qtd_itens', 'qtd_pagamentos']
+
+
+def montar_pedidos(clientes, itens, pagamentos_pedidos, avaliacoes_pedidos, pedidos):
+    pedidos_full = pedidos[pedidos['order_id'].isin(itens['order_id'])]
+    pedidos_full = pedidos_full.merge(clientes, on='customer_id', how='left')
+
+    totais_itens = itens.groupby('order_id').agg(
+        valor_itens=('price', 'sum'),
+        valor_frete=('freight_value', 'sum'),
+        qtd_itens=('order_item_id', 'count'),
+    )
+    categoria_principal = itens.sort_values('order_item_id').drop_duplicates('order_id').set_index('order_id')['product_category_name_english']
+    totais_pagamentos = pagamentos_pedidos.groupby('order_id').agg(
+        payment_value=('payment_value', 'sum'),
+        payment_installments=('payment_installments', 'max'),
+        qtd_pagamentos=('payment_sequential', 'count'),
+    )
+    tipo_principal = pagamentos_pedidos.sort_values(['payment_value', 'payment_sequential'], ascending=[False, True], kind='stable').drop_duplicates('order_id').set_index('order_id')['payment_type']
+    ultima_avaliacao = avaliacoes_pedidos.sort_values(['review_creation_date', 'review_answer_timestamp'], kind='stable').drop_duplicates('order_id', keep='last').set_index('order_id')[['review_score', 'review_comment_message']]
+
+    pedidos_full = pedidos_full.join(totais_itens, on='order_id')
+    pedidos_full = pedidos_full.join(categoria_principal, on='order_id')
+    pedidos_full = pedidos_full.join(totais_pagamentos, on='order_id')
+    pedidos_full = pedidos_full.join(tipo_principal, on='order_id')
+    pedidos_full = pedidos_full.join(ultima_avaliacao, on='order_id')
+
+    pedidos_full['delivery_delay'] = (pedidos_full['order_delivered_customer_date'] - pedidos_full['order_estimated_delivery_date']).dt.days
+    pedidos_full['Tempo de Entrega'] = (pedidos_full['order_delivered_customer_date'] - pedidos_full['order_purchase_timestamp']).dt.days
+    pedidos_full['is_late'] = (pedidos_full['delivery_delay'] > 0).to_numpy()
+    pedidos_full['atraso_entrega'] = np.where(pedidos_full['is_late'], 'Sim', 'Não')
+    pedidos_full['payment_value'] = pedidos_full['payment_value'].fillna(0)
+    pedidos_full['qtd_pagamentos'] = pedidos_full['qtd_pagamentos'].fillna(0).astype('int16')
+    return pedidos_full.reset_index(drop=True)
+
+
+def categorizar_produtos(produtos, traducao_categorias):
     produtos_com_categoria = produtos.merge(traducao_categorias, on='product_category_name', how='left')
-    itens = itens_pedidos.merge(produtos_com_categoria, on='product_id', how='left')
-    pedidos_full = pedidos.merge(clientes, on='customer_id', how='left')
-    dados = itens.merge(pedidos_full, on='order_id', how='left')
-    dados = dados.merge(pagamentos_pedidos, on='order_id', how='left')
-    dados = dados.merge(avaliacoes_pedidos[['order_id', 'review_score', 'review_comment_message']], on='order_id', how='left')
-    dados['order_purchase_timestamp'] = pd.to_datetime(dados['order_purchase_timestamp'])
-    dados['order_approved_at'] = pd.to_datetime(dados['order_approved_at'])
-    dados['order_delivered_customer_date'] = pd.to_datetime(dados['order_delivered_customer_date'])
-    dados['order_estimated_delivery_date'] = pd.to_datetime(dados['order_estimated_delivery_date'])
-    dados['delivery_delay'] = (dados['order_delivered_customer_date'] - dados['order_estimated_delivery_date']).dt.days
-    dados['Tempo de Entrega'] = (dados['order_delivered_customer_date'] - dados['order_purchase_timestamp']).dt.days
-    dados['atraso_entrega'] = dados['delivery_delay'].apply(lambda x: 'Sim' if x > 0 else 'Não')
-    dados['price'] = dados['price'].fillna(0)
-    dados['payment_value'] = dados['payment_value'].fillna(0)
-    dados['freight_value'] = dados['freight_value'].fillna(0)
-    return dados
+    return produtos_com_categoria[['product_id', 'product_category_name_english']]
+
+
+def montar_tabelas(clientes, itens_pedidos, pagamentos_pedidos, avaliacoes_pedidos, pedidos, categorias_produtos):
+    itens = itens_pedidos.merge(categorias_produtos, on='product_id', how='left')
+    itens['price'] = itens['price'].fillna(0)
+    itens['freight_value'] = itens['freight_value'].fillna(0)
+
+    pedidos_full = montar_pedidos(clientes, itens, pagamentos_pedidos, avaliacoes_pedidos, pedidos)
+    atributos_pedido = pedidos_full[['order_id'] + COLUNAS_PEDIDO_REPLICADAS]
+
+    itens = itens.merge(atributos_pedido, on='order_id', how='left')
+    pagamentos = pagamentos_pedidos.merge(atributos_pedido, on='order_id', how='inner')
+    pagamentos['payment_value'] = pagamentos['payment_value'].fillna(0)
+    return {'itens': itens, 'pedidos': pedidos_full, 'pagamentos': pagamentos}
+
+
+def montar_modelo(clientes, itens_pedidos, pagamentos_pedidos, avaliacoes_pedidos, pedidos, produtos, traducao_categorias, vendedores):
+    categorias_produtos = categorizar_produtos(produtos, traducao_categorias)
+    tabelas = montar_tabelas(clientes, itens_pedidos, pagamentos_pedidos, avaliacoes_pedidos, pedidos, categorias_produtos)
+    return compactar_modelo(adicionar_distancias(tabelas, vendedores, carregar_indice_cep()))
+
+
+def compactar_modelo(modelo, chaves=None, categorias=None):
+    tabelas = {nome: tabela.copy() for nome, tabela in modelo.items()}
+    chaves = dict(chaves or {})
+    categorias = categorias or {}
+    for coluna in COLUNAS_ID:
+        com_coluna = [tabela for tabela in tabelas.values() if coluna in tabela]
+        valores = pd.Index(pd.concat([tabela[coluna] for tabela in com_coluna]).dropna().unique())
+        chaves[coluna] = valores if coluna not in chaves else chaves[coluna].append(valores.difference(chaves[coluna], sort=False))
+        for tabela in com_coluna:
+            tabela[coluna] = chaves[coluna].get_indexer(tabela[coluna]).astype('int32')
+    for coluna in COLUNAS_CATEGORICAS:
+        com_coluna = [tabela for tabela in tabelas.values() if coluna in tabela]
+        valores = set(categorias.get(coluna, [])).union(*(tabela[coluna].dropna().unique() for tabela in com_coluna))
+        tipo = pd.CategoricalDtype(sorted(valores))
+        for tabela in com_coluna:
+            tabela[coluna] = tabela[coluna].astype(tipo)
+    for coluna in COLUNAS_REDUZIDAS:
+        for tabela in tabelas.values():
+            if coluna in tabela:
+                tipo = 'integer' if pd.api.types.is_integer_dtype(tabela[coluna]) else 'float'
+                tabela[coluna] = pd.to_numeric(tabela[coluna], downcast=tipo)
+    return {**tabelas, 'chaves': chaves}
+
+
+def decodificar_ids(tabela, chaves):
+    tabela = tabela.copy()
+    for coluna in COLUNAS_ID:
+        if coluna in tabela and coluna in chaves:
+            tabela[coluna] = chaves[coluna].take(tabela[coluna].to_numpy(), fill_value=np.nan)
+    return tabela
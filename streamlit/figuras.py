@@ -0,0 +1,78 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+import pandas as pd
+import plotly.graph_objects as go
+
+CAPACIDADE_FIGURAS_MB = 64
+
+
+def resumir(valor, resumo):
+    if isinstance(valor, pd.DataFrame):
+        resumo.update(repr((list(valor.columns), list(valor.index.names), [str(tipo) for tipo in valor.dtypes])).encode())
+        resumo.update(pd.util.hash_pandas_object(valor, index=True).to_numpy().tobytes())
+    else:
+        resumo.update(json.dumps(valor, sort_keys=True, default=repr, ensure_ascii=False).encode())
+
+
+def chave_figura(construtor, dados, parametros):
+    resumo = hashlib.blake2b(digest_size=16)
+    resumo.update(f'{construtor.__module__}.{construtor.__name__}'.encode())
+    resumir(dados, resumo)
+    resumir(parametros, resumo)
+    return resumo.hexdigest()
+
+
+class CacheFiguras:
+    def __init__(self, capacidade_mb=CAPACIDADE_FIGURAS_MB):
+        self.capacidade = int(capacidade_mb * 1024 * 1024)
+        self.especificacoes = OrderedDict()
+        self.ocupado = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.trava = threading.Lock()
+
+    def obter(self, chave, construir):
+        with self.trava:
+            if chave in self.especificacoes:
+                self.especificacoes.move_to_end(chave)
+                self.acertos += 1
+                return self.especificacoes[chave], True
+        especificacao = construir()
+        with self.trava:
+            self.falhas += 1
+            if chave not in self.especificacoes and len(especificacao) <= self.capacidade:
+                self.especificacoes[chave] = especificacao
+                self.ocupado += len(especificacao)
+                while self.ocupado > self.capacidade:
+                    _, removida = self.especificacoes.popitem(last=False)
+                    self.ocupado -= len(removida)
+        return especificacao, False
+
+    def estatisticas(self):
+        with self.trava:
+            return {
+                'entradas': len(self.especificacoes),
+                'ocupado_mb': self.ocupado / 1024 / 1024,
+                'capacidade_mb': self.capacidade / 1024 / 1024,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+            }
+
+
+def construir_figura(cache, construtor, dados, layout, tracos=None, geos=None, **parametros):
+    chave = chave_figura(construtor, dados, {'layout': layout, 'tracos': tracos, 'geos': geos, 'parametros': parametros})
+
+    def construir():
+        figura = construtor(dados, **parametros)
+        if tracos:
+            figura.update_traces(**tracos)
+        if geos:
+            figura.update_geos(**geos)
+        figura.update_layout(**layout)
+        return figura.to_json()
+
+    especificacao, acerto = cache.obter(chave, construir)
+    # A especificação já foi validada pelo Plotly quando a figura foi construída.
+    return go.Figure(json.loads(especificacao), _validate=False), len(especificacao), acerto
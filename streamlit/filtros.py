@@ -0,0 +1,106 @@
+from dataclasses import dataclass
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+
+NOTAS = (1, 2, 3, 4, 5)
+PERIODOS = {'Todos': None, 'Última semana': 7, 'Último mês': 30, 'Último trimestre': 90, 'Último ano': 365}
+
+
+@dataclass(frozen=True)
+class Filtro:
+    inicio: object
+    fim: object
+    estados: tuple = ()
+    categorias: tuple = ()
+    nota_minima: int = 1
+    preco_min: float = None
+    preco_max: float = None
+
+
+def criar_filtro(inicio, fim, estados=(), categorias=(), nota_minima=1, preco_intervalo=(None, None)):
+    return Filtro(
+        inicio=inicio,
+        fim=fim,
+        estados=tuple(sorted(estados)),
+        categorias=tuple(sorted(categorias)),
+        nota_minima=int(nota_minima),
+        preco_min=None if preco_intervalo[0] is None else float(preco_intervalo[0]),
+        preco_max=None if preco_intervalo[1] is None else float(preco_intervalo[1]),
+    )
+
+
+def intervalo_periodo(periodo, inicio, fim):
+    dias = PERIODOS[periodo]
+    return (inicio, fim) if dias is None else (fim - timedelta(days=dias), fim)
+
+
+def bitmaps_por_valor(coluna):
+    codigos, valores = pd.factorize(coluna, sort=True)
+    return {valor: np.packbits(codigos == posicao) for posicao, valor in enumerate(valores)}
+
+
+def recortar_bitmap(bitmap, inicio, fim):
+    deslocamento = inicio % 8
+    bits = np.unpackbits(bitmap[inicio // 8:(fim + 7) // 8], count=deslocamento + fim - inicio)
+    return bits[deslocamento:].view(bool)
+
+
+class IndiceFiltros:
+    def __init__(self, modelo):
+        itens = modelo['itens']
+        if not itens['order_purchase_timestamp'].is_monotonic_increasing:
+            itens = itens.sort_values('order_purchase_timestamp', kind='stable').reset_index(drop=True)
+        self.itens = itens
+        self.pedidos = modelo['pedidos']
+        self.pagamentos = modelo['pagamentos']
+        self.total_pedidos = int(max(self.pedidos['order_id'].max(), itens['order_id'].max())) + 1
+        self.datas = itens['order_purchase_timestamp'].to_numpy()
+        self.precos = itens['price'].to_numpy()
+        self.estados = bitmaps_por_valor(itens['customer_state'])
+        self.categorias = bitmaps_por_valor(itens['product_category_name_english'])
+        notas = itens['review_score'].to_numpy()
+        self.notas = {nota: np.packbits(notas >= nota) for nota in NOTAS}
+
+    def intervalo_datas(self, filtro):
+        inicio = np.datetime64(filtro.inicio, 'ns')
+        fim = np.datetime64(filtro.fim + timedelta(days=1), 'ns')
+        return (
+            int(np.searchsorted(self.datas, inicio, side='left')),
+            int(np.searchsorted(self.datas, fim, side='left')),
+        )
+
+    def combinar(self, bitmaps, valores):
+        selecionados = [bitmaps[valor] for valor in valores if valor in bitmaps]
+        if not selecionados:
+            return np.zeros_like(next(iter(bitmaps.values())))
+        return np.bitwise_or.reduce(selecionados)
+
+    def mascara(self, filtro):
+        inicio, fim = self.intervalo_datas(filtro)
+        fim = max(inicio, fim)
+        bitmap = self.notas[filtro.nota_minima]
+        if filtro.estados:
+            bitmap = bitmap & self.combinar(self.estados, filtro.estados)
+        if filtro.categorias:
+            bitmap = bitmap & self.combinar(self.categorias, filtro.categorias)
+        mascara = recortar_bitmap(bitmap, inicio, fim)
+        precos = self.precos[inicio:fim]
+        if filtro.preco_min is not None:
+            mascara &= precos >= filtro.preco_min
+        if filtro.preco_max is not None:
+            mascara &= precos <= filtro.preco_max
+        return inicio, mascara
+
+    def suporta(self, nome):
+        return False
+
+    def filtrar(self, filtro):
+        inicio, mascara = self.mascara(filtro)
+        linhas = inicio + np.flatnonzero(mascara)
+        itens_filtrados = self.itens.take(linhas)
+        selecionados = np.zeros(self.total_pedidos, dtype=bool)
+        selecionados[itens_filtrados['order_id'].to_numpy()] = True
+        pedidos_filtrados = self.pedidos[selecionados[self.pedidos['order_id'].to_numpy()]]
+        pagamentos_filtrados = self.pagamentos[selecionados[self.pagamentos['order_id'].to_numpy()]]
+        return itens_filtrados, pedidos_filtrados, pagamentos_filtrados
@@ -0,0 +1,97 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from carregamento_dados import PASTA_DADOS, ler_csv
+
+ARQUIVO_GEOLOCALIZACAO = 'olist_geolocation_dataset.csv'
+COLUNAS_GEOLOCALIZACAO = {
+    'geolocation_zip_code_prefix': 'int32',
+    'geolocation_lat': 'float64',
+    'geolocation_lng': 'float64',
+}
+CAMINHO_CENTROIDES = os.path.join(PASTA_DADOS, 'geo', 'centroides_cep.parquet')
+PREFIXOS = 100000
+LIMITES_BRASIL = {'lat': (-34.0, 5.5), 'lng': (-74.5, -28.5)}
+RAIO_TERRA_KM = 6371.0088
+
+
+def calcular_centroides(geolocalizacao):
+    latitudes, longitudes = geolocalizacao['geolocation_lat'], geolocalizacao['geolocation_lng']
+    dentro = latitudes.between(*LIMITES_BRASIL['lat']) & longitudes.between(*LIMITES_BRASIL['lng'])
+    centroides = geolocalizacao[dentro].groupby('geolocation_zip_code_prefix')[['geolocation_lat', 'geolocation_lng']].mean()
+    return pd.DataFrame({
+        'prefixo': centroides.index.to_numpy('int32'),
+        'lat': centroides['geolocation_lat'].to_numpy('float32'),
+        'lng': centroides['geolocation_lng'].to_numpy('float32'),
+    })
+
+
+class IndiceCep:
+    def __init__(self, centroides):
+        self.latitudes = np.full(PREFIXOS, np.nan, dtype='float32')
+        self.longitudes = np.full(PREFIXOS, np.nan, dtype='float32')
+        prefixos = centroides['prefixo'].to_numpy()
+        self.latitudes[prefixos] = centroides['lat'].to_numpy()
+        self.longitudes[prefixos] = centroides['lng'].to_numpy()
+
+    def localizar(self, prefixos):
+        prefixos = np.asarray(prefixos, dtype='float64')
+        validos = np.isfinite(prefixos) & (prefixos >= 0) & (prefixos < PREFIXOS)
+        posicoes = prefixos[validos].astype('int64')
+        latitudes = np.full(len(prefixos), np.nan, dtype='float32')
+        longitudes = np.full(len(prefixos), np.nan, dtype='float32')
+        latitudes[validos] = self.latitudes[posicoes]
+        longitudes[validos] = self.longitudes[posicoes]
+        return latitudes, longitudes
+
+
+def haversine(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(valor, dtype='float64')) for valor in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * RAIO_TERRA_KM * np.arcsin(np.sqrt(a))
+
+
+def preparar_centroides(pasta_dados=PASTA_DADOS, destino=CAMINHO_CENTROIDES):
+    geolocalizacao = ler_csv(os.path.join(pasta_dados, ARQUIVO_GEOLOCALIZACAO), COLUNAS_GEOLOCALIZACAO)
+    centroides = calcular_centroides(geolocalizacao)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    temporario = f'{destino}.{os.getpid()}.tmp'
+    pq.write_table(pa.Table.from_pandas(centroides, preserve_index=False), temporario)
+    os.replace(temporario, destino)
+    return centroides
+
+
+def carregar_indice_cep(pasta_dados=PASTA_DADOS, caminho=CAMINHO_CENTROIDES):
+    origem = os.path.join(pasta_dados, ARQUIVO_GEOLOCALIZACAO)
+    desatualizado = os.path.exists(origem) and (not os.path.exists(caminho) or os.path.getmtime(origem) > os.path.getmtime(caminho))
+    if desatualizado:
+        return IndiceCep(preparar_centroides(pasta_dados, caminho))
+    if os.path.exists(caminho):
+        return IndiceCep(pq.read_table(caminho).to_pandas())
+    return None
+
+
+def adicionar_distancias(tabelas, vendedores, indice_cep):
+    itens = tabelas['itens']
+    vendedores = vendedores.drop_duplicates('seller_id').set_index('seller_id')
+    itens['seller_state'] = itens['seller_id'].map(vendedores['seller_state'])
+    if indice_cep is None:
+        itens['distancia_km'] = np.float32(np.nan)
+        return tabelas
+    cep_cliente = tabelas['pedidos'].set_index('order_id')['customer_zip_code_prefix']
+    lat_vendedor, lng_vendedor = indice_cep.localizar(itens['seller_id'].map(vendedores['seller_zip_code_prefix']))
+    lat_cliente, lng_cliente = indice_cep.localizar(itens['order_id'].map(cep_cliente))
+    itens['distancia_km'] = haversine(lat_vendedor, lng_vendedor, lat_cliente, lng_cliente).astype('float32')
+    return tabelas
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Reduz o arquivo de geolocalização do Olist a um centroide por prefixo de CEP, usado no cálculo da distância entre vendedor e cliente.')
+    parser.add_argument('--dados', default=PASTA_DADOS, help='Pasta com o olist_geolocation_dataset.csv')
+    parser.add_argument('--saida', default=CAMINHO_CENTROIDES)
+    argumentos = parser.parse_args()
+    centroides = preparar_centroides(argumentos.dados, argumentos.saida)
+    print(f'{len(centroides)} prefixos de CEP gravados em {argumentos.saida} ({os.path.getsize(argumentos.saida) / 1024:.0f} KB)')
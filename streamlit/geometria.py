@@ -0,0 +1,156 @@
+import argparse
+import json
+import os
+import urllib.request
+import numpy as np
+from instrumentacao import LOGGER
+
+URL_GEOJSON = 'https://raw.githubusercontent.com/codeforamerica/click_that_hood/master/public/data/brazil-states.geojson'
+PASTA_GEOMETRIA = os.path.join('dados', 'geo')
+ARQUIVO_ORIGINAL = 'brazil-states.geojson'
+TOLERANCIAS = {'detalhada': 0.005, 'media': 0.02, 'leve': 0.08}
+NIVEL_PADRAO = 'media'
+CASAS_DECIMAIS = 4
+GEOMETRIA_REMOTA = os.environ.get('OLIST_GEOMETRIA_REMOTA', '1') != '0'
+
+
+def caminho_geometria(nivel=None, pasta=PASTA_GEOMETRIA):
+    if nivel is None:
+        return os.path.join(pasta, ARQUIVO_ORIGINAL)
+    return os.path.join(pasta, ARQUIVO_ORIGINAL.replace('.geojson', f'-{nivel}.geojson'))
+
+
+def distancia_segmento(pontos, inicio, fim):
+    direcao = fim - inicio
+    comprimento = direcao @ direcao
+    if comprimento == 0:
+        return np.hypot(*(pontos - inicio).T)
+    t = np.clip((pontos - inicio) @ direcao / comprimento, 0, 1)
+    return np.hypot(*(pontos - (inicio + t[:, None] * direcao)).T)
+
+
+def douglas_peucker(pontos, tolerancia):
+    manter = np.zeros(len(pontos), dtype=bool)
+    manter[[0, -1]] = True
+    pilha = [(0, len(pontos) - 1)]
+    while pilha:
+        i, j = pilha.pop()
+        if j <= i + 1:
+            continue
+        distancias = distancia_segmento(pontos[i + 1:j], pontos[i], pontos[j])
+        k = int(np.argmax(distancias))
+        if distancias[k] > tolerancia:
+            meio = i + 1 + k
+            manter[meio] = True
+            pilha.extend([(i, meio), (meio, j)])
+    return pontos[manter]
+
+
+def aneis(geometria):
+    if geometria['type'] == 'Polygon':
+        return [geometria['coordinates']]
+    return geometria['coordinates']
+
+
+def vertices_fixos(anel, donos):
+    chaves = [tuple(ponto) for ponto in anel]
+    conjuntos = [donos[chave] for chave in chaves]
+    fixos = [
+        k for k in range(len(anel))
+        if conjuntos[k] != conjuntos[k - 1] or conjuntos[k] != conjuntos[(k + 1) % len(anel)]
+    ]
+    if not fixos:
+        menor = min(range(len(anel)), key=lambda k: chaves[k])
+        oposto = int(np.argmax(np.hypot(*(anel - anel[menor]).T)))
+        fixos = sorted({menor, oposto})
+    return fixos
+
+
+def simplificar_anel(anel, donos, tolerancia, arcos):
+    anel = np.asarray(anel, dtype='float64')[:-1]
+    if len(anel) < 4:
+        return np.vstack([anel, anel[:1]])
+    fixos = vertices_fixos(anel, donos)
+    anel = np.roll(anel, -fixos[0], axis=0)
+    fixos = [k - fixos[0] for k in fixos] + [len(anel)]
+    anel = np.vstack([anel, anel[:1]])
+    partes = []
+    for inicio, fim in zip(fixos, fixos[1:]):
+        arco = anel[inicio:fim + 1]
+        chave, reversa = arco.tobytes(), arco[::-1].tobytes()
+        if reversa in arcos:
+            simplificado = arcos[reversa][::-1]
+        else:
+            simplificado = arcos.setdefault(chave, douglas_peucker(arco, tolerancia))
+        partes.append(simplificado[:-1])
+    resultado = np.vstack(partes + [partes[0][:1]])
+    return resultado if len(resultado) >= 4 else anel
+
+
+def simplificar_geojson(geojson, tolerancia):
+    donos = {}
+    for posicao, feicao in enumerate(geojson['features']):
+        for poligono in aneis(feicao['geometry']):
+            for anel in poligono:
+                for ponto in anel:
+                    donos.setdefault(tuple(ponto), set()).add(posicao)
+    arcos = {}
+    feicoes = []
+    for feicao in geojson['features']:
+        poligonos = [
+            [np.round(simplificar_anel(anel, donos, tolerancia, arcos), CASAS_DECIMAIS).tolist() for anel in poligono]
+            for poligono in aneis(feicao['geometry'])
+        ]
+        geometria = {'type': 'MultiPolygon', 'coordinates': poligonos}
+        if len(poligonos) == 1:
+            geometria = {'type': 'Polygon', 'coordinates': poligonos[0]}
+        propriedades = {chave: feicao['properties'][chave] for chave in ('sigla', 'name') if chave in feicao['properties']}
+        feicoes.append({'type': 'Feature', 'properties': propriedades, 'geometry': geometria})
+    return {'type': 'FeatureCollection', 'features': feicoes}
+
+
+def ler_geojson(origem):
+    if origem.startswith(('http://', 'https://')):
+        with urllib.request.urlopen(origem) as resposta:
+            return json.load(resposta)
+    with open(origem, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def gravar_geojson(geojson, caminho):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(geojson, arquivo, separators=(',', ':'), ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+def preparar_geometria(origem=URL_GEOJSON, pasta=PASTA_GEOMETRIA):
+    geojson = ler_geojson(origem)
+    gravar_geojson(geojson, caminho_geometria(pasta=pasta))
+    for nivel, tolerancia in TOLERANCIAS.items():
+        gravar_geojson(simplificar_geojson(geojson, tolerancia), caminho_geometria(nivel, pasta))
+    return {nivel: os.path.getsize(caminho_geometria(nivel, pasta)) for nivel in [None, *TOLERANCIAS]}
+
+
+def abrir_geometria(nivel=NIVEL_PADRAO, pasta=PASTA_GEOMETRIA, remota=GEOMETRIA_REMOTA):
+    simplificada = caminho_geometria(nivel, pasta)
+    if os.path.exists(simplificada):
+        return ler_geojson(simplificada)
+    original = caminho_geometria(pasta=pasta)
+    if os.path.exists(original):
+        return simplificar_geojson(ler_geojson(original), TOLERANCIAS[nivel])
+    if remota:
+        LOGGER.warning(json.dumps({'etapa': 'geometria', 'pasta': pasta, 'ausente': True, 'origem': URL_GEOJSON}, ensure_ascii=False))
+        return URL_GEOJSON
+    LOGGER.warning(json.dumps({'etapa': 'geometria', 'pasta': pasta, 'ausente': True, 'origem': None}, ensure_ascii=False))
+    return None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Copia e simplifica o GeoJSON dos estados brasileiros usado nos mapas.')
+    parser.add_argument('--origem', default=URL_GEOJSON, help='URL ou caminho do GeoJSON original')
+    parser.add_argument('--pasta', default=PASTA_GEOMETRIA)
+    argumentos = parser.parse_args()
+    for nivel, tamanho in preparar_geometria(argumentos.origem, argumentos.pasta).items():
+        print(f'{nivel or "original"}: {tamanho / 1024:.0f} KiB')
@@ -0,0 +1,167 @@
+import argparse
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from artefatos import PASTA_ARTEFATOS, TABELAS_MODELO, ler_cubos, ler_indice_comentarios, ler_modelo, publicar_modelo, versao_atual
+from carregamento_dados import TABELAS, carregar_tabela, ler_csv
+from comentarios import atualizar_indice_comentarios, construir_indice_comentarios
+from cubo import atualizar_cubo, construir_cubo
+from dados_preprocessamento import COLUNAS_CATEGORICAS, categorizar_produtos, compactar_modelo, decodificar_ids, montar_tabelas
+from geolocalizacao import adicionar_distancias, carregar_indice_cep
+from instrumentacao import LOGGER, configurar_log
+
+CHAVES_DELTA = {
+    'clientes': ['customer_id'],
+    'pedidos': ['order_id'],
+    'itens_pedidos': ['order_id', 'order_item_id'],
+    'pagamentos_pedidos': ['order_id', 'payment_sequential'],
+    'avaliacoes_pedidos': None,
+    'produtos': ['product_id'],
+    'vendedores': ['seller_id'],
+}
+TABELAS_PEDIDO = ('pedidos', 'itens_pedidos', 'pagamentos_pedidos', 'avaliacoes_pedidos')
+
+
+def ler_delta(pasta):
+    delta = {}
+    for nome in CHAVES_DELTA:
+        caminho = os.path.join(pasta, TABELAS[nome]['arquivo'])
+        if os.path.exists(caminho):
+            delta[nome] = ler_csv(caminho, TABELAS[nome]['colunas'])
+    return delta
+
+
+def aplicar_delta(base, delta, nome):
+    if nome not in delta:
+        return base
+    combinado = pd.concat([base, delta[nome]], ignore_index=True)
+    if CHAVES_DELTA[nome] is None:
+        return combinado
+    return combinado.drop_duplicates(CHAVES_DELTA[nome], keep='last')
+
+
+def codigos(chaves, coluna, valores):
+    encontrados = chaves[coluna].get_indexer(pd.Index(valores).dropna().unique())
+    return encontrados[encontrados >= 0]
+
+
+def pedidos_afetados(modelo, delta):
+    chaves = modelo['chaves']
+    ids = [delta[nome]['order_id'] for nome in TABELAS_PEDIDO if nome in delta]
+    novos = pd.Index(pd.concat(ids).dropna().unique()) if ids else pd.Index([])
+    afetados = [codigos(chaves, 'order_id', novos)]
+    if 'clientes' in delta:
+        clientes = codigos(chaves, 'customer_id', delta['clientes']['customer_id'])
+        afetados.append(modelo['pedidos'].loc[modelo['pedidos']['customer_id'].isin(clientes), 'order_id'].to_numpy())
+    if 'produtos' in delta:
+        produtos = codigos(chaves, 'product_id', delta['produtos']['product_id'])
+        afetados.append(modelo['itens'].loc[modelo['itens']['product_id'].isin(produtos), 'order_id'].to_numpy())
+    if 'vendedores' in delta:
+        vendedores = codigos(chaves, 'seller_id', delta['vendedores']['seller_id'])
+        afetados.append(modelo['itens'].loc[modelo['itens']['seller_id'].isin(vendedores), 'order_id'].to_numpy())
+    return np.unique(np.concatenate(afetados)).astype('int32'), novos
+
+
+def linhas_afetadas(modelo, afetados):
+    return {nome: np.isin(modelo[nome]['order_id'].to_numpy(), afetados) for nome in TABELAS_MODELO}
+
+
+def reconstruir_entrada(modelo, afetadas, delta):
+    chaves = modelo['chaves']
+    pedidos = decodificar_ids(modelo['pedidos'][afetadas['pedidos']], chaves)
+    itens = decodificar_ids(modelo['itens'][afetadas['itens']], chaves)
+    pagamentos = decodificar_ids(modelo['pagamentos'][afetadas['pagamentos']], chaves)
+
+    clientes_necessarios = pd.concat([pedidos['customer_id'], delta.get('pedidos', pd.DataFrame(columns=['customer_id']))['customer_id']])
+    com_cliente = modelo['pedidos']['customer_id'].isin(codigos(chaves, 'customer_id', clientes_necessarios))
+    clientes = decodificar_ids(modelo['pedidos'].loc[com_cliente, list(TABELAS['clientes']['colunas'])], chaves).drop_duplicates('customer_id')
+
+    avaliacoes = pedidos.loc[pedidos['review_score'].notna(), ['order_id', 'review_score', 'review_comment_message']]
+    avaliacoes = avaliacoes.assign(review_creation_date=pd.Timestamp.min, review_answer_timestamp=pd.Timestamp.min)
+
+    categorias_produtos = pd.concat([
+        categorizar_produtos(carregar_tabela('produtos'), carregar_tabela('traducao_categorias')),
+        itens[['product_id', 'product_category_name_english']].astype({'product_category_name_english': object}),
+        categorizar_produtos(delta['produtos'], carregar_tabela('traducao_categorias')) if 'produtos' in delta else None,
+    ]).drop_duplicates('product_id', keep='last')
+
+    return (
+        aplicar_delta(clientes.astype(object), delta, 'clientes'),
+        aplicar_delta(itens[list(TABELAS['itens_pedidos']['colunas'])], delta, 'itens_pedidos'),
+        aplicar_delta(pagamentos[list(TABELAS['pagamentos_pedidos']['colunas'])].astype({'payment_type': object}), delta, 'pagamentos_pedidos'),
+        aplicar_delta(avaliacoes, delta, 'avaliacoes_pedidos'),
+        aplicar_delta(pedidos[list(TABELAS['pedidos']['colunas'])], delta, 'pedidos'),
+        categorias_produtos,
+        aplicar_delta(carregar_tabela('vendedores'), delta, 'vendedores'),
+    )
+
+
+def categorias_modelo(modelo):
+    return {
+        coluna: modelo[nome][coluna].cat.categories
+        for nome in TABELAS_MODELO for coluna in COLUNAS_CATEGORICAS if coluna in modelo[nome]
+    }
+
+
+def mesclar(modelo, afetadas, parcial):
+    mesclado = {'chaves': parcial['chaves']}
+    meses, dias = set(), set()
+    for nome in TABELAS_MODELO:
+        removidas = modelo[nome][afetadas[nome]]
+        mantidas = modelo[nome][~afetadas[nome]].copy()
+        for coluna in parcial[nome].select_dtypes('category'):
+            mantidas[coluna] = mantidas[coluna].astype(parcial[nome][coluna].dtype)
+        datas = pd.concat([removidas['order_purchase_timestamp'], parcial[nome]['order_purchase_timestamp']]).dropna()
+        meses.update(datas.dt.strftime('%Y-%m'))
+        dias.update(datas.dt.floor('D'))
+        tabela = pd.concat([mantidas, parcial[nome]], ignore_index=True)
+        mesclado[nome] = tabela.sort_values('order_purchase_timestamp', kind='stable').reset_index(drop=True)
+    return mesclado, meses, dias
+
+
+def ingerir(pasta_delta, pasta=PASTA_ARTEFATOS, manter=3):
+    inicio = time.perf_counter()
+    base = versao_atual(pasta)
+    if base is None:
+        raise SystemExit(f'Nenhuma versão publicada em {pasta}; gere a carga completa com construir_dados.py antes de ingerir deltas.')
+    delta = ler_delta(pasta_delta)
+    if not delta:
+        raise SystemExit(f'Nenhum arquivo de delta encontrado em {pasta_delta}.')
+    modelo = ler_modelo(base, pasta)
+    afetados, novos = pedidos_afetados(modelo, delta)
+    afetadas = linhas_afetadas(modelo, afetados)
+    *entrada, vendedores = reconstruir_entrada(modelo, afetadas, delta)
+    parcial = compactar_modelo(
+        adicionar_distancias(montar_tabelas(*entrada), vendedores, carregar_indice_cep()),
+        chaves=modelo['chaves'],
+        categorias=categorias_modelo(modelo),
+    )
+    mesclado, meses, dias = mesclar(modelo, afetadas, parcial)
+    cubos = ler_cubos(base, pasta)
+    cubos = construir_cubo(mesclado) if cubos is None else atualizar_cubo(cubos, mesclado, dias)
+    comentarios = ler_indice_comentarios(base, pasta)
+    comentarios = construir_indice_comentarios(mesclado['pedidos']) if comentarios is None else atualizar_indice_comentarios(comentarios, parcial['pedidos'], afetados)
+    versao = publicar_modelo(mesclado, pasta=pasta, manter=manter, cubos=cubos, base=base, meses=meses, comentarios=comentarios)
+    LOGGER.info(json.dumps({
+        'etapa': 'ingestao',
+        'versao': versao,
+        'base': base,
+        'pasta': pasta,
+        'pedidos_atualizados': len(afetados),
+        'pedidos_novos': len(novos) - len(codigos(modelo['chaves'], 'order_id', novos)),
+        'meses_reescritos': len(meses),
+        'duracao_s': round(time.perf_counter() - inicio, 1),
+    }, ensure_ascii=False))
+    return versao
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Aplica arquivos de delta (pedidos, itens, pagamentos, avaliações, clientes, produtos e vendedores) sobre a versão atual do artefato sem reprocessar a base inteira.')
+    parser.add_argument('delta', help='Pasta com os CSVs de delta, nomeados como os arquivos originais do Olist')
+    parser.add_argument('--saida', default=PASTA_ARTEFATOS, help='Pasta onde as versões do artefato são publicadas')
+    parser.add_argument('--manter', type=int, default=3, help='Quantidade de versões antigas mantidas em disco')
+    argumentos = parser.parse_args()
+    configurar_log()
+    ingerir(argumentos.delta, pasta=argumentos.saida, manter=argumentos.manter)
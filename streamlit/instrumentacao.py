@@ -0,0 +1,77 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+LOGGER = logging.getLogger('olist.desempenho')
+TAMANHO_PAGINA = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+_local = threading.local()
+
+
+def memoria_residente():
+    try:
+        with open('/proc/self/statm') as arquivo:
+            return int(arquivo.read().split()[1]) * TAMANHO_PAGINA
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def configurar_log(nivel=logging.INFO):
+    if not LOGGER.handlers:
+        manipulador = logging.StreamHandler()
+        manipulador.setFormatter(logging.Formatter('%(message)s'))
+        LOGGER.addHandler(manipulador)
+        LOGGER.setLevel(nivel)
+        LOGGER.propagate = False
+
+
+class Medicoes:
+    def __init__(self, detalhado=False):
+        self.execucao = uuid.uuid4().hex[:8]
+        self.detalhado = detalhado
+        self.registros = []
+        self.nivel = 0
+        self.inicio = time.perf_counter()
+
+    @contextmanager
+    def etapa(self, nome, **atributos):
+        registro = {'execucao': self.execucao, 'etapa': nome, 'nivel': self.nivel, **atributos}
+        memoria = memoria_residente()
+        inicio = time.perf_counter()
+        registro['inicio_ms'] = round((inicio - self.inicio) * 1000, 2)
+        self.nivel += 1
+        try:
+            yield registro
+        finally:
+            self.nivel -= 1
+            registro['duracao_ms'] = round((time.perf_counter() - inicio) * 1000, 2)
+            depois = memoria_residente()
+            if memoria is not None and depois is not None:
+                registro['memoria_delta_mb'] = round((depois - memoria) / 2 ** 20, 2)
+            self.registros.append(registro)
+            LOGGER.info(json.dumps(registro, default=str, ensure_ascii=False))
+
+    def total_ms(self):
+        return sum(registro['duracao_ms'] for registro in self.registros if registro['nivel'] == 0)
+
+
+def iniciar(detalhado=False):
+    _local.medicoes = Medicoes(detalhado)
+    return _local.medicoes
+
+
+def atuais():
+    return getattr(_local, 'medicoes', None)
+
+
+@contextmanager
+def etapa(nome, **atributos):
+    medicoes = atuais()
+    if medicoes is None:
+        yield dict(atributos)
+        return
+    with medicoes.etapa(nome, **atributos) as registro:
+        yield registro
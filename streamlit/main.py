@@ -2,8 +2,17 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from datetime import timedelta
-from carregamento_dados import carregar_dados
-from dados_preprocessamento import preprocessar_dados
+from agregacoes import DETALHES, LIMITE_PONTOS, Recorte
+from artefatos import versao_atual
+from carregamento_dados import assinatura_dados, tempos_carga
+from contagem_distinta import ERRO_PADRAO
+from dados_preprocessamento import COLUNAS_ID, decodificar_ids
+from figuras import construir_figura
+from filtros import PERIODOS, criar_filtro, intervalo_periodo
+from instrumentacao import configurar_log, etapa, iniciar
+from motor_duckdb import duckdb_disponivel
+from quantis import MEDIDAS_QUANTIS
+from recursos import carregar_cache_agregacoes, carregar_cache_figuras, carregar_cubo, carregar_dados, carregar_geometria, carregar_indice, carregar_indice_comentarios, carregar_modelo, carregar_motor_duckdb, iniciar_aquecimento, preprocessar_dados
 
 st.set_page_config(
     page_title='Dashboard de Vendas - Olist',
@@ -11,8 +20,31 @@ st.set_page_config(
     layout='wide'
 )
 
-clientes, itens_pedidos, pagamentos_pedidos, avaliacoes_pedidos, pedidos, produtos, traducao_categorias = carregar_dados()
-dados = preprocessar_dados(clientes, itens_pedidos, pagamentos_pedidos, avaliacoes_pedidos, pedidos, produtos, traducao_categorias)
+configurar_log()
+medicoes = iniciar(detalhado=st.session_state.get('painel_desempenho', False))
+
+with etapa('carga') as registro:
+    versao_dados = versao_atual()
+    if versao_dados:
+        modelo = carregar_modelo(versao_dados)
+    else:
+        clientes, itens_pedidos, pagamentos_pedidos, avaliacoes_pedidos, pedidos, produtos, traducao_categorias, vendedores = carregar_dados()
+        with etapa('preprocessamento'):
+            modelo = preprocessar_dados(clientes, itens_pedidos, pagamentos_pedidos, avaliacoes_pedidos, pedidos, produtos, traducao_categorias, vendedores)
+        versao_dados = assinatura_dados()
+    registro['versao'] = versao_dados
+    registro['linhas'] = len(modelo['itens'])
+with etapa('indice'):
+    indice = carregar_indice(versao_dados, modelo)
+with etapa('cubo'):
+    cubo = carregar_cubo(versao_dados, modelo)
+with etapa('comentarios'):
+    comentarios = carregar_indice_comentarios(versao_dados, modelo)
+aquecimento = iniciar_aquecimento(versao_dados, modelo, indice, cubo, comentarios)
+itens = modelo['itens']
+pedidos = modelo['pedidos']
+pagamentos = modelo['pagamentos']
+chaves = modelo['chaves']
 
 st.markdown("""
     <style>
@@ -69,31 +101,16 @@ st.markdown("<div class='header'>Dashboard de Vendas - Olist</div>", unsafe_allo
 
 st.sidebar.title('Filtros')
 
-min_date = dados['order_purchase_timestamp'].min().date()
-max_date = dados['order_purchase_timestamp'].max().date()
+min_date = pedidos['order_purchase_timestamp'].min().date()
+max_date = pedidos['order_purchase_timestamp'].max().date()
 
 date_filter_option = st.sidebar.selectbox(
     'Período de Compra',
-    options=['Todos', 'Última semana', 'Último mês', 'Último trimestre', 'Último ano', 'Personalizado']
+    options=[*PERIODOS, 'Personalizado']
 )
 
-today = dados['order_purchase_timestamp'].max().date()
-
-if date_filter_option == 'Todos':
-    start_date = min_date
-    end_date = max_date
-elif date_filter_option == 'Última semana':
-    start_date = today - timedelta(days=7)
-    end_date = today
-elif date_filter_option == 'Último mês':
-    start_date = today - timedelta(days=30)
-    end_date = today
-elif date_filter_option == 'Último trimestre':
-    start_date = today - timedelta(days=90)
-    end_date = today
-elif date_filter_option == 'Último ano':
-    start_date = today - timedelta(days=365)
-    end_date = today
+if date_filter_option in PERIODOS:
+    start_date, end_date = intervalo_periodo(date_filter_option, min_date, max_date)
 elif date_filter_option == 'Personalizado':
     default_start_date = max_date - timedelta(days=365)
     if default_start_date < min_date:
@@ -103,16 +120,16 @@ elif date_filter_option == 'Personalizado':
     if start_date > end_date:
         st.sidebar.error('Data de início deve ser antes da data de fim.')
 
-estados = dados['customer_state'].dropna().unique()
+estados = pedidos['customer_state'].dropna().unique()
 estados_selecionados = st.sidebar.multiselect('Estado', sorted(estados))
 
-categorias = dados['product_category_name_english'].dropna().unique()
+categorias = itens['product_category_name_english'].dropna().unique()
 categorias_selecionadas = st.sidebar.multiselect('Categoria do Produto', sorted(categorias))
 
 nota_minima = st.sidebar.slider('Nota Mínima de Avaliação', 1, 5, 1)
 
-preco_min = float(dados['price'].min())
-preco_max = float(dados['price'].max())
+preco_min = float(itens['price'].min())
+preco_max = float(itens['price'].max())
 preco_intervalo = st.sidebar.slider(
     'Faixa de Preço',
     min_value=preco_min,
@@ -120,519 +137,729 @@ preco_intervalo = st.sidebar.slider(
     value=(preco_min, preco_max)
 )
 
-dados_filtrados = dados[
-    (dados['order_purchase_timestamp'].dt.date >= start_date) &
-    (dados['order_purchase_timestamp'].dt.date <= end_date) &
-    (dados['review_score'] >= nota_minima) &
-    (dados['price'] >= preco_intervalo[0]) &
-    (dados['price'] <= preco_intervalo[1])
-]
+abas_sob_demanda = st.sidebar.toggle('Calcular apenas a aba selecionada', value=True)
+contagem_exata = st.sidebar.toggle(
+    'Contagem exata de clientes',
+    value=False,
+    help=f'Desligado, os clientes únicos são estimados com HyperLogLog (erro padrão de {ERRO_PADRAO:.1%}).'
+)
+motor_consultas = st.sidebar.selectbox(
+    'Motor de consultas',
+    ['pandas', 'DuckDB'] if duckdb_disponivel() else ['pandas'],
+    help='DuckDB consulta o artefato Parquet diretamente, com execução em várias threads; pandas é a implementação de referência.'
+)
+limite_pontos = st.sidebar.number_input(
+    'Limite de pontos nos gráficos de dispersão',
+    min_value=1000,
+    value=LIMITE_PONTOS,
+    step=1000,
+    help='Acima deste número de linhas os gráficos de dispersão passam a usar amostragem por categoria ou agrupamento em caixas.'
+)
 
-if estados_selecionados:
-    dados_filtrados = dados_filtrados[dados_filtrados['customer_state'].isin(estados_selecionados)]
+filtro = criar_filtro(start_date, end_date, estados_selecionados, categorias_selecionadas, nota_minima, preco_intervalo)
+cache_agregacoes = carregar_cache_agregacoes()
+cache_figuras = carregar_cache_figuras()
+motor = carregar_motor_duckdb(versao_dados, modelo) if motor_consultas == 'DuckDB' else indice
+recorte = Recorte(motor, versao_dados, filtro, cache_agregacoes, cubo, contagem_exata, comentarios)
+indicadores = recorte.consultar('indicadores')
 
-if categorias_selecionadas:
-    dados_filtrados = dados_filtrados[dados_filtrados['product_category_name_english'].isin(categorias_selecionadas)]
 
-if dados_filtrados.empty:
-    st.warning('Nenhum dado disponível para os filtros selecionados. Por favor, ajuste os filtros.')
-else:
-    with st.container():
-        st.markdown("<h2 style='text-align:center; color:#333; font-family:Montserrat;'>Principais Indicadores</h2>", unsafe_allow_html=True)
-        col1, col2, col3, col4 = st.columns(4)
-        total_vendas = dados_filtrados['price'].sum()
-        qtd_pedidos = dados_filtrados['order_id'].nunique()
-        clientes_unicos = dados_filtrados['customer_unique_id'].nunique()
-        nota_media = dados_filtrados['review_score'].mean()
-        with col1:
-            st.markdown(f"<div class='card'><div class='metric'>Total de Vendas</div><div class='big-number'>R$ {total_vendas:,.2f}</div></div>", unsafe_allow_html=True)
-        with col2:
-            st.markdown(f"<div class='card'><div class='metric'>Pedidos</div><div class='big-number'>{qtd_pedidos}</div></div>", unsafe_allow_html=True)
-        with col3:
-            st.markdown(f"<div class='card'><div class='metric'>Clientes Únicos</div><div class='big-number'>{clientes_unicos}</div></div>", unsafe_allow_html=True)
-        with col4:
-            st.markdown(f"<div class='card'><div class='metric'>Nota Média</div><div class='big-number'>{nota_media:.2f}</div></div>", unsafe_allow_html=True)
-    
-    st.markdown("---")
-    
-    tabs = st.tabs(['Vendas Mensais', 'Vendas por Estado', 'Vendas por Categoria', 'Análise Logística', 'Análise de Clientes', 'Produtos', 'Análise de Pagamentos', 'Avaliações'])
-    
-    with tabs[0]:
-        st.markdown("<h3 style='text-align:center; color:#333; font-family:Montserrat;'>Vendas Mensais</h3>", unsafe_allow_html=True)
-        time_freq = st.selectbox('Selecione a Frequência de Tempo', options=['M', 'Q', 'A'], format_func=lambda x: {'M':'Mensal', 'Q':'Trimestral', 'A':'Anual'}[x])
-        vendas_tempo = dados_filtrados.set_index('order_purchase_timestamp').resample(time_freq).agg({'price':'sum', 'order_id':'nunique', 'payment_value':'mean'}).reset_index()
-        vendas_tempo.rename(columns={'order_id':'Quantidade de Pedidos', 'payment_value':'Ticket Médio'}, inplace=True)
-    
-        metricas_selecionadas = st.multiselect(
-            'Selecione as Métricas para Exibir',
-            options=['Vendas', 'Quantidade de Pedidos', 'Ticket Médio'],
-            default=['Vendas']
-        )
-    
-        if 'Vendas' in metricas_selecionadas:
-            fig_vendas = px.line(
-                vendas_tempo,
-                x='order_purchase_timestamp',
-                y='price',
-                labels={'order_purchase_timestamp': 'Data', 'price': 'Vendas (R$)'},
-                template='seaborn',
-                height=600,
-                color_discrete_sequence=['#2980b9']
-            )
-            fig_vendas.update_traces(line_width=3)
-            fig_vendas.update_layout(title='Vendas ao Longo do Tempo', title_x=0.5, xaxis_title='Data', yaxis_title='Vendas (R$)', font=dict(family='Montserrat', size=16))
-            st.plotly_chart(fig_vendas, use_container_width=True, key='fig_vendas')
-    
-        if 'Quantidade de Pedidos' in metricas_selecionadas:
-            fig_pedidos = px.bar(
-                vendas_tempo,
-                x='order_purchase_timestamp',
-                y='Quantidade de Pedidos',
-                labels={'order_purchase_timestamp': 'Data', 'Quantidade de Pedidos': 'Pedidos'},
-                color='Quantidade de Pedidos',
-                color_continuous_scale='Blues',
-                template='seaborn',
-                height=600
-            )
-            fig_pedidos.update_layout(title='Quantidade de Pedidos ao Longo do Tempo', title_x=0.5, xaxis_title='Data', yaxis_title='Quantidade de Pedidos', font=dict(family='Montserrat', size=16))
-            st.plotly_chart(fig_pedidos, use_container_width=True, key='fig_pedidos')
-    
-        if 'Ticket Médio' in metricas_selecionadas:
-            fig_ticket = px.line(
-                vendas_tempo,
-                x='order_purchase_timestamp',
-                y='Ticket Médio',
-                labels={'order_purchase_timestamp': 'Data', 'Ticket Médio': 'Ticket Médio (R$)'},
-                template='seaborn',
-                height=600,
-                color_discrete_sequence=['#2980b9']
-            )
-            fig_ticket.update_traces(line_width=3)
-            fig_ticket.update_layout(title='Ticket Médio ao Longo do Tempo', title_x=0.5, xaxis_title='Data', yaxis_title='Ticket Médio (R$)', font=dict(family='Montserrat', size=16))
-            st.plotly_chart(fig_ticket, use_container_width=True, key='fig_ticket')
-    
-        vendas_tempo['Vendas Cumulativas'] = vendas_tempo['price'].cumsum()
-        fig_cumulative = px.area(
+def exibir_grafico(chave, construtor, dados, layout, tracos=None, geos=None, **parametros):
+    with etapa(f'grafico:{chave}') as registro:
+        figura, registro['bytes'], registro['acerto_cache'] = construir_figura(cache_figuras, construtor, dados, layout, tracos, geos, **parametros)
+        st.plotly_chart(figura, use_container_width=True, key=chave)
+
+
+def exibir_mapa(chave, dados, layout, **parametros):
+    geometria = carregar_geometria()
+    if geometria is None:
+        st.info('Mapa indisponível: gere a geometria dos estados com geometria.py ou remova OLIST_GEOMETRIA_REMOTA=0 para usar o GeoJSON remoto.')
+        return
+    exibir_grafico(chave, px.choropleth, dados, layout, geos=dict(fitbounds="locations", visible=False), geojson=geometria, **parametros)
+
+
+def grafico_vendas_categoria(recorte, chave):
+    exibir_grafico(
+        chave,
+        px.bar,
+        recorte.consultar('vendas_categoria'),
+        layout=dict(title='Vendas por Categoria', title_x=0.5, xaxis_title='Vendas (R$)', yaxis_title='Categoria', font=dict(family='Montserrat', size=16)),
+        x='price',
+        y='product_category_name_english',
+        orientation='h',
+        labels={'product_category_name_english': 'Categoria', 'price': 'Vendas (R$)'},
+        color='price',
+        color_continuous_scale='Blues',
+        template='seaborn',
+        height=600
+    )
+
+
+def legenda_dispersao(total, exibidos, descricao):
+    if exibidos < total:
+        st.caption(f'{total:,} pontos no filtro; exibindo {descricao} com {exibidos:,} pontos.')
+    else:
+        st.caption(f'{total:,} pontos no filtro.')
+
+
+def tabela_paginada(recorte, chaves, nome):
+    especificacao = DETALHES[nome]
+    colunas_ordenaveis = [coluna for coluna in especificacao['colunas'] if coluna not in COLUNAS_ID]
+    coluna_busca, coluna_ordem, coluna_sentido, coluna_tamanho = st.columns([3, 2, 1, 1])
+    busca = ''
+    if 'texto' in especificacao:
+        busca = coluna_busca.text_input(
+            'Buscar nos comentários',
+            key=f'{nome}_busca',
+            help='Retorna os comentários com todas as palavras; use aspas para buscar uma frase exata. Acentos e maiúsculas são ignorados.'
+        ).strip()
+    ordenar_por = coluna_ordem.selectbox('Ordenar por', [None] + colunas_ordenaveis, format_func=lambda x: 'Ordem original' if x is None else x, key=f'{nome}_ordem')
+    crescente = coluna_sentido.radio('Sentido', [True, False], format_func=lambda x: 'Crescente' if x else 'Decrescente', key=f'{nome}_sentido')
+    tamanho = coluna_tamanho.selectbox('Linhas por página', [25, 50, 100, 250], key=f'{nome}_tamanho')
+
+    linhas = recorte.linhas_detalhes(nome, ordenar_por, crescente, busca)
+    paginas = max(1, -(-len(linhas) // tamanho))
+    pagina = st.number_input('Página', min_value=1, max_value=paginas, value=1, key=f'{nome}_pagina')
+    tabela = getattr(recorte, especificacao['tabela'])
+    pagina_linhas = linhas[(pagina - 1) * tamanho:pagina * tamanho]
+    st.dataframe(decodificar_ids(tabela[especificacao['colunas']].take(pagina_linhas).reset_index(drop=True), chaves), height=400)
+    st.caption(f'{len(linhas):,} linhas; página {pagina} de {paginas}.')
+
+
+def aba_vendas_mensais(recorte, chaves):
+    st.markdown("<h3 style='text-align:center; color:#333; font-family:Montserrat;'>Vendas Mensais</h3>", unsafe_allow_html=True)
+    time_freq = st.selectbox('Selecione a Frequência de Tempo', options=['M', 'Q', 'A'], format_func=lambda x: {'M':'Mensal', 'Q':'Trimestral', 'A':'Anual'}[x])
+    vendas_tempo = recorte.consultar('vendas_tempo', time_freq)
+
+    metricas_selecionadas = st.multiselect(
+        'Selecione as Métricas para Exibir',
+        options=['Vendas', 'Quantidade de Pedidos', 'Ticket Médio'],
+        default=['Vendas']
+    )
+
+    if 'Vendas' in metricas_selecionadas:
+        exibir_grafico(
+            'fig_vendas',
+            px.line,
             vendas_tempo,
+            layout=dict(title='Vendas ao Longo do Tempo', title_x=0.5, xaxis_title='Data', yaxis_title='Vendas (R$)', font=dict(family='Montserrat', size=16)),
+            tracos=dict(line_width=3),
             x='order_purchase_timestamp',
-            y='Vendas Cumulativas',
-            labels={'order_purchase_timestamp': 'Data', 'Vendas Cumulativas': 'Vendas Cumulativas (R$)'},
+            y='price',
+            labels={'order_purchase_timestamp': 'Data', 'price': 'Vendas (R$)'},
             template='seaborn',
             height=600,
             color_discrete_sequence=['#2980b9']
         )
-        fig_cumulative.update_layout(title='Vendas Cumulativas ao Longo do Tempo', title_x=0.5, xaxis_title='Data', yaxis_title='Vendas Cumulativas (R$)', font=dict(family='Montserrat', size=16))
-        st.plotly_chart(fig_cumulative, use_container_width=True, key='fig_cumulative')
-    
-    with tabs[1]:
-        st.markdown("<h3 style='text-align:center; color:#333; font-family:Montserrat;'>Vendas por Estado</h3>", unsafe_allow_html=True)
-        estados_disponiveis = dados_filtrados['customer_state'].unique()
-        estados_selecionados_vendas = st.multiselect('Selecione os Estados para Visualizar', options=sorted(estados_disponiveis))
-        vendas_estado = dados_filtrados.groupby('customer_state')['price'].sum().reset_index()
-        vendas_estado = vendas_estado.sort_values('price', ascending=True)
-        if estados_selecionados_vendas:
-            vendas_estado_filtrado = vendas_estado[vendas_estado['customer_state'].isin(estados_selecionados_vendas)]
-        else:
-            vendas_estado_filtrado = vendas_estado
-        fig_estado = px.bar(
-            vendas_estado_filtrado,
-            x='price',
-            y='customer_state',
-            orientation='h',
-            labels={'customer_state': 'Estado', 'price': 'Vendas (R$)'},
-            color='price',
-            color_continuous_scale='Blues',
-            template='seaborn',
-            height=600
-        )
-        fig_estado.update_layout(title='Vendas por Estado', title_x=0.5, xaxis_title='Vendas (R$)', yaxis_title='Estado', font=dict(family='Montserrat', size=16))
-        st.plotly_chart(fig_estado, use_container_width=True, key='fig_estado')
-    
-        st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Mapa Interativo de Vendas por Estado</h4>", unsafe_allow_html=True)
-        vendas_estado_mapa = vendas_estado_filtrado.copy()
-        vendas_estado_mapa['Estado'] = vendas_estado_mapa['customer_state']
-        vendas_estado_mapa['Vendas'] = vendas_estado_mapa['price']
-        fig_mapa = px.choropleth(
-            vendas_estado_mapa,
-            geojson='https://raw.githubusercontent.com/codeforamerica/click_that_hood/master/public/data/brazil-states.geojson',
-            locations='Estado',
-            featureidkey='properties.sigla',
-            color='Vendas',
-            color_continuous_scale='Blues',
-            scope='south america',
-            labels={'Vendas': 'Vendas (R$)'},
-            template='seaborn',
-            height=600
-        )
-        fig_mapa.update_geos(fitbounds="locations", visible=False)
-        fig_mapa.update_layout(title='Mapa de Vendas por Estado', title_x=0.5, font=dict(family='Montserrat', size=16))
-        st.plotly_chart(fig_mapa, use_container_width=True, key='fig_mapa')
-    
-        st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Vendas por Estado e Categoria</h4>", unsafe_allow_html=True)
-        vendas_estado_categoria = dados_filtrados.groupby(['customer_state', 'product_category_name_english'])['price'].sum().reset_index()
-        if estados_selecionados_vendas:
-            vendas_estado_categoria = vendas_estado_categoria[vendas_estado_categoria['customer_state'].isin(estados_selecionados_vendas)]
-        fig_sunburst = px.sunburst(
-            vendas_estado_categoria,
-            path=['customer_state', 'product_category_name_english'],
-            values='price',
-            color='price',
-            color_continuous_scale='Blues',
-            labels={'customer_state': 'Estado', 'product_category_name_english': 'Categoria', 'price': 'Vendas (R$)'},
-            height=600
-        )
-        fig_sunburst.update_layout(title='Vendas por Estado e Categoria', title_x=0.5, font=dict(family='Montserrat', size=16))
-        st.plotly_chart(fig_sunburst, use_container_width=True, key='fig_sunburst')
-    
-    with tabs[2]:
-        st.markdown("<h3 style='text-align:center; color:#333; font-family:Montserrat;'>Vendas por Categoria</h3>", unsafe_allow_html=True)
-        vendas_categoria = dados_filtrados.groupby('product_category_name_english')['price'].sum().reset_index()
-        vendas_categoria = vendas_categoria.sort_values('price', ascending=True)
-        fig_categoria = px.bar(
-            vendas_categoria,
-            x='price',
-            y='product_category_name_english',
-            orientation='h',
-            labels={'product_category_name_english': 'Categoria', 'price': 'Vendas (R$)'},
-            color='price',
-            color_continuous_scale='Blues',
-            template='seaborn',
-            height=600
-        )
-        fig_categoria.update_layout(title='Vendas por Categoria', title_x=0.5, xaxis_title='Vendas (R$)', yaxis_title='Categoria', font=dict(family='Montserrat', size=16))
-        st.plotly_chart(fig_categoria, use_container_width=True, key='fig_categoria')
-    
-        fig_disp = px.scatter(
-            dados_filtrados,
-            x='price',
-            y='freight_value',
-            color='product_category_name_english',
-            hover_data=['product_id'],
-            labels={'price': 'Preço (R$)', 'freight_value': 'Valor do Frete (R$)', 'product_category_name_english': 'Categoria'},
-            template='seaborn',
-            height=600
-        )
-        fig_disp.update_layout(title='Preço vs. Frete por Categoria', title_x=0.5, font=dict(family='Montserrat', size=16))
-        st.plotly_chart(fig_disp, use_container_width=True, key='fig_disp')
-    
-    with tabs[3]:
-        st.markdown("<h3 style='text-align:center; color:#333; font-family:Montserrat;'>Análise Logística</h3>", unsafe_allow_html=True)
-        col1, col2, col3 = st.columns(3)
-        media_atraso = dados_filtrados['delivery_delay'].mean()
-        tempo_entrega_media = dados_filtrados['Tempo de Entrega'].mean()
-        percentual_atraso = (dados_filtrados['atraso_entrega'].value_counts(normalize=True).get('Sim', 0) * 100)
-        with col1:
-            st.markdown(f"<div class='card'><div class='metric'>Atraso Médio (dias)</div><div class='big-number'>{media_atraso:.2f}</div></div>", unsafe_allow_html=True)
-        with col2:
-            st.markdown(f"<div class='card'><div class='metric'>Tempo Médio de Entrega (dias)</div><div class='big-number'>{tempo_entrega_media:.2f}</div></div>", unsafe_allow_html=True)
-        with col3:
-            st.markdown(f"<div class='card'><div class='metric'>Pedidos com Atraso (%)</div><div class='big-number'>{percentual_atraso:.2f}%</div></div>", unsafe_allow_html=True)
-    
-        st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Atraso de Entrega por Estado</h4>", unsafe_allow_html=True)
-        atraso_estado = dados_filtrados.groupby('customer_state')['atraso_entrega'].apply(lambda x: (x == 'Sim').mean() * 100).reset_index(name='Percentual de Atraso')
-        atraso_estado = atraso_estado.sort_values('Percentual de Atraso', ascending=True)
-        fig_atraso_estado = px.bar(
-            atraso_estado,
-            x='Percentual de Atraso',
-            y='customer_state',
-            orientation='h',
-            labels={'customer_state': 'Estado', 'Percentual de Atraso': 'Percentual de Atraso (%)'},
-            color='Percentual de Atraso',
-            color_continuous_scale='Blues',
-            template='seaborn',
-            height=600
-        )
-        fig_atraso_estado.update_layout(title='Percentual de Pedidos com Atraso por Estado', title_x=0.5, xaxis_title='Percentual de Atraso (%)', yaxis_title='Estado', font=dict(family='Montserrat', size=16))
-        st.plotly_chart(fig_atraso_estado, use_container_width=True, key='fig_atraso_estado')
-    
-        st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Tempo Médio de Entrega por Estado</h4>", unsafe_allow_html=True)
-        entrega_estado = dados_filtrados.groupby('customer_state')['Tempo de Entrega'].mean().reset_index()
-        entrega_estado = entrega_estado.sort_values('Tempo de Entrega', ascending=True)
-        fig_entrega_estado = px.bar(
-            entrega_estado,
-            x='Tempo de Entrega',
-            y='customer_state',
-            orientation='h',
-            labels={'customer_state': 'Estado', 'Tempo de Entrega': 'Tempo Médio de Entrega (dias)'},
-            color='Tempo de Entrega',
-            color_continuous_scale='Blues',
-            template='seaborn',
-            height=600
-        )
-        fig_entrega_estado.update_layout(title='Tempo Médio de Entrega por Estado', title_x=0.5, xaxis_title='Tempo Médio de Entrega (dias)', yaxis_title='Estado', font=dict(family='Montserrat', size=16))
-        st.plotly_chart(fig_entrega_estado, use_container_width=True, key='fig_entrega_estado')
-    
-        st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Evolução do Tempo Médio de Entrega</h4>", unsafe_allow_html=True)
-        entrega_tempo = dados_filtrados.set_index('order_purchase_timestamp').resample('M')['Tempo de Entrega'].mean().reset_index()
-        fig_entrega_tempo = px.line(
-            entrega_tempo,
+
+    if 'Quantidade de Pedidos' in metricas_selecionadas:
+        exibir_grafico(
+            'fig_pedidos',
+            px.bar,
+            vendas_tempo,
+            layout=dict(title='Quantidade de Pedidos ao Longo do Tempo', title_x=0.5, xaxis_title='Data', yaxis_title='Quantidade de Pedidos', font=dict(family='Montserrat', size=16)),
             x='order_purchase_timestamp',
-            y='Tempo de Entrega',
-            labels={'order_purchase_timestamp': 'Data', 'Tempo de Entrega': 'Tempo Médio de Entrega (dias)'},
-            template='seaborn',
-            height=600
-        )
-        fig_entrega_tempo.update_layout(title='Evolução do Tempo Médio de Entrega', title_x=0.5, xaxis_title='Data', yaxis_title='Tempo Médio de Entrega (dias)', font=dict(family='Montserrat', size=16))
-        st.plotly_chart(fig_entrega_tempo, use_container_width=True, key='fig_entrega_tempo')
-    
-        st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Relação entre Tempo de Entrega e Avaliação</h4>", unsafe_allow_html=True)
-        fig_tempo_avaliacao = px.scatter(
-            dados_filtrados,
-            x='Tempo de Entrega',
-            y='review_score',
-            labels={'Tempo de Entrega': 'Tempo de Entrega (dias)', 'review_score': 'Avaliação'},
-            template='seaborn',
-            height=600
-        )
-        fig_tempo_avaliacao.update_layout(title='Relação entre Tempo de Entrega e Avaliação', title_x=0.5, xaxis_title='Tempo de Entrega (dias)', yaxis_title='Avaliação', font=dict(family='Montserrat', size=16))
-        st.plotly_chart(fig_tempo_avaliacao, use_container_width=True, key='fig_tempo_avaliacao')
-    
-        st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Mapa de Tempo Médio de Entrega por Estado</h4>", unsafe_allow_html=True)
-        entrega_estado_mapa = entrega_estado.copy()
-        entrega_estado_mapa['Estado'] = entrega_estado_mapa['customer_state']
-        entrega_estado_mapa['Tempo Médio de Entrega'] = entrega_estado_mapa['Tempo de Entrega']
-        fig_mapa_entrega = px.choropleth(
-            entrega_estado_mapa,
-            geojson='https://raw.githubusercontent.com/codeforamerica/click_that_hood/master/public/data/brazil-states.geojson',
-            locations='Estado',
-            featureidkey='properties.sigla',
-            color='Tempo Médio de Entrega',
+            y='Quantidade de Pedidos',
+            labels={'order_purchase_timestamp': 'Data', 'Quantidade de Pedidos': 'Pedidos'},
+            color='Quantidade de Pedidos',
             color_continuous_scale='Blues',
-            scope='south america',
-            labels={'Tempo Médio de Entrega': 'Tempo Médio de Entrega (dias)'},
             template='seaborn',
             height=600
         )
-        fig_mapa_entrega.update_geos(fitbounds="locations", visible=False)
-        fig_mapa_entrega.update_layout(title='Mapa de Tempo Médio de Entrega por Estado', title_x=0.5, font=dict(family='Montserrat', size=16))
-        st.plotly_chart(fig_mapa_entrega, use_container_width=True, key='fig_mapa_entrega')
-    
-    with tabs[4]:
-        st.markdown("<h3 style='text-align:center; color:#333; font-family:Montserrat;'>Análise de Clientes</h3>", unsafe_allow_html=True)
-        clientes_estado = dados_filtrados.groupby('customer_state')['customer_unique_id'].nunique().reset_index()
-        clientes_estado = clientes_estado.sort_values('customer_unique_id', ascending=False).head(10)
-        fig_clientes_estado = px.bar(
-            clientes_estado,
-            x='customer_unique_id',
-            y='customer_state',
-            orientation='h',
-            labels={'customer_state': 'Estado', 'customer_unique_id': 'Número de Clientes'},
-            color='customer_unique_id',
-            color_continuous_scale='Blues',
-            template='seaborn',
-            height=600
-        )
-        fig_clientes_estado.update_layout(title='Top 10 Estados por Número de Clientes', title_x=0.5, xaxis_title='Número de Clientes', yaxis_title='Estado', font=dict(family='Montserrat', size=16))
-        st.plotly_chart(fig_clientes_estado, use_container_width=True, key='fig_clientes_estado')
-    
-        st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Ticket Médio por Estado</h4>", unsafe_allow_html=True)
-        ticket_estado = dados_filtrados.groupby('customer_state')['payment_value'].mean().reset_index()
-        ticket_estado = ticket_estado.sort_values('payment_value', ascending=True)
-        fig_ticket_estado = px.bar(
-            ticket_estado,
-            x='payment_value',
-            y='customer_state',
-            orientation='h',
-            labels={'customer_state': 'Estado', 'payment_value': 'Ticket Médio (R$)'},
-            color='payment_value',
-            color_continuous_scale='Blues',
-            template='seaborn',
-            height=600
-        )
-        fig_ticket_estado.update_layout(title='Ticket Médio por Estado', title_x=0.5, xaxis_title='Ticket Médio (R$)', yaxis_title='Estado', font=dict(family='Montserrat', size=16))
-        st.plotly_chart(fig_ticket_estado, use_container_width=True, key='fig_ticket_estado')
-    
-        st.markdown('### Detalhes dos Clientes')
-        st.dataframe(
-            dados_filtrados[
-                [
-                    'customer_unique_id',
-                    'customer_city',
-                    'customer_state',
-                    'order_id',
-                    'price',
-                    'review_score'
-                ]
-            ].drop_duplicates(subset='customer_unique_id').reset_index(drop=True),
-            height=400
-        )
-    
-    with tabs[5]:
-        st.markdown("<h3 style='text-align:center; color:#333; font-family:Montserrat;'>Análise de Produtos</h3>", unsafe_allow_html=True)
-        top_produtos = dados_filtrados.groupby('product_id').agg({
-            'product_category_name_english': 'first',
-            'price': 'mean',
-            'order_id': 'count'
-        }).reset_index()
-        top_produtos = top_produtos.rename(columns={'order_id': 'Quantidade de Vendas'})
-        top_produtos = top_produtos.sort_values('Quantidade de Vendas', ascending=False).head(10)
-        fig_top_produtos = px.bar(
-            top_produtos,
-            x='Quantidade de Vendas',
-            y='product_id',
-            orientation='h',
-            labels={'product_id': 'ID do Produto', 'Quantidade de Vendas': 'Quantidade de Vendas'},
-            color='Quantidade de Vendas',
-            color_continuous_scale='Blues',
+
+    if 'Ticket Médio' in metricas_selecionadas:
+        exibir_grafico(
+            'fig_ticket',
+            px.line,
+            vendas_tempo,
+            layout=dict(title='Ticket Médio ao Longo do Tempo', title_x=0.5, xaxis_title='Data', yaxis_title='Ticket Médio (R$)', font=dict(family='Montserrat', size=16)),
+            tracos=dict(line_width=3),
+            x='order_purchase_timestamp',
+            y='Ticket Médio',
+            labels={'order_purchase_timestamp': 'Data', 'Ticket Médio': 'Ticket Médio (R$)'},
             template='seaborn',
-            height=600
+            height=600,
+            color_discrete_sequence=['#2980b9']
         )
-        fig_top_produtos.update_layout(title='Top 10 Produtos Mais Vendidos', title_x=0.5, xaxis_title='Quantidade de Vendas', yaxis_title='ID do Produto', font=dict(family='Montserrat', size=16))
-        st.plotly_chart(fig_top_produtos, use_container_width=True, key='fig_top_produtos')
-    
-        st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Vendas por Categoria</h4>", unsafe_allow_html=True)
-        vendas_por_categoria = dados_filtrados.groupby('product_category_name_english')['price'].sum().reset_index()
-        vendas_por_categoria = vendas_por_categoria.sort_values('price', ascending=True)
-        fig_vendas_categoria = px.bar(
-            vendas_por_categoria,
-            x='price',
-            y='product_category_name_english',
-            orientation='h',
-            labels={'product_category_name_english': 'Categoria', 'price': 'Vendas (R$)'},
-            color='price',
+
+    exibir_grafico(
+        'fig_cumulative',
+        px.area,
+        vendas_tempo,
+        layout=dict(title='Vendas Cumulativas ao Longo do Tempo', title_x=0.5, xaxis_title='Data', yaxis_title='Vendas Cumulativas (R$)', font=dict(family='Montserrat', size=16)),
+        x='order_purchase_timestamp',
+        y='Vendas Cumulativas',
+        labels={'order_purchase_timestamp': 'Data', 'Vendas Cumulativas': 'Vendas Cumulativas (R$)'},
+        template='seaborn',
+        height=600,
+        color_discrete_sequence=['#2980b9']
+    )
+
+
+def aba_vendas_estado(recorte, chaves):
+    st.markdown("<h3 style='text-align:center; color:#333; font-family:Montserrat;'>Vendas por Estado</h3>", unsafe_allow_html=True)
+    vendas_estado = recorte.consultar('vendas_estado')
+    estados_selecionados_vendas = st.multiselect('Selecione os Estados para Visualizar', options=sorted(vendas_estado['customer_state']))
+    if estados_selecionados_vendas:
+        vendas_estado_filtrado = vendas_estado[vendas_estado['customer_state'].isin(estados_selecionados_vendas)]
+    else:
+        vendas_estado_filtrado = vendas_estado
+    exibir_grafico(
+        'fig_estado',
+        px.bar,
+        vendas_estado_filtrado,
+        layout=dict(title='Vendas por Estado', title_x=0.5, xaxis_title='Vendas (R$)', yaxis_title='Estado', font=dict(family='Montserrat', size=16)),
+        x='price',
+        y='customer_state',
+        orientation='h',
+        labels={'customer_state': 'Estado', 'price': 'Vendas (R$)'},
+        color='price',
+        color_continuous_scale='Blues',
+        template='seaborn',
+        height=600
+    )
+
+    st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Mapa Interativo de Vendas por Estado</h4>", unsafe_allow_html=True)
+    vendas_estado_mapa = vendas_estado_filtrado.copy()
+    vendas_estado_mapa['Estado'] = vendas_estado_mapa['customer_state']
+    vendas_estado_mapa['Vendas'] = vendas_estado_mapa['price']
+    exibir_mapa(
+        'fig_mapa',
+        vendas_estado_mapa,
+        layout=dict(title='Mapa de Vendas por Estado', title_x=0.5, font=dict(family='Montserrat', size=16)),
+        locations='Estado',
+        featureidkey='properties.sigla',
+        color='Vendas',
+        color_continuous_scale='Blues',
+        scope='south america',
+        labels={'Vendas': 'Vendas (R$)'},
+        template='seaborn',
+        height=600
+    )
+
+    st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Vendas por Estado e Categoria</h4>", unsafe_allow_html=True)
+    vendas_estado_categoria = recorte.consultar('vendas_estado_categoria')
+    if estados_selecionados_vendas:
+        vendas_estado_categoria = vendas_estado_categoria[vendas_estado_categoria['customer_state'].isin(estados_selecionados_vendas)]
+    exibir_grafico(
+        'fig_sunburst',
+        px.sunburst,
+        vendas_estado_categoria,
+        layout=dict(title='Vendas por Estado e Categoria', title_x=0.5, font=dict(family='Montserrat', size=16)),
+        path=['customer_state', 'product_category_name_english'],
+        values='price',
+        color='price',
+        color_continuous_scale='Blues',
+        labels={'customer_state': 'Estado', 'product_category_name_english': 'Categoria', 'price': 'Vendas (R$)'},
+        height=600
+    )
+
+
+def aba_vendas_categoria(recorte, chaves):
+    st.markdown("<h3 style='text-align:center; color:#333; font-family:Montserrat;'>Vendas por Categoria</h3>", unsafe_allow_html=True)
+    grafico_vendas_categoria(recorte, 'fig_categoria')
+
+    dispersao = recorte.consultar('dispersao_preco_frete', limite_pontos)
+    exibir_grafico(
+        'fig_disp',
+        px.scatter,
+        decodificar_ids(dispersao['pontos'], chaves),
+        layout=dict(title='Preço vs. Frete por Categoria', title_x=0.5, font=dict(family='Montserrat', size=16)),
+        x='price',
+        y='freight_value',
+        color='product_category_name_english',
+        hover_data=['product_id'],
+        labels={'price': 'Preço (R$)', 'freight_value': 'Valor do Frete (R$)', 'product_category_name_english': 'Categoria'},
+        template='seaborn',
+        height=600
+    )
+    legenda_dispersao(dispersao['total'], len(dispersao['pontos']), 'amostra estratificada por categoria')
+
+
+def aba_logistica(recorte, chaves):
+    st.markdown("<h3 style='text-align:center; color:#333; font-family:Montserrat;'>Análise Logística</h3>", unsafe_allow_html=True)
+    col1, col2, col3 = st.columns(3)
+    indicadores_logistica = recorte.consultar('indicadores_logistica')
+    media_atraso = indicadores_logistica['media_atraso']
+    tempo_entrega_media = indicadores_logistica['tempo_entrega_media']
+    percentual_atraso = indicadores_logistica['percentual_atraso']
+    with col1:
+        st.markdown(f"<div class='card'><div class='metric'>Atraso Médio (dias)</div><div class='big-number'>{media_atraso:.2f}</div></div>", unsafe_allow_html=True)
+    with col2:
+        st.markdown(f"<div class='card'><div class='metric'>Tempo Médio de Entrega (dias)</div><div class='big-number'>{tempo_entrega_media:.2f}</div></div>", unsafe_allow_html=True)
+    with col3:
+        st.markdown(f"<div class='card'><div class='metric'>Pedidos com Atraso (%)</div><div class='big-number'>{percentual_atraso:.2f}%</div></div>", unsafe_allow_html=True)
+
+    quantis_logistica = recorte.consultar('quantis_logistica')
+    for coluna, (titulo, chave) in zip(st.columns(4), [
+        ('Tempo de Entrega P90 (dias)', 'entrega_p90'),
+        ('Tempo de Entrega P99 (dias)', 'entrega_p99'),
+        ('Atraso P90 (dias)', 'atraso_p90'),
+        ('Atraso P99 (dias)', 'atraso_p99'),
+    ]):
+        with coluna:
+            st.markdown(f"<div class='card'><div class='metric'>{titulo}</div><div class='big-number'>{quantis_logistica[chave]:.1f}</div></div>", unsafe_allow_html=True)
+
+    st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Atraso de Entrega por Estado</h4>", unsafe_allow_html=True)
+    atraso_estado = recorte.consultar('atraso_estado')
+    exibir_grafico(
+        'fig_atraso_estado',
+        px.bar,
+        atraso_estado,
+        layout=dict(title='Percentual de Pedidos com Atraso por Estado', title_x=0.5, xaxis_title='Percentual de Atraso (%)', yaxis_title='Estado', font=dict(family='Montserrat', size=16)),
+        x='Percentual de Atraso',
+        y='customer_state',
+        orientation='h',
+        labels={'customer_state': 'Estado', 'Percentual de Atraso': 'Percentual de Atraso (%)'},
+        color='Percentual de Atraso',
+        color_continuous_scale='Blues',
+        template='seaborn',
+        height=600
+    )
+
+    st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Tempo Médio de Entrega por Estado</h4>", unsafe_allow_html=True)
+    entrega_estado = recorte.consultar('entrega_estado')
+    exibir_grafico(
+        'fig_entrega_estado',
+        px.bar,
+        entrega_estado,
+        layout=dict(title='Tempo Médio de Entrega por Estado', title_x=0.5, xaxis_title='Tempo Médio de Entrega (dias)', yaxis_title='Estado', font=dict(family='Montserrat', size=16)),
+        x='Tempo de Entrega',
+        y='customer_state',
+        orientation='h',
+        labels={'customer_state': 'Estado', 'Tempo de Entrega': 'Tempo Médio de Entrega (dias)'},
+        color='Tempo de Entrega',
+        color_continuous_scale='Blues',
+        template='seaborn',
+        height=600
+    )
+
+    st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Evolução do Tempo Médio de Entrega</h4>", unsafe_allow_html=True)
+    entrega_tempo = recorte.consultar('entrega_tempo')
+    exibir_grafico(
+        'fig_entrega_tempo',
+        px.line,
+        entrega_tempo,
+        layout=dict(title='Evolução do Tempo Médio de Entrega', title_x=0.5, xaxis_title='Data', yaxis_title='Tempo Médio de Entrega (dias)', font=dict(family='Montserrat', size=16)),
+        x='order_purchase_timestamp',
+        y='Tempo de Entrega',
+        labels={'order_purchase_timestamp': 'Data', 'Tempo de Entrega': 'Tempo Médio de Entrega (dias)'},
+        template='seaborn',
+        height=600
+    )
+
+    st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Percentis de Entrega</h4>", unsafe_allow_html=True)
+    medida_quantis = st.selectbox(
+        'Medida',
+        options=list(MEDIDAS_QUANTIS),
+        format_func=lambda x: {'Tempo de Entrega': 'Tempo de Entrega', 'delivery_delay': 'Atraso em relação ao prazo'}[x],
+        key='medida_quantis'
+    )
+    rotulo_medida = {'Tempo de Entrega': 'Tempo de Entrega (dias)', 'delivery_delay': 'Atraso (dias)'}[medida_quantis]
+    quantis_estado = recorte.consultar('quantis_estado', medida_quantis)
+    exibir_grafico(
+        'fig_quantis_estado',
+        px.bar,
+        quantis_estado.melt(id_vars='customer_state', var_name='Percentil', value_name='Dias'),
+        layout=dict(title=f'{rotulo_medida}: P50, P90 e P99 por Estado', title_x=0.5, xaxis_title=rotulo_medida, yaxis_title='Estado', font=dict(family='Montserrat', size=16)),
+        x='Dias',
+        y='customer_state',
+        color='Percentil',
+        barmode='group',
+        orientation='h',
+        labels={'customer_state': 'Estado', 'Dias': rotulo_medida},
+        template='seaborn',
+        height=800
+    )
+
+    quantis_tempo = recorte.consultar('quantis_tempo', medida_quantis)
+    exibir_grafico(
+        'fig_quantis_tempo',
+        px.line,
+        quantis_tempo.melt(id_vars='order_purchase_timestamp', var_name='Percentil', value_name='Dias'),
+        layout=dict(title=f'Evolução Mensal dos Percentis de {rotulo_medida}', title_x=0.5, xaxis_title='Data', yaxis_title=rotulo_medida, font=dict(family='Montserrat', size=16)),
+        x='order_purchase_timestamp',
+        y='Dias',
+        color='Percentil',
+        labels={'order_purchase_timestamp': 'Data', 'Dias': rotulo_medida},
+        template='seaborn',
+        height=600
+    )
+
+    st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Relação entre Tempo de Entrega e Avaliação</h4>", unsafe_allow_html=True)
+    dispersao = recorte.consultar('dispersao_entrega_avaliacao', limite_pontos)
+    densidade = dict(size='Quantidade', color='Quantidade', color_continuous_scale='Blues') if dispersao['agrupado'] else {}
+    exibir_grafico(
+        'fig_tempo_avaliacao',
+        px.scatter,
+        dispersao['pontos'],
+        layout=dict(title='Relação entre Tempo de Entrega e Avaliação', title_x=0.5, xaxis_title='Tempo de Entrega (dias)', yaxis_title='Avaliação', font=dict(family='Montserrat', size=16)),
+        x='Tempo de Entrega',
+        y='review_score',
+        labels={'Tempo de Entrega': 'Tempo de Entrega (dias)', 'review_score': 'Avaliação'},
+        template='seaborn',
+        height=600,
+        **densidade
+    )
+    legenda_dispersao(dispersao['total'], len(dispersao['pontos']), 'densidade agrupada em caixas')
+
+    st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Mapa de Tempo Médio de Entrega por Estado</h4>", unsafe_allow_html=True)
+    entrega_estado_mapa = entrega_estado.copy()
+    entrega_estado_mapa['Estado'] = entrega_estado_mapa['customer_state']
+    entrega_estado_mapa['Tempo Médio de Entrega'] = entrega_estado_mapa['Tempo de Entrega']
+    exibir_mapa(
+        'fig_mapa_entrega',
+        entrega_estado_mapa,
+        layout=dict(title='Mapa de Tempo Médio de Entrega por Estado', title_x=0.5, font=dict(family='Montserrat', size=16)),
+        locations='Estado',
+        featureidkey='properties.sigla',
+        color='Tempo Médio de Entrega',
+        color_continuous_scale='Blues',
+        scope='south america',
+        labels={'Tempo Médio de Entrega': 'Tempo Médio de Entrega (dias)'},
+        template='seaborn',
+        height=600
+    )
+
+
+def aba_clientes(recorte, chaves):
+    st.markdown("<h3 style='text-align:center; color:#333; font-family:Montserrat;'>Análise de Clientes</h3>", unsafe_allow_html=True)
+    clientes_estado = recorte.consultar('clientes_estado')
+    exibir_grafico(
+        'fig_clientes_estado',
+        px.bar,
+        clientes_estado,
+        layout=dict(title='Top 10 Estados por Número de Clientes', title_x=0.5, xaxis_title='Número de Clientes', yaxis_title='Estado', font=dict(family='Montserrat', size=16)),
+        x='clientes',
+        y='customer_state',
+        orientation='h',
+        labels={'customer_state': 'Estado', 'clientes': 'Número de Clientes'},
+        color='clientes',
+        color_continuous_scale='Blues',
+        template='seaborn',
+        height=600
+    )
+
+    st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Ticket Médio por Estado</h4>", unsafe_allow_html=True)
+    ticket_estado = recorte.consultar('ticket_estado')
+    exibir_grafico(
+        'fig_ticket_estado',
+        px.bar,
+        ticket_estado,
+        layout=dict(title='Ticket Médio por Estado', title_x=0.5, xaxis_title='Ticket Médio (R$)', yaxis_title='Estado', font=dict(family='Montserrat', size=16)),
+        x='payment_value',
+        y='customer_state',
+        orientation='h',
+        labels={'customer_state': 'Estado', 'payment_value': 'Ticket Médio (R$)'},
+        color='payment_value',
+        color_continuous_scale='Blues',
+        template='seaborn',
+        height=600
+    )
+
+    st.markdown('### Detalhes dos Clientes')
+    tabela_paginada(recorte, chaves, 'clientes')
+
+
+def aba_produtos(recorte, chaves):
+    st.markdown("<h3 style='text-align:center; color:#333; font-family:Montserrat;'>Análise de Produtos</h3>", unsafe_allow_html=True)
+    top_produtos = decodificar_ids(recorte.consultar('top_produtos'), chaves)
+    exibir_grafico(
+        'fig_top_produtos',
+        px.bar,
+        top_produtos,
+        layout=dict(title='Top 10 Produtos Mais Vendidos', title_x=0.5, xaxis_title='Quantidade de Vendas', yaxis_title='ID do Produto', font=dict(family='Montserrat', size=16)),
+        x='Quantidade de Vendas',
+        y='product_id',
+        orientation='h',
+        labels={'product_id': 'ID do Produto', 'Quantidade de Vendas': 'Quantidade de Vendas'},
+        color='Quantidade de Vendas',
+        color_continuous_scale='Blues',
+        template='seaborn',
+        height=600
+    )
+
+    st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Vendas por Categoria</h4>", unsafe_allow_html=True)
+    grafico_vendas_categoria(recorte, 'fig_vendas_categoria')
+
+    st.markdown('### Detalhes dos Produtos')
+    tabela_paginada(recorte, chaves, 'produtos')
+
+
+def aba_pagamentos(recorte, chaves):
+    st.markdown("<h3 style='text-align:center; color:#333; font-family:Montserrat;'>Análise de Pagamentos</h3>", unsafe_allow_html=True)
+
+    total_pagamento = recorte.consultar('total_pagamento')
+    exibir_grafico(
+        'fig_total_pagamento',
+        px.pie,
+        total_pagamento,
+        layout=dict(title_x=0.5, font=dict(family='Montserrat', size=16)),
+        names='payment_type',
+        values='payment_value',
+        title='Total de Vendas por Método de Pagamento',
+        color_discrete_sequence=px.colors.sequential.Blues,
+        template='seaborn',
+        height=600
+    )
+
+    media_pagamento = recorte.consultar('media_pagamento')
+    exibir_grafico(
+        'fig_media_pagamento',
+        px.bar,
+        media_pagamento,
+        layout=dict(title='Valor Médio por Método de Pagamento', title_x=0.5, xaxis_title='Valor Médio (R$)', yaxis_title='Método de Pagamento', font=dict(family='Montserrat', size=16)),
+        x='payment_value',
+        y='payment_type',
+        orientation='h',
+        labels={'payment_type': 'Método de Pagamento', 'payment_value': 'Valor Médio (R$)'},
+        color='payment_value',
+        color_continuous_scale='Blues',
+        template='seaborn',
+        height=600
+    )
+
+    st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Métodos de Pagamento ao Longo do Tempo</h4>", unsafe_allow_html=True)
+    pagamentos_tempo = recorte.consultar('pagamentos_tempo')
+    exibir_grafico(
+        'fig_pagamentos_tempo',
+        px.area,
+        pagamentos_tempo,
+        layout=dict(title='Métodos de Pagamento ao Longo do Tempo', title_x=0.5, xaxis_title='Data', yaxis_title='Valor Pago (R$)', font=dict(family='Montserrat', size=16)),
+        x='order_purchase_timestamp',
+        y='payment_value',
+        color='payment_type',
+        labels={'order_purchase_timestamp': 'Data', 'payment_value': 'Valor Pago (R$)', 'payment_type': 'Método de Pagamento'},
+        template='seaborn',
+        height=600
+    )
+
+    st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Correlação entre Método de Pagamento e Avaliação</h4>", unsafe_allow_html=True)
+    pagamento_avaliacao = recorte.consultar('pagamento_avaliacao')
+    exibir_grafico(
+        'fig_heatmap',
+        px.density_heatmap,
+        pagamento_avaliacao,
+        layout=dict(title='Heatmap de Avaliações por Método de Pagamento', title_x=0.5, font=dict(family='Montserrat', size=16)),
+        x='review_score',
+        y='payment_type',
+        z='Quantidade',
+        color_continuous_scale='Blues',
+        template='seaborn',
+        labels={'review_score': 'Nota de Avaliação', 'payment_type': 'Método de Pagamento', 'Quantidade': 'Quantidade'}
+    )
+
+    st.markdown('### Detalhes dos Pagamentos')
+    tabela_paginada(recorte, chaves, 'pagamentos')
+
+
+def aba_vendedores(recorte, chaves):
+    st.markdown("<h3 style='text-align:center; color:#333; font-family:Montserrat;'>Vendedores e Frete</h3>", unsafe_allow_html=True)
+    frete_distancia = recorte.consultar('frete_distancia')
+    if frete_distancia.empty:
+        st.info('Distâncias indisponíveis: gere o índice de CEPs com geolocalizacao.py a partir do olist_geolocation_dataset.csv.')
+    else:
+        exibir_grafico(
+            'fig_frete_distancia',
+            px.bar,
+            frete_distancia,
+            layout=dict(title='Frete Médio por Distância entre Vendedor e Cliente', title_x=0.5, xaxis_title='Distância', yaxis_title='Frete Médio (R$)', font=dict(family='Montserrat', size=16)),
+            x='Faixa de Distância',
+            y='frete_medio',
+            labels={'frete_medio': 'Frete Médio (R$)', 'itens': 'Itens'},
+            hover_data={'itens': True, 'frete_por_km': ':.3f'},
+            color='frete_medio',
             color_continuous_scale='Blues',
             template='seaborn',
             height=600
         )
-        fig_vendas_categoria.update_layout(title='Vendas por Categoria', title_x=0.5, xaxis_title='Vendas (R$)', yaxis_title='Categoria', font=dict(family='Montserrat', size=16))
-        st.plotly_chart(fig_vendas_categoria, use_container_width=True, key='fig_vendas_categoria')
-    
-        st.markdown('### Detalhes dos Produtos')
-        st.dataframe(
-            dados_filtrados[
-                [
-                    'product_id',
-                    'product_category_name_english',
-                    'price',
-                    'freight_value',
-                    'review_score'
-                ]
-            ].drop_duplicates(subset='product_id').reset_index(drop=True),
-            height=400
-        )
-    
-    with tabs[6]:
-        st.markdown("<h3 style='text-align:center; color:#333; font-family:Montserrat;'>Análise de Pagamentos</h3>", unsafe_allow_html=True)
-    
-        total_pagamento = dados_filtrados.groupby('payment_type')['payment_value'].sum().reset_index()
-        total_pagamento = total_pagamento.sort_values('payment_value', ascending=False)
-        fig_total_pagamento = px.pie(
-            total_pagamento,
-            names='payment_type',
-            values='payment_value',
-            title='Total de Vendas por Método de Pagamento',
-            color_discrete_sequence=px.colors.sequential.Blues,
-            template='seaborn',
-            height=600
-        )
-        fig_total_pagamento.update_layout(title_x=0.5, font=dict(family='Montserrat', size=16))
-        st.plotly_chart(fig_total_pagamento, use_container_width=True, key='fig_total_pagamento')
-    
-        media_pagamento = dados_filtrados.groupby('payment_type')['payment_value'].mean().reset_index()
-        media_pagamento = media_pagamento.sort_values('payment_value', ascending=True)
-        fig_media_pagamento = px.bar(
-            media_pagamento,
-            x='payment_value',
-            y='payment_type',
+
+    st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Frete por Estado do Vendedor</h4>", unsafe_allow_html=True)
+    frete_estado_vendedor = recorte.consultar('frete_estado_vendedor')
+    exibir_grafico(
+        'fig_frete_estado_vendedor',
+        px.bar,
+        frete_estado_vendedor,
+        layout=dict(title='Frete Médio por Estado do Vendedor', title_x=0.5, xaxis_title='Frete Médio (R$)', yaxis_title='Estado do Vendedor', font=dict(family='Montserrat', size=16)),
+        x='frete_medio',
+        y='seller_state',
+        orientation='h',
+        labels={'seller_state': 'Estado do Vendedor', 'frete_medio': 'Frete Médio (R$)', 'distancia_media': 'Distância Média (km)'},
+        hover_data={'distancia_media': ':.0f'},
+        color='frete_medio',
+        color_continuous_scale='Blues',
+        template='seaborn',
+        height=600
+    )
+
+    st.markdown('### Principais Vendedores')
+    desempenho_vendedores = decodificar_ids(recorte.consultar('desempenho_vendedores'), chaves)
+    st.dataframe(
+        desempenho_vendedores.rename(columns={
+            'seller_id': 'Vendedor',
+            'seller_state': 'Estado',
+            'itens': 'Itens',
+            'receita': 'Receita (R$)',
+            'frete_medio': 'Frete Médio (R$)',
+            'distancia_media': 'Distância Média (km)',
+            'tempo_entrega': 'Tempo de Entrega (dias)',
+            'percentual_atraso': 'Atraso (%)',
+            'nota_media': 'Nota Média',
+        }),
+        hide_index=True,
+    )
+
+
+def aba_avaliacoes(recorte, chaves):
+    st.markdown("<h3 style='text-align:center; color:#333; font-family:Montserrat;'>Análise de Avaliações</h3>", unsafe_allow_html=True)
+    avaliacoes = recorte.consultar('avaliacoes')
+    exibir_grafico(
+        'fig_avaliacoes',
+        px.bar,
+        avaliacoes,
+        layout=dict(title='Distribuição das Avaliações', title_x=0.5, xaxis_title='Nota', yaxis_title='Quantidade', font=dict(family='Montserrat', size=16)),
+        x='review_score',
+        y='Quantidade',
+        labels={'review_score': 'Nota', 'Quantidade': 'Quantidade'},
+        color='Quantidade',
+        color_continuous_scale='Blues',
+        template='seaborn',
+        height=600
+    )
+
+    st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Avaliação Média por Categoria</h4>", unsafe_allow_html=True)
+    avaliacoes_categoria = recorte.consultar('avaliacoes_categoria')
+    exibir_grafico(
+        'fig_avaliacoes_categoria',
+        px.bar,
+        avaliacoes_categoria,
+        layout=dict(title='Avaliação Média por Categoria', title_x=0.5, xaxis_title='Avaliação Média', yaxis_title='Categoria', font=dict(family='Montserrat', size=16)),
+        x='review_score',
+        y='product_category_name_english',
+        orientation='h',
+        labels={'product_category_name_english': 'Categoria', 'review_score': 'Avaliação Média'},
+        color='review_score',
+        color_continuous_scale='Blues',
+        template='seaborn',
+        height=600
+    )
+
+    st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Evolução da Avaliação Média ao Longo do Tempo</h4>", unsafe_allow_html=True)
+    avaliacao_tempo = recorte.consultar('avaliacao_tempo')
+    exibir_grafico(
+        'fig_avaliacao_tempo',
+        px.line,
+        avaliacao_tempo,
+        layout=dict(title='Evolução da Avaliação Média', title_x=0.5, xaxis_title='Data', yaxis_title='Avaliação Média', font=dict(family='Montserrat', size=16)),
+        x='order_purchase_timestamp',
+        y='review_score',
+        labels={'order_purchase_timestamp': 'Data', 'review_score': 'Avaliação Média'},
+        template='seaborn',
+        height=600
+    )
+
+    st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Termos Mais Frequentes nos Comentários</h4>", unsafe_allow_html=True)
+    termos = recorte.consultar('termos_frequentes')
+    if termos.empty:
+        st.info('Nenhum comentário para os filtros selecionados.')
+    else:
+        exibir_grafico(
+            'fig_termos',
+            px.bar,
+            termos.sort_values('comentarios', kind='stable'),
+            layout=dict(title='Termos Mais Frequentes nos Comentários', title_x=0.5, xaxis_title='Comentários', yaxis_title='Termo', font=dict(family='Montserrat', size=16)),
+            x='comentarios',
+            y='termo',
             orientation='h',
-            labels={'payment_type': 'Método de Pagamento', 'payment_value': 'Valor Médio (R$)'},
-            color='payment_value',
-            color_continuous_scale='Blues',
-            template='seaborn',
-            height=600
-        )
-        fig_media_pagamento.update_layout(title='Valor Médio por Método de Pagamento', title_x=0.5, xaxis_title='Valor Médio (R$)', yaxis_title='Método de Pagamento', font=dict(family='Montserrat', size=16))
-        st.plotly_chart(fig_media_pagamento, use_container_width=True, key='fig_media_pagamento')
-    
-        st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Métodos de Pagamento ao Longo do Tempo</h4>", unsafe_allow_html=True)
-        pagamentos_tempo = dados_filtrados.groupby(['payment_type', pd.Grouper(key='order_purchase_timestamp', freq='M')])['payment_value'].sum().reset_index()
-        fig_pagamentos_tempo = px.area(
-            pagamentos_tempo,
-            x='order_purchase_timestamp',
-            y='payment_value',
-            color='payment_type',
-            labels={'order_purchase_timestamp': 'Data', 'payment_value': 'Valor Pago (R$)', 'payment_type': 'Método de Pagamento'},
-            template='seaborn',
-            height=600
-        )
-        fig_pagamentos_tempo.update_layout(title='Métodos de Pagamento ao Longo do Tempo', title_x=0.5, xaxis_title='Data', yaxis_title='Valor Pago (R$)', font=dict(family='Montserrat', size=16))
-        st.plotly_chart(fig_pagamentos_tempo, use_container_width=True, key='fig_pagamentos_tempo')
-    
-        st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Correlação entre Método de Pagamento e Avaliação</h4>", unsafe_allow_html=True)
-        pagamento_avaliacao = dados_filtrados.groupby(['payment_type', 'review_score']).size().reset_index(name='Quantidade')
-        fig_heatmap = px.density_heatmap(
-            pagamento_avaliacao,
-            x='review_score',
-            y='payment_type',
-            z='Quantidade',
-            color_continuous_scale='Blues',
-            template='seaborn',
-            labels={'review_score': 'Nota de Avaliação', 'payment_type': 'Método de Pagamento', 'Quantidade': 'Quantidade'}
-        )
-        fig_heatmap.update_layout(title='Heatmap de Avaliações por Método de Pagamento', title_x=0.5, font=dict(family='Montserrat', size=16))
-        st.plotly_chart(fig_heatmap, use_container_width=True, key='fig_heatmap')
-    
-        st.markdown('### Detalhes dos Pagamentos')
-        st.dataframe(
-            dados_filtrados[
-                [
-                    'order_id',
-                    'payment_type',
-                    'payment_installments',
-                    'payment_value'
-                ]
-            ].drop_duplicates(subset='order_id').reset_index(drop=True),
-            height=400
-        )
-    
-    with tabs[7]:
-        st.markdown("<h3 style='text-align:center; color:#333; font-family:Montserrat;'>Análise de Avaliações</h3>", unsafe_allow_html=True)
-        avaliacoes = dados_filtrados.groupby('review_score').agg({'order_id':'count'}).reset_index()
-        avaliacoes.rename(columns={'order_id':'Quantidade'}, inplace=True)
-        fig_avaliacoes = px.bar(
-            avaliacoes,
-            x='review_score',
-            y='Quantidade',
-            labels={'review_score': 'Nota', 'Quantidade': 'Quantidade'},
-            color='Quantidade',
+            labels={'termo': 'Termo', 'comentarios': 'Comentários', 'percentual': '% dos Comentários'},
+            hover_data={'percentual': ':.1f'},
+            color='comentarios',
             color_continuous_scale='Blues',
             template='seaborn',
             height=600
         )
-        fig_avaliacoes.update_layout(title='Distribuição das Avaliações', title_x=0.5, xaxis_title='Nota', yaxis_title='Quantidade', font=dict(family='Montserrat', size=16))
-        st.plotly_chart(fig_avaliacoes, use_container_width=True, key='fig_avaliacoes')
-    
-        st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Avaliação Média por Categoria</h4>", unsafe_allow_html=True)
-        avaliacoes_categoria = dados_filtrados.groupby('product_category_name_english')['review_score'].mean().reset_index()
-        avaliacoes_categoria = avaliacoes_categoria.sort_values('review_score', ascending=False)
-        fig_avaliacoes_categoria = px.bar(
-            avaliacoes_categoria,
-            x='review_score',
-            y='product_category_name_english',
-            orientation='h',
-            labels={'product_category_name_english': 'Categoria', 'review_score': 'Avaliação Média'},
-            color='review_score',
+
+        agrupamentos = {'Nota': 'review_score', 'Categoria': 'product_category_name_english'}
+        agrupamento = st.selectbox('Comparar termos por', list(agrupamentos), key='agrupamento_termos')
+        termos_grupo = recorte.consultar('termos_frequentes', agrupamentos[agrupamento])
+        exibir_grafico(
+            'fig_termos_grupo',
+            px.density_heatmap,
+            termos_grupo,
+            layout=dict(title=f'Presença dos Termos nos Comentários por {agrupamento}', title_x=0.5, xaxis_title=agrupamento, yaxis_title='Termo', font=dict(family='Montserrat', size=16)),
+            x='grupo',
+            y='termo',
+            z='percentual',
+            histfunc='sum',
             color_continuous_scale='Blues',
+            labels={'grupo': agrupamento, 'termo': 'Termo', 'percentual': '% dos Comentários'},
             template='seaborn',
-            height=600
+            height=700
         )
-        fig_avaliacoes_categoria.update_layout(title='Avaliação Média por Categoria', title_x=0.5, xaxis_title='Avaliação Média', yaxis_title='Categoria', font=dict(family='Montserrat', size=16))
-        st.plotly_chart(fig_avaliacoes_categoria, use_container_width=True, key='fig_avaliacoes_categoria')
+
+    st.markdown('### Comentários dos Clientes')
+    tabela_paginada(recorte, chaves, 'comentarios')
+
+
+ABAS = {
+    'Vendas Mensais': aba_vendas_mensais,
+    'Vendas por Estado': aba_vendas_estado,
+    'Vendas por Categoria': aba_vendas_categoria,
+    'Análise Logística': aba_logistica,
+    'Análise de Clientes': aba_clientes,
+    'Produtos': aba_produtos,
+    'Análise de Pagamentos': aba_pagamentos,
+    'Vendedores e Frete': aba_vendedores,
+    'Avaliações': aba_avaliacoes,
+}
+
+if indicadores['itens'] == 0:
+    st.warning('Nenhum dado disponível para os filtros selecionados. Por favor, ajuste os filtros.')
+else:
+    with st.container():
+        st.markdown("<h2 style='text-align:center; color:#333; font-family:Montserrat;'>Principais Indicadores</h2>", unsafe_allow_html=True)
+        col1, col2, col3, col4 = st.columns(4)
+        total_vendas = indicadores['total_vendas']
+        qtd_pedidos = indicadores['qtd_pedidos']
+        clientes_unicos = ('≈ ' if indicadores['clientes_aproximado'] else '') + str(indicadores['clientes_unicos'])
+        nota_media = indicadores['nota_media']
+        with col1:
+            st.markdown(f"<div class='card'><div class='metric'>Total de Vendas</div><div class='big-number'>R$ {total_vendas:,.2f}</div></div>", unsafe_allow_html=True)
+        with col2:
+            st.markdown(f"<div class='card'><div class='metric'>Pedidos</div><div class='big-number'>{qtd_pedidos}</div></div>", unsafe_allow_html=True)
+        with col3:
+            st.markdown(f"<div class='card'><div class='metric'>Clientes Únicos</div><div class='big-number'>{clientes_unicos}</div></div>", unsafe_allow_html=True)
+        with col4:
+            st.markdown(f"<div class='card'><div class='metric'>Nota Média</div><div class='big-number'>{nota_media:.2f}</div></div>", unsafe_allow_html=True)
     
-        st.markdown("<h4 style='text-align:center; color:#333; font-family:Montserrat;'>Evolução da Avaliação Média ao Longo do Tempo</h4>", unsafe_allow_html=True)
-        avaliacao_tempo = dados_filtrados.set_index('order_purchase_timestamp').resample('M')['review_score'].mean().reset_index()
-        fig_avaliacao_tempo = px.line(
-            avaliacao_tempo,
-            x='order_purchase_timestamp',
-            y='review_score',
-            labels={'order_purchase_timestamp': 'Data', 'review_score': 'Avaliação Média'},
-            template='seaborn',
-            height=600
-        )
-        fig_avaliacao_tempo.update_layout(title='Evolução da Avaliação Média', title_x=0.5, xaxis_title='Data', yaxis_title='Avaliação Média', font=dict(family='Montserrat', size=16))
-        st.plotly_chart(fig_avaliacao_tempo, use_container_width=True, key='fig_avaliacao_tempo')
+    st.markdown("---")
     
-        st.markdown('### Comentários dos Clientes')
-        comentarios = dados_filtrados[['review_score', 'review_comment_message', 'product_category_name_english', 'customer_state']].dropna()
-        comentarios = comentarios[comentarios['review_comment_message'] != '']
-        st.dataframe(comentarios[['review_score', 'review_comment_message', 'product_category_name_english', 'customer_state']].reset_index(drop=True), height=400)
+    if abas_sob_demanda:
+        aba_selecionada = st.radio('Aba', options=list(ABAS), horizontal=True, key='aba_selecionada', label_visibility='collapsed')
+        with etapa(f'aba:{aba_selecionada}'):
+            ABAS[aba_selecionada](recorte, chaves)
+    else:
+        for aba, (nome_aba, renderizar) in zip(st.tabs(list(ABAS)), ABAS.items()):
+            with aba, etapa(f'aba:{nome_aba}'):
+                renderizar(recorte, chaves)
+
+with st.sidebar.expander('Desempenho'):
+    estatisticas_cache = cache_agregacoes.estatisticas()
+    st.caption(f"Cache de agregações: {estatisticas_cache['acertos']} acertos, {estatisticas_cache['falhas']} falhas, {estatisticas_cache['entradas']} entradas em {estatisticas_cache['ocupado_mb']:.1f}/{estatisticas_cache['capacidade_mb']:.0f} MB")
+    progresso = aquecimento.progresso()
+    if progresso['pronto']:
+        st.caption(f"Aquecimento concluído: {progresso['concluidas']} combinações de período e estado em {progresso['duracao_s']:.1f}s ({progresso['falhas']} falhas)")
+    else:
+        st.caption(f"Aquecendo o cache: {progresso['concluidas']}/{progresso['combinacoes']} combinações de período e estado ({progresso['trabalhadores']} threads)")
+    estatisticas_figuras = cache_figuras.estatisticas()
+    st.caption(f"Cache de figuras: {estatisticas_figuras['acertos']} acertos, {estatisticas_figuras['falhas']} falhas, {estatisticas_figuras['entradas']} figuras em {estatisticas_figuras['ocupado_mb']:.1f}/{estatisticas_figuras['capacidade_mb']:.0f} MB")
+    if tempos_carga:
+        st.caption('Carga dos CSVs: ' + ', '.join(f'{nome} {segundos:.2f}s' for nome, segundos in tempos_carga.items()))
+    st.caption(f'Execução {medicoes.execucao}: {medicoes.total_ms():.0f} ms nas etapas medidas')
+    st.toggle('Painel de desempenho detalhado', key='painel_desempenho', help='Lista cada etapa desta execução e mede o tamanho das figuras enviadas ao navegador.')
+    if medicoes.detalhado:
+        registros = pd.DataFrame(medicoes.registros).sort_values('inicio_ms')
+        registros['etapa'] = registros['nivel'].map(lambda nivel: '· ' * nivel) + registros['etapa']
+        if 'parametros' in registros:
+            registros['parametros'] = registros['parametros'].map(lambda parametros: ', '.join(map(str, parametros)) if isinstance(parametros, tuple) else '')
+        st.dataframe(registros.drop(columns=['execucao', 'nivel']), hide_index=True)
@@ -0,0 +1,236 @@
+import os
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from artefatos import COLUNA_PARTICAO, PASTA_ARTEFATOS, TABELAS_MODELO
+from cubo import razao
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+
+def duckdb_disponivel():
+    return duckdb is not None
+
+
+def condicao_itens(filtro):
+    condicoes = ['order_purchase_timestamp >= ?', 'order_purchase_timestamp < ?', 'review_score >= ?']
+    parametros = [
+        datetime.combine(filtro.inicio, datetime.min.time()),
+        datetime.combine(filtro.fim + timedelta(days=1), datetime.min.time()),
+        filtro.nota_minima,
+    ]
+    for coluna, valores in (('customer_state', filtro.estados), ('product_category_name_english', filtro.categorias)):
+        if valores:
+            condicoes.append(f"{coluna} IN ({', '.join('?' * len(valores))})")
+            parametros.extend(valores)
+    if filtro.preco_min is not None:
+        condicoes.append('price >= ?')
+        parametros.append(filtro.preco_min)
+    if filtro.preco_max is not None:
+        condicoes.append('price <= ?')
+        parametros.append(filtro.preco_max)
+    return ' AND '.join(condicoes), parametros
+
+
+class MotorDuckDB:
+    AGREGACOES = {
+        'indicadores', 'vendas_tempo', 'vendas_estado', 'vendas_estado_categoria', 'vendas_categoria',
+        'indicadores_logistica', 'atraso_estado', 'entrega_estado', 'entrega_tempo', 'clientes_estado',
+        'ticket_estado', 'top_produtos', 'total_pagamento', 'media_pagamento', 'pagamentos_tempo',
+        'pagamento_avaliacao', 'avaliacoes', 'avaliacoes_categoria', 'avaliacao_tempo',
+    }
+
+    def __init__(self, conexao):
+        self.conexao = conexao
+        self.trava = threading.Lock()
+
+    @classmethod
+    def de_artefato(cls, versao, pasta=PASTA_ARTEFATOS):
+        conexao = duckdb.connect()
+        for nome in TABELAS_MODELO:
+            caminho = os.path.join(pasta, versao, nome, '**', '*.parquet').replace("'", "''")
+            conexao.execute(f"CREATE VIEW {nome} AS SELECT * EXCLUDE ({COLUNA_PARTICAO}) FROM read_parquet('{caminho}', hive_partitioning = true)")
+        return cls(conexao)
+
+    @classmethod
+    def de_modelo(cls, modelo):
+        conexao = duckdb.connect()
+        for nome in TABELAS_MODELO:
+            conexao.register(nome, modelo[nome])
+        return cls(conexao)
+
+    def consultar(self, filtro, sql):
+        condicao, parametros = condicao_itens(filtro)
+        recortes = f"""
+            WITH itens_f AS (SELECT * FROM itens WHERE {condicao}),
+            pedidos_f AS (SELECT * FROM pedidos WHERE order_id IN (SELECT order_id FROM itens_f)),
+            pagamentos_f AS (SELECT * FROM pagamentos WHERE order_id IN (SELECT order_id FROM itens_f))
+        """
+        with self.trava:
+            return self.conexao.execute(recortes + sql, parametros).df()
+
+    def filtrar(self, filtro):
+        return (
+            self.consultar(filtro, 'SELECT * FROM itens_f ORDER BY order_purchase_timestamp, order_id, order_item_id'),
+            self.consultar(filtro, 'SELECT * FROM pedidos_f ORDER BY order_purchase_timestamp, order_id'),
+            self.consultar(filtro, 'SELECT * FROM pagamentos_f ORDER BY order_purchase_timestamp, order_id, payment_sequential'),
+        )
+
+    def suporta(self, nome):
+        return nome in self.AGREGACOES
+
+    def responder(self, nome, filtro, *parametros):
+        return getattr(self, nome)(filtro, *parametros)
+
+    def por_dia(self, filtro, tabela, medidas, chaves=()):
+        colunas = ''.join(f'{chave}, ' for chave in chaves)
+        agrupado = self.consultar(filtro, f"""
+            SELECT {colunas}date_trunc('day', order_purchase_timestamp) AS order_purchase_timestamp, {medidas}
+            FROM {tabela} GROUP BY ALL ORDER BY ALL
+        """)
+        agrupado['order_purchase_timestamp'] = agrupado['order_purchase_timestamp'].astype('datetime64[ns]')
+        return agrupado
+
+    def media_mensal(self, filtro, coluna):
+        somas = self.por_dia(filtro, 'pedidos_f', f'sum("{coluna}") AS soma, count("{coluna}") AS contagem')
+        somas = somas.set_index('order_purchase_timestamp')[['soma', 'contagem']].resample('M').sum()
+        return razao(somas['soma'], somas['contagem']).reset_index(name=coluna)
+
+    def indicadores(self, filtro):
+        resultado = self.consultar(filtro, """
+            SELECT
+                (SELECT count(*) FROM itens_f) AS itens,
+                (SELECT coalesce(sum(price), 0) FROM itens_f) AS total_vendas,
+                count(*) AS qtd_pedidos,
+                count(DISTINCT customer_unique_id) AS clientes_unicos,
+                avg(review_score) AS nota_media
+            FROM pedidos_f
+        """).iloc[0]
+        return {
+            'itens': int(resultado['itens']),
+            'total_vendas': resultado['total_vendas'],
+            'qtd_pedidos': int(resultado['qtd_pedidos']),
+            'clientes_unicos': int(resultado['clientes_unicos']),
+            'clientes_aproximado': False,
+            'nota_media': float(resultado['nota_media']) if pd.notna(resultado['nota_media']) else np.nan,
+        }
+
+    def vendas_tempo(self, filtro, frequencia):
+        vendas = self.por_dia(filtro, 'itens_f', 'sum(price) AS price').set_index('order_purchase_timestamp').resample(frequencia).sum()
+        pedidos = self.por_dia(filtro, 'pedidos_f', 'count(*) AS pedidos, sum(payment_value) AS pago_soma')
+        pedidos = pedidos.set_index('order_purchase_timestamp').resample(frequencia).sum()
+        tempo = vendas.join(pd.DataFrame({
+            'Quantidade de Pedidos': pedidos['pedidos'],
+            'Ticket Médio': razao(pedidos['pago_soma'], pedidos['pedidos']),
+        }), how='outer').reset_index()
+        tempo['Vendas Cumulativas'] = tempo['price'].cumsum()
+        return tempo
+
+    def vendas_estado(self, filtro):
+        return self.consultar(filtro, """
+            SELECT customer_state, sum(price) AS price FROM itens_f
+            WHERE customer_state IS NOT NULL GROUP BY 1 ORDER BY price, customer_state
+        """)
+
+    def vendas_estado_categoria(self, filtro):
+        return self.consultar(filtro, """
+            SELECT customer_state, product_category_name_english, sum(price) AS price FROM itens_f
+            WHERE customer_state IS NOT NULL AND product_category_name_english IS NOT NULL
+            GROUP BY 1, 2 ORDER BY 1, 2
+        """)
+
+    def vendas_categoria(self, filtro):
+        return self.consultar(filtro, """
+            SELECT product_category_name_english, sum(price) AS price FROM itens_f
+            WHERE product_category_name_english IS NOT NULL GROUP BY 1 ORDER BY price, product_category_name_english
+        """)
+
+    def indicadores_logistica(self, filtro):
+        resultado = self.consultar(filtro, """
+            SELECT avg(delivery_delay) AS media_atraso, avg("Tempo de Entrega") AS tempo_entrega_media,
+                avg(is_late::DOUBLE) * 100 AS percentual_atraso
+            FROM pedidos_f
+        """).iloc[0]
+        return {chave: float(valor) if pd.notna(valor) else np.nan for chave, valor in resultado.items()}
+
+    def atraso_estado(self, filtro):
+        return self.consultar(filtro, """
+            SELECT customer_state, avg(is_late::DOUBLE) * 100 AS "Percentual de Atraso" FROM pedidos_f
+            WHERE customer_state IS NOT NULL GROUP BY 1 ORDER BY 2, 1
+        """)
+
+    def entrega_estado(self, filtro):
+        return self.consultar(filtro, """
+            SELECT customer_state, avg("Tempo de Entrega") AS "Tempo de Entrega" FROM pedidos_f
+            WHERE customer_state IS NOT NULL GROUP BY 1 ORDER BY 2 NULLS LAST, 1
+        """)
+
+    def entrega_tempo(self, filtro):
+        return self.media_mensal(filtro, 'Tempo de Entrega')
+
+    def clientes_estado(self, filtro):
+        return self.consultar(filtro, """
+            SELECT customer_state, count(DISTINCT customer_unique_id) AS clientes FROM pedidos_f
+            WHERE customer_state IS NOT NULL GROUP BY 1 ORDER BY 2 DESC, 1 LIMIT 10
+        """)
+
+    def ticket_estado(self, filtro):
+        return self.consultar(filtro, """
+            SELECT customer_state, avg(payment_value) AS payment_value FROM pedidos_f
+            WHERE customer_state IS NOT NULL GROUP BY 1 ORDER BY 2, 1
+        """)
+
+    def top_produtos(self, filtro):
+        return self.consultar(filtro, """
+            SELECT product_id, first(product_category_name_english ORDER BY order_purchase_timestamp, order_id, order_item_id) AS product_category_name_english,
+                avg(price) AS price, count(order_id) AS "Quantidade de Vendas"
+            FROM itens_f GROUP BY 1 ORDER BY 4 DESC, 1 LIMIT 10
+        """)
+
+    def total_pagamento(self, filtro):
+        return self.consultar(filtro, """
+            SELECT payment_type, sum(payment_value) AS payment_value FROM pagamentos_f
+            WHERE payment_type IS NOT NULL GROUP BY 1 ORDER BY 2 DESC, 1
+        """)
+
+    def media_pagamento(self, filtro):
+        return self.consultar(filtro, """
+            SELECT payment_type, avg(payment_value) AS payment_value FROM pagamentos_f
+            WHERE payment_type IS NOT NULL GROUP BY 1 ORDER BY 2, 1
+        """)
+
+    def pagamentos_tempo(self, filtro):
+        diario = self.por_dia(filtro, 'pagamentos_f', 'sum(payment_value) AS payment_value', ['payment_type'])
+        diario = diario[diario['payment_type'].notna()]
+        return diario.groupby(['payment_type', pd.Grouper(key='order_purchase_timestamp', freq='M')], observed=True)['payment_value'].sum().reset_index()
+
+    def pagamento_avaliacao(self, filtro):
+        return self.consultar(filtro, """
+            SELECT payment_type, review_score, count(*) AS Quantidade FROM pagamentos_f
+            WHERE payment_type IS NOT NULL AND review_score IS NOT NULL GROUP BY 1, 2 ORDER BY 1, 2
+        """)
+
+    def avaliacoes(self, filtro):
+        return self.consultar(filtro, """
+            SELECT review_score, count(order_id) AS Quantidade FROM pedidos_f
+            WHERE review_score IS NOT NULL GROUP BY 1 ORDER BY 1
+        """)
+
+    def avaliacoes_categoria(self, filtro):
+        return self.consultar(filtro, """
+            SELECT product_category_name_english, avg(review_score) AS review_score FROM itens_f
+            WHERE product_category_name_english IS NOT NULL GROUP BY 1 ORDER BY 2 DESC NULLS LAST, 1
+        """)
+
+    def avaliacao_tempo(self, filtro):
+        return self.media_mensal(filtro, 'review_score')
+
+
+def abrir_motor_duckdb(versao, modelo, pasta=PASTA_ARTEFATOS):
+    if os.path.isdir(os.path.join(pasta, versao)):
+        return MotorDuckDB.de_artefato(versao, pasta)
+    return MotorDuckDB.de_modelo(modelo)
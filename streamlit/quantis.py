@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+# Tempo de Entrega e delivery_delay são dias inteiros, então o esboço de cada
+# célula é o histograma esparso (valor, contagem). Células são combinadas
+# somando as contagens, e os percentis saem exatos, com a mesma interpolação
+# linear do pandas. O tamanho de cada célula é limitado pelos valores
+# distintos de dias (algumas dezenas), não pela quantidade de pedidos.
+QUANTIS = {'P50': 0.5, 'P90': 0.9, 'P99': 0.99}
+MEDIDAS_QUANTIS = {'Tempo de Entrega': 'entrega', 'delivery_delay': 'atraso'}
+
+
+def histograma_por_celula(tabela, dimensoes, coluna):
+    valores = tabela.loc[tabela[coluna].notna(), dimensoes + [coluna]]
+    histograma = valores.groupby(dimensoes + [coluna], observed=True, dropna=False).size().reset_index(name='contagem')
+    return histograma.rename(columns={coluna: 'valor'}).astype({'valor': 'int16', 'contagem': 'int32'})
+
+
+def quantis_ordenados(valores, contagens):
+    acumulado = np.cumsum(contagens)
+    if not len(acumulado) or acumulado[-1] == 0:
+        return dict.fromkeys(QUANTIS, np.nan)
+    total = int(acumulado[-1])
+    resultado = {}
+    for rotulo, quantil in QUANTIS.items():
+        posicao = (total - 1) * quantil
+        abaixo = int(np.floor(posicao))
+        inferior = valores[np.searchsorted(acumulado, abaixo, side='right')]
+        superior = valores[np.searchsorted(acumulado, min(abaixo + 1, total - 1), side='right')]
+        resultado[rotulo] = float(inferior + (posicao - abaixo) * (superior - inferior))
+    return resultado
+
+
+def estimar_quantis(histograma, grupo=None):
+    if grupo is None:
+        somado = histograma.groupby('valor')['contagem'].sum()
+        return quantis_ordenados(somado.index.to_numpy('float64'), somado.to_numpy())
+    somado = histograma.groupby([grupo, 'valor'], observed=True)['contagem'].sum()
+    linhas = {
+        chave: quantis_ordenados(parte.index.get_level_values('valor').to_numpy('float64'), parte.to_numpy())
+        for chave, parte in somado.groupby(level=grupo, observed=True)
+    }
+    return pd.DataFrame(list(linhas.values()), index=pd.Index(list(linhas), name=grupo), columns=list(QUANTIS), dtype='float64')
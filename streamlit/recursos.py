@@ -0,0 +1,75 @@
+import streamlit as st
+from agregacoes import CacheAgregacoes
+from aquecimento import Aquecimento
+from artefatos import ler_modelo, versao_atual
+from carregamento_dados import ler_tabelas
+from comentarios import abrir_indice_comentarios
+from cubo import abrir_cubo
+from dados_preprocessamento import montar_modelo
+from figuras import CacheFiguras
+from filtros import IndiceFiltros
+from geometria import NIVEL_PADRAO, abrir_geometria
+from motor_duckdb import abrir_motor_duckdb
+
+
+@st.cache_resource
+def carregar_dados():
+    return ler_tabelas()
+
+
+@st.cache_resource
+def preprocessar_dados(clientes, itens_pedidos, pagamentos_pedidos, avaliacoes_pedidos, pedidos, produtos, traducao_categorias, vendedores):
+    return montar_modelo(clientes, itens_pedidos, pagamentos_pedidos, avaliacoes_pedidos, pedidos, produtos, traducao_categorias, vendedores)
+
+
+@st.cache_resource(max_entries=2)
+def carregar_modelo(versao):
+    return ler_modelo(versao)
+
+
+@st.cache_resource(max_entries=2)
+def carregar_indice(versao, _modelo):
+    return IndiceFiltros(_modelo)
+
+
+@st.cache_resource(max_entries=2)
+def carregar_cubo(versao, _modelo):
+    return abrir_cubo(versao, _modelo)
+
+
+@st.cache_resource(max_entries=2)
+def carregar_indice_comentarios(versao, _modelo):
+    return abrir_indice_comentarios(versao, _modelo)
+
+
+@st.cache_resource(max_entries=2)
+def carregar_motor_duckdb(versao, _modelo):
+    return abrir_motor_duckdb(versao, _modelo)
+
+
+@st.cache_resource
+def carregar_cache_agregacoes():
+    return CacheAgregacoes()
+
+
+@st.cache_resource
+def carregar_cache_figuras():
+    return CacheFiguras()
+
+
+@st.cache_resource
+def carregar_geometria(nivel=NIVEL_PADRAO):
+    return abrir_geometria(nivel)
+
+
+@st.cache_resource(max_entries=2)
+def iniciar_aquecimento(versao, _modelo, _indice, _cubo, _comentarios):
+    return Aquecimento(_modelo, versao, _indice, carregar_cache_agregacoes(), _cubo, _comentarios).iniciar()
+
+
+def aquecer_versao_atual():
+    versao = versao_atual()
+    if versao is None:
+        return None
+    modelo = carregar_modelo(versao)
+    return iniciar_aquecimento(versao, modelo, carregar_indice(versao, modelo), carregar_cubo(versao, modelo), carregar_indice_comentarios(versao, modelo))
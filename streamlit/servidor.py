@@ -0,0 +1,10 @@
+import os
+import sys
+from streamlit.web import cli
+from instrumentacao import configurar_log
+from recursos import aquecer_versao_atual
+
+if __name__ == '__main__':
+    configurar_log()
+    aquecer_versao_atual()
+    cli.main(['run', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py'), *sys.argv[1:]], prog_name='streamlit')